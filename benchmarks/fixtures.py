@@ -0,0 +1,253 @@
+"""Search and detail pages for every supported site, without the network
+
+Pages recorded from the live sites with record_fixtures.py are used when they
+exist under benchmarks/recorded/. Otherwise a synthetic page is generated: it
+carries the markup the site's parser reads plus the navigation, sidebar,
+scripts and footer real pages wrap around the results, so parsing costs are
+comparable to live pages.
+"""
+
+import os
+import random
+import re
+
+RECORDED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recorded")
+# Absolute links in synthetic pages point here; the benchmark stub servers rewrite it
+BASE_URL = "https://example.org"
+
+NAMES = ["Ubuntu", "Debian", "Fedora", "Arch Linux", "Linux Mint", "openSUSE", "Big Buck Bunny",
+         "Sintel", "Tears of Steel", "Elephants Dream", "Cosmos Laundromat", "Spring"]
+TAGS = ["1080p", "720p", "2160p", "x264", "x265", "HEVC", "WEB-DL", "BluRay", "amd64", "ISO"]
+
+
+def make_rows(count, seed=0):
+    """Deterministic result rows, seeds descending like a seeders-sorted page"""
+    rng = random.Random(seed)
+    rows = []
+    seeds = 5000
+    for i in range(count):
+        seeds = max(seeds - rng.randint(0, 120), 0)
+        size = rng.uniform(0.2, 40)
+        rows.append({
+            "id": seed * 1000 + i,
+            "name": f"{rng.choice(NAMES)} {rng.randint(1, 30)}.{rng.randint(0, 12):02d} "
+                    f"{rng.choice(TAGS)} {rng.choice(TAGS)}-GRP{i % 7}",
+            "slug": f"release-{seed}-{i}",
+            "size": f"{size:.1f} GB" if size >= 1 else f"{size * 1024:.0f} MB",
+            "seeds": seeds,
+            "leeches": rng.randint(0, 400),
+            "date": f"{rng.randint(2015, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "infohash": f"{rng.getrandbits(160):040x}",
+        })
+    return rows
+
+
+def magnet(row):
+    return f"magnet:?xt=urn:btih:{row['infohash']}&dn={row['slug']}&tr=udp%3A%2F%2Ftracker.example%3A1337"
+
+
+def chrome(body, title="Search"):
+    """Wrap results in the page furniture real sites send along"""
+    nav = "".join(f'<li class="nav-item"><a href="/browse/{i}/" title="Category {i}">Category {i}</a></li>'
+                  for i in range(120))
+    sidebar = "".join(f'<div class="widget"><h4>Popular {i}</h4><ul>'
+                      + "".join(f'<li><a href="/torrent/top{i}-{j}/">Top release {i}.{j}</a> <span>{j * 13} seeders</span></li>'
+                                for j in range(10))
+                      + "</ul></div>" for i in range(12))
+    script = "var config = {" + ",".join(f'"key{i}": "{"v" * 40}"' for i in range(300)) + "};"
+    footer = "".join(f'<a href="/page/{i}">Footer link {i}</a> ' for i in range(80))
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title>'
+            f'<script>{script}</script><style>.x{{color:red}}</style></head><body>'
+            f'<header><nav><ul class="navbar">{nav}</ul></nav>'
+            f'<form class="search-form"><input name="q" value="{title}"></form></header>'
+            f'<main><div class="container"><div class="content">{body}</div>'
+            f'<aside class="sidebar">{sidebar}</aside></div></main>'
+            f'<footer><div class="links">{footer}</div></footer></body></html>')
+
+
+def td(*cells):
+    return "".join(f"<td>{cell}</td>" for cell in cells)
+
+
+def link(row, css=None):
+    attr = f' class="{css}"' if css else ""
+    return f'<a href="/torrent/{row["id"]}/{row["slug"]}/"{attr}>{row["name"]}</a>'
+
+
+def table(attrs, rows, header_cells=7):
+    head = "<thead><tr>" + "<th>h</th>" * header_cells + "</tr></thead>"
+    return f"<table {attrs}>{head}<tbody>{''.join(rows)}</tbody></table>"
+
+
+def piratebay(rows):
+    return table('id="searchResult"', [
+        f'<tr><td class="vertTh"><a href="/browse/200">Video</a></td><td><div class="detName">{link(r, "detLink")}</div>'
+        f'<a href="{magnet(r)}" title="Download this torrent using magnet"><img src="/m.gif"></a>'
+        f'<font class="detDesc">Uploaded {r["date"]}, Size {r["size"]}, ULed by <a href="/user/x">x</a></font></td>'
+        f'<td align="right">{r["seeds"]}</td><td align="right">{r["leeches"]}</td></tr>' for r in rows], 4)
+
+
+def x1337(rows):
+    return table('class="table-list table table-responsive table-striped"', [
+        f'<tr><td class="coll-1 name"><a href="/sub/1/0/" class="icon"><i class="flaticon"></i></a>{link(r)}</td>'
+        f'<td class="coll-2 seeds">{r["seeds"]}</td><td class="coll-3 leeches">{r["leeches"]}</td>'
+        f'<td class="coll-date">{r["date"]}</td><td class="coll-4 size mob-uploader">{r["size"]}'
+        f'<span class="seeds">{r["seeds"]}</span></td><td class="coll-5 uploader"><a href="/user/x/">x</a></td></tr>'
+        for r in rows], 6)
+
+
+def yts(rows):
+    return '<section><div class="browse-content">' + "".join(
+        f'<div class="browse-movie-wrap col-xs-10"><a href="{BASE_URL}/movies/{r["slug"]}" class="browse-movie-link">'
+        f'<figure><img src="/c.jpg"><figcaption><h4 class="rating">7.1 / 10</h4></figcaption></figure></a>'
+        f'<div class="browse-movie-bottom"><a href="{BASE_URL}/movies/{r["slug"]}" class="browse-movie-title">'
+        f'{r["name"]}</a><div class="browse-movie-year">{r["date"][:4]}</div></div></div>' for r in rows) + "</div></section>"
+
+
+def nyaa(rows):
+    return table('class="table table-bordered table-hover table-striped torrent-list"', [
+        f'<tr class="default"><td><a href="/?c=1_2">Anime</a></td><td colspan="2">'
+        f'<a href="/view/{r["id"]}" title="{r["name"]}">{r["name"]}</a></td>'
+        f'<td class="text-center"><a href="/download/{r["id"]}.torrent"><i class="fa fa-download"></i></a>'
+        f'<a href="{magnet(r)}"><i class="fa fa-magnet"></i></a></td>'
+        f'<td class="text-center">{r["size"]}</td><td class="text-center">{r["date"]} 12:00</td>'
+        f'<td class="text-center">{r["seeds"]}</td><td class="text-center">{r["leeches"]}</td>'
+        f'<td class="text-center">{r["seeds"] * 3}</td></tr>' for r in rows], 8)
+
+
+def eztv(rows):
+    return table('class="forum_header_border" width="100%"', [
+        f'<tr name="hover" class="forum_header_border"><td class="forum_thread_post"><a href="/shows/1/">Show</a></td>'
+        f'<td class="forum_thread_post">{link(r, "epinfo")}</td>'
+        f'<td class="forum_thread_post"><a href="{magnet(r)}" class="magnet"></a></td>'
+        f'<td class="forum_thread_post">{r["size"]}</td><td class="forum_thread_post">{r["date"]}</td>'
+        f'<td class="forum_thread_post_end"><font color="green">{r["seeds"]}</font></td></tr>' for r in rows], 6)
+
+
+def torrentgalaxy(rows):
+    return table('class="tgxtable"', [
+        f'<tr class="tgxtablerow">{td("Movies", link(r), "<i></i>", "<a>u</a>", r["date"], r["size"], "12", r["seeds"], r["leeches"], "100")}</tr>'
+        for r in rows], 10)
+
+
+def generic(attrs, layout, header_cells=7, row_attrs=""):
+    """A plain results table whose columns follow `layout`, a list of row field names"""
+    def cell(r, field):
+        if field == "name":
+            return link(r)
+        return r.get(field, "-")
+    def build(rows):
+        return table(attrs, [f"<tr{row_attrs}>{td(*(cell(r, f) for f in layout))}</tr>" for r in rows], header_cells)
+    return build
+
+
+def zooqle(rows):
+    return table('class="table table-condensed table-torrents vmiddle torrent-list"', [
+        f'<tr>{td("1", link(r), "<i></i>", "x", "y", r["size"], r["seeds"], r["leeches"])}</tr>' for r in rows], 8)
+
+
+def torrentfunk(rows):
+    return '<div class="search-results"><table>' + "".join(
+        f'<tr class="{"odd" if i % 2 else "even"}"><td>{link(r, "torrent-name")}</td><td class="size">{r["size"]}</td>'
+        f'<td class="seeds">{r["seeds"]}</td><td class="leeches">{r["leeches"]}</td></tr>'
+        for i, r in enumerate(rows)) + "</table></div>"
+
+
+def spans(container, item, name_class, rows):
+    return f'<div class="{container}"><ul>' + "".join(
+        f'<li class="{item}">{link(r, name_class)}<div class="stats"><span class="size">{r["size"]}</span>'
+        f'<span class="seeds">{r["seeds"]}</span><span class="leeches">{r["leeches"]}</span></div></li>'
+        for r in rows) + "</ul></div>"
+
+
+def torrentproject(rows):
+    return '<div class="table"><table><tr><th>Name</th></tr>' + "".join(
+        f'<tr>{td(link(r), r["date"], r["size"], r["seeds"], r["leeches"], "ok")}</tr>' for r in rows) + "</table></div>"
+
+
+def kickass(rows):
+    return '<table class="data">' + "".join(
+        f'<tr class="{"odd" if i % 2 else "even"}">{td(link(r, "cellMainLink"), r["size"], r["seeds"], r["leeches"], r["date"])}</tr>'
+        for i, r in enumerate(rows)) + "</table>"
+
+
+def torrentz2(rows):
+    return '<div class="results">' + "".join(
+        f'<dl><dt><a href="/{r["infohash"]}">{r["name"]}</a></dt><dd><span>{r["size"]}</span></dd></dl>'
+        for r in rows) + "</div>"
+
+
+def fitgirl(rows):
+    return "".join(
+        f'<article class="post type-post"><header><h1 class="post-title"><a href="{BASE_URL}/{r["slug"]}/">'
+        f'{r["name"]}</a></h1></header><div class="entry-content"><p>Repack of {r["name"]}</p></div></article>'
+        for r in rows)
+
+
+def nothing(rows):
+    return "<div class='empty'>Nothing to parse here</div>"
+
+
+BUILDERS = {
+    "The Pirate Bay": piratebay,
+    "1337x": x1337,
+    "YTS": yts,
+    "Nyaa": nyaa,
+    "EZTV": eztv,
+    "TorrentGalaxy": torrentgalaxy,
+    "LimeTorrents": generic('id="table2" class="table2"', ["name", "size", "date", "seeds", "leeches", "health"], 6),
+    "TorrentDownloads": generic('class="torrent_table"', ["name", "size", "date", "seeds", "leeches"], 5),
+    "Torlock": generic('id="torrenttable"', ["name", "v", "c", "size", "date", "seeds", "leeches"]),
+    "Zooqle": zooqle,
+    "TorrentFunk": torrentfunk,
+    "ETTV": generic('class="table table-hover"', ["cat", "name", "size", "date", "x", "seeds", "leeches"]),
+    "Bitsearch": lambda rows: spans("search-results", "result", "name", rows),
+    "Glodls": generic('class="table ttable_headinner"', ["cat", "name", "size", "date", "x", "seeds", "leeches"]),
+    "TorrentProject": torrentproject,
+    "SkyTorrents": generic('class="table is-striped"', ["cat", "name", "size", "date", "x", "seeds", "leeches"]),
+    "YourBittorrent": lambda rows: spans("search-result", "row", "torrent-name", rows),
+    "KickassTorrents": kickass,
+    "Torrentz2": torrentz2,
+    "RARBG": nothing,
+    "MagnetDL": generic('class="download"', ["name", "m", "date", "size", "seeds", "leeches", "c"]),
+    "Good-Torrent": nothing,
+    "Arab-Torrents": generic('class="table"', ["cat", "name", "size", "date", "x", "seeds", "leeches"]),
+    "FitGirl Repacks": fitgirl,
+    "LinuxTracker": generic('class="torrents"', ["cat", "name", "x", "date", "size", "seeds", "leeches"]),
+}
+
+
+def slug(site_name):
+    return re.sub(r"[^a-z0-9]+", "-", site_name.lower()).strip("-")
+
+
+def recorded_page(site_name, kind):
+    """A page recorded from the live site, None if there is none"""
+    path = os.path.join(RECORDED_DIR, slug(site_name), f"{kind}.html")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    return None
+
+
+def search_page(site_name, count=50, seed=0):
+    """HTML of one search results page of a site, as bytes"""
+    if seed == 0:
+        recorded = recorded_page(site_name, "search")
+        if recorded is not None:
+            return recorded
+    rows = make_rows(count, seed)
+    return chrome(BUILDERS[site_name](rows), site_name).encode()
+
+
+def detail_page(row_id, seed=0, site_name=None):
+    """HTML of a detail page holding a magnet link, as bytes"""
+    if site_name is not None:
+        recorded = recorded_page(site_name, "detail")
+        if recorded is not None:
+            return recorded
+    row = make_rows(row_id % 1000 + 1, seed)[-1]
+    body = (f'<h1>{row["name"]}</h1><ul class="download-links"><li><a href="/download/{row["id"]}.torrent">Torrent</a></li>'
+            f'<li><a href="{magnet(row)}" class="magnet-download">Magnet</a></li></ul>'
+            f'<div class="description">{"Lorem ipsum dolor sit amet. " * 200}</div>')
+    return chrome(body, row["name"]).encode()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Rows parsed per second for each site, whole-page parsing vs strained parsing
+
+    python3 benchmarks/parse_benchmark.py [--rows 50] [--seconds 0.5] [--json]
+    python3 benchmarks/parse_benchmark.py --workers 0,1,2,4
+
+--workers measures total parse throughput of a 25-site, multi-page result set
+parsed from threads, in-thread (0) and through a ParsePool of N processes.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+from fixtures import search_page, detail_page
+
+
+def rate(site, content, seconds, strained):
+    """Pages and rows parsed per second, best of a few timing runs"""
+    site.use_strainers = strained
+    rows = len(site.parse_results(content, "bench"))
+    best = float("inf")
+    for _ in range(3):
+        pages = 0
+        start = time.perf_counter()
+        while True:
+            site.parse_results(content, "bench")
+            pages += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= seconds / 3:
+                break
+        best = min(best, elapsed / pages)
+    return rows, rows / best if rows else 0.0, 1 / best
+
+
+def magnet_rate(site, content, seconds, strained):
+    site.use_strainers = strained
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        site.extract_magnet(content)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def pool_scaling(worker_counts, rows, pages_per_site=10):
+    """Pages parsed per second with parsing in threads (0) or in N worker processes"""
+    sites = [site for site in torrtux.TorrentSearcher().sites if site.result_strainer is not None]
+    for site in sites:
+        site.working_url = "https://example.org"
+    pages = [(site, search_page(site.name, rows, page)) for page in range(pages_per_site) for site in sites]
+    report = []
+    for workers in worker_counts:
+        torrtux.configure_parse_pool(workers)
+        if workers:
+            # Start the workers before timing
+            sites[0].parse_records(pages[0][1], "bench")
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(sites)) as executor:
+            parsed = sum(len(r) for r in executor.map(lambda page: page[0].parse_records(page[1], "bench"), pages))
+        elapsed = time.perf_counter() - start
+        report.append({"workers": workers, "pages": len(pages), "rows": parsed,
+                       "pages_per_sec": round(len(pages) / elapsed, 1), "rows_per_sec": round(parsed / elapsed)})
+    torrtux.configure_parse_pool(0)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50, help="Rows per fixture page")
+    parser.add_argument("--seconds", type=float, default=0.5, help="Timing budget per site and mode")
+    parser.add_argument("--sites", help="Comma-separated site names (default: all)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--workers", help="Comma-separated parse worker counts to compare, e.g. 0,2,4")
+    args = parser.parse_args()
+
+    if args.workers:
+        report = pool_scaling([int(n) for n in args.workers.split(",")], args.rows)
+        if args.json:
+            print(json.dumps({"parse_workers": report}, indent=2))
+        else:
+            from tabulate import tabulate
+            print(tabulate([[r["workers"] or "threads", r["pages"], r["pages_per_sec"], r["rows_per_sec"]] for r in report],
+                           headers=["Workers", "Pages", "Pages/s", "Rows/s"], tablefmt="github", numalign="right"))
+            print(f"\n{os.cpu_count()} CPU cores available")
+        return
+
+    wanted = {name.strip().lower() for name in args.sites.split(",")} if args.sites else None
+    report = []
+    for site in torrtux.TorrentSearcher().sites:
+        if wanted and site.name.lower() not in wanted:
+            continue
+        site.working_url = "https://example.org"
+        if site.result_strainer is None:
+            # Nothing to compare: the site has no search parser (RARBG, Good-Torrent)
+            continue
+        content = search_page(site.name, args.rows)
+        full_rows, full_rate, full_pages = rate(site, content, args.seconds, strained=False)
+        rows, strained_rate, strained_pages = rate(site, content, args.seconds, strained=True)
+        if rows != full_rows:
+            print(f"warning: {site.name} parsed {rows} rows strained vs {full_rows} whole", file=sys.stderr)
+        report.append({
+            "site": site.name,
+            "page_bytes": len(content),
+            "rows": rows,
+            "rows_per_sec_before": round(full_rate),
+            "rows_per_sec_after": round(strained_rate),
+            "pages_per_sec_before": round(full_pages, 1),
+            "pages_per_sec_after": round(strained_pages, 1),
+            "speedup": round(strained_pages / full_pages, 2),
+        })
+        site.use_strainers = True
+
+    site = torrtux.TorrentSearcher().sites[0]
+    detail = detail_page(7)
+    before = magnet_rate(site, detail, args.seconds, strained=False)
+    after = magnet_rate(site, detail, args.seconds, strained=True)
+    site.use_strainers = True
+
+    if args.json:
+        print(json.dumps({"search_pages": report,
+                          "detail_pages": {"pages_per_sec_before": round(before, 1),
+                                           "pages_per_sec_after": round(after, 1),
+                                           "speedup": round(after / before, 2)}}, indent=2))
+        return
+
+    from tabulate import tabulate
+    print(tabulate([[r["site"], r["rows"], r["page_bytes"] // 1024, r["rows_per_sec_before"], r["rows_per_sec_after"],
+                     f'{r["speedup"]:.2f}x'] for r in report],
+                   headers=["Site", "Rows", "KiB", "Rows/s before", "Rows/s after", "Speedup"],
+                   tablefmt="github", numalign="right"))
+    print(f"\nDetail page magnet extraction: {before:.0f} -> {after:.0f} pages/s ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Record live search and detail pages as benchmark fixtures
+
+    python3 benchmarks/record_fixtures.py [QUERY] [--sites "1337x,Nyaa"]
+
+Writes benchmarks/recorded/<site>/search.html and detail.html, which the
+benchmarks replay instead of synthetic pages. Needs network access.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+from fixtures import RECORDED_DIR, slug
+
+
+def record(site, query):
+    if not site.ensure_working_url():
+        return "no working mirror"
+    url = site.search_url(query, 0)
+    if not url:
+        return "no search page"
+    response = site.fetch(url, timeout=15, cache_kind=None)
+    if response.status_code != 200:
+        return f"HTTP {response.status_code}"
+    directory = os.path.join(RECORDED_DIR, slug(site.name))
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "search.html"), "wb") as f:
+        f.write(response.content)
+    rows = site.parse_results(response.content, query)
+    detail_url = next((row["detail_url"] for row in rows if row.get("detail_url")), None)
+    if detail_url:
+        detail = site.fetch(detail_url, timeout=15, cache_kind=None)
+        if detail.status_code == 200:
+            with open(os.path.join(directory, "detail.html"), "wb") as f:
+                f.write(detail.content)
+    return f"{len(rows)} rows"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("query", nargs="?", default="ubuntu")
+    parser.add_argument("--sites", help="Comma-separated site names (default: all)")
+    args = parser.parse_args()
+    wanted = {name.strip().lower() for name in args.sites.split(",")} if args.sites else None
+    for site in torrtux.TorrentSearcher().sites:
+        if wanted and site.name.lower() not in wanted:
+            continue
+        try:
+            outcome = record(site, args.query)
+        except Exception as e:
+            outcome = f"error: {e}"
+        print(f"{site.name}: {outcome}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Offline benchmark of every site: parse throughput, end-to-end search time and memory
+
+    python3 benchmarks/run_benchmarks.py [--pages 2] [--latency 0.05] [--output report.json]
+    python3 benchmarks/run_benchmarks.py --compare old.json
+
+Each site is served from its own local stub HTTP server replaying its recorded
+pages (benchmarks/recorded/, see record_fixtures.py) or synthetic ones, so runs
+need no network and are comparable between releases. The JSON report has
+stable keys: diff two of them, or pass the older one to --compare.
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+from fixtures import BASE_URL, search_page, detail_page
+from parse_benchmark import rate
+
+QUERY = "bench"
+
+
+class StubSite:
+    """Local HTTP server answering one site's search pages and detail pages"""
+    def __init__(self, site, rows, pages, latency):
+        self.site_name = site.name
+        self.rows = rows
+        self.latency = latency
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler())
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        site.base_urls = [self.base_url]
+        site.working_url = self.base_url
+        # Measure the HTML parsers; structured endpoints live on other hosts
+        site.api_down = True
+        self.search_pages = {}
+        for page in range(pages):
+            url = site.search_url(QUERY, page)
+            if url and isinstance(url, str):
+                self.search_pages[self.key(url)] = page
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @staticmethod
+    def key(url):
+        parts = urlsplit(url)
+        return unquote(parts.path.rstrip("/") + ("?" + parts.query if parts.query else ""))
+
+    @functools.lru_cache(maxsize=None)
+    def body(self, path):
+        page = self.search_pages.get(self.key(path))
+        if page is not None:
+            content = search_page(self.site_name, self.rows, seed=page)
+        else:
+            content = detail_page(sum(map(ord, path)), site_name=self.site_name)
+        return content.replace(BASE_URL.encode(), self.base_url.encode())
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if stub.latency:
+                    time.sleep(stub.latency)
+                content = stub.body(self.path)
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def parse_throughput(sites, rows, seconds):
+    report = []
+    for site in sites:
+        if site.result_strainer is None:
+            # No search parser to time (RARBG, Good-Torrent)
+            continue
+        content = search_page(site.name, rows)
+        parsed, rows_per_sec, pages_per_sec = rate(site, content, seconds, strained=True)
+        report.append({
+            "site": site.name,
+            "page_bytes": len(content),
+            "rows": parsed,
+            "rows_per_sec": round(rows_per_sec),
+            "pages_per_sec": round(pages_per_sec, 1),
+        })
+    return report
+
+
+def end_to_end(searcher, mode, pages, trace):
+    """Search every site and resolve the deferred magnets, as the CLI does"""
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "parallel":
+        results = list(searcher.iter_search_parallel(QUERY, pages))
+    else:
+        results = list(searcher.iter_search_all_sites(QUERY, pages))
+    searched = time.perf_counter()
+    pending = sum(1 for r in results if not r.magnet and r.detail_url)
+    searcher.resolve_magnets(results)
+    finished = time.perf_counter()
+    report = {
+        "results": len(results),
+        "magnets": sum(1 for r in results if r.magnet),
+        "detail_pages": pending,
+        "search_sec": round(searched - start, 3),
+        "resolve_sec": round(finished - searched, 3),
+        "total_sec": round(finished - start, 3),
+    }
+    if trace:
+        report["peak_traced_mib"] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 1)
+        tracemalloc.stop()
+    return report
+
+
+def best_of(runs, searcher, mode, pages):
+    timings = [end_to_end(searcher, mode, pages, trace=False) for _ in range(runs)]
+    best = min(timings, key=lambda r: r["total_sec"])
+    # Traced separately, tracemalloc slows the run down
+    best["peak_traced_mib"] = end_to_end(searcher, mode, pages, trace=True)["peak_traced_mib"]
+    return best
+
+
+def compare(report, baseline):
+    """Rows of metric, baseline, current and ratio for the numbers both reports share"""
+    rows = []
+    old = {r["site"]: r for r in baseline.get("parse", [])}
+    for entry in report["parse"]:
+        before = old.get(entry["site"], {}).get("rows_per_sec")
+        if before and entry["rows_per_sec"]:
+            rows.append([f'parse {entry["site"]} rows/s', before, entry["rows_per_sec"],
+                         f'{entry["rows_per_sec"] / before:.2f}x'])
+    for mode, entry in report["end_to_end"].items():
+        previous = baseline.get("end_to_end", {}).get(mode, {})
+        for metric in ("total_sec", "peak_traced_mib"):
+            if previous.get(metric) and entry.get(metric):
+                rows.append([f"{mode} {metric}", previous[metric], entry[metric],
+                             f"{entry[metric] / previous[metric]:.2f}x"])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20, help="Rows per synthetic search page")
+    parser.add_argument("--pages", type=int, default=2, help="Search pages fetched per site")
+    parser.add_argument("--latency", type=float, default=0.05, help="Delay the stub servers add to each response, in seconds")
+    parser.add_argument("--seconds", type=float, default=0.3, help="Parse timing budget per site")
+    parser.add_argument("--runs", type=int, default=1, help="End-to-end runs per mode, the fastest is reported")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare against an earlier JSON report")
+    args = parser.parse_args()
+
+    searcher = torrtux.TorrentSearcher()
+    stubs = [StubSite(site, args.rows, args.pages, args.latency) for site in searcher.sites]
+    searcher.working_sites = list(searcher.sites)
+    try:
+        parse = parse_throughput(searcher.sites, args.rows, args.seconds)
+        # Warm up connections and the stubs' generated pages
+        end_to_end(searcher, "sequential", args.pages, trace=False)
+        report = {
+            "meta": {
+                "torrtux": torrtux.VERSION,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "sites": len(searcher.sites),
+                "rows": args.rows,
+                "pages": args.pages,
+                "latency": args.latency,
+            },
+            "parse": parse,
+            "end_to_end": {mode: best_of(args.runs, searcher, mode, args.pages) for mode in ("sequential", "parallel")},
+            "max_rss_mib": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
+    finally:
+        for stub in stubs:
+            stub.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    from tabulate import tabulate
+    print(tabulate([[r["site"], r["rows"], r["page_bytes"] // 1024, r["rows_per_sec"], r["pages_per_sec"]]
+                    for r in report["parse"]],
+                   headers=["Site", "Rows", "KiB", "Rows/s", "Pages/s"], tablefmt="github", numalign="right"))
+    print()
+    print(tabulate([[mode, r["results"], r["detail_pages"], r["search_sec"], r["resolve_sec"], r["total_sec"], r["peak_traced_mib"]]
+                    for mode, r in report["end_to_end"].items()],
+                   headers=["Mode", "Results", "Detail pages", "Search s", "Resolve s", "Total s", "Peak MiB"],
+                   tablefmt="github", numalign="right"))
+    print(f'\nMax RSS {report["max_rss_mib"]} MiB, {report["meta"]["cpus"]} CPU cores, '
+          f'{args.latency * 1000:.0f} ms stub latency')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        print(tabulate(compare(report, baseline), headers=["Metric", "Baseline", "Current", "Ratio"],
+                       tablefmt="github", numalign="right"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Cold start time of the CLI, and the heavy modules loaded just by importing it
+
+    python3 benchmarks/startup_benchmark.py [--runs 10] [--json] [--max-ms 150]
+
+Each case runs in a fresh interpreter, the way the installed `torrtux` command
+starts, and the interpreter's own start-up time is subtracted. With --max-ms
+the script exits with status 1 when a case is slower or when importing
+torrtux loads one of the lazily imported dependencies, so CI can catch
+startup regressions.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Dependencies torrtux only imports on the code paths that use them
+LAZY_MODULES = ["requests", "bs4", "tabulate", "termcolor", "csv", "json", "asyncio", "aiohttp"]
+
+CASES = {
+    "import": "import torrtux",
+    "--version": "import sys; sys.argv = ['torrtux', '--version']; import torrtux; torrtux.main()",
+    "--help": "import sys; sys.argv = ['torrtux', '--help']; import torrtux; torrtux.main()",
+    "all sites": "import torrtux; torrtux.TorrentSearcher()",
+}
+
+
+def run(code, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, check=False)
+    return time.perf_counter() - start
+
+
+def median_ms(code, runs, env):
+    return statistics.median(run(code, env) for _ in range(runs)) * 1000
+
+
+def eager_modules(env):
+    """Lazily imported dependencies that `import torrtux` loaded anyway"""
+    code = f"import sys, torrtux; print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return output.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Runs per case, the median is reported")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--max-ms", type=float, help="Fail when a case takes longer than this")
+    args = parser.parse_args()
+
+    # Installed commands run from compiled bytecode, so let the interpreter write it
+    env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+    run(CASES["import"], env)
+    baseline = median_ms("pass", args.runs, env)
+    report = {name: round(median_ms(code, args.runs, env) - baseline, 1) for name, code in CASES.items()}
+    eager = eager_modules(env)
+
+    if args.json:
+        print(json.dumps({"interpreter_ms": round(baseline, 1), "startup_ms": report, "eager_modules": eager}, indent=2))
+    else:
+        width = max(map(len, report))
+        for name, ms in report.items():
+            print(f"{name:<{width}}  {ms:7.1f} ms")
+        print(f"\nInterpreter start-up ({baseline:.1f} ms) not included")
+        if eager:
+            print(f"Loaded by import torrtux: {', '.join(eager)}")
+
+    if args.max_ms is not None:
+        slow = [name for name, ms in report.items() if ms > args.max_ms]
+        if slow or eager:
+            print(f"Startup regression: {', '.join(slow + eager)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
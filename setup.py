@@ -15,6 +15,10 @@ setup(
         "termcolor",
         "tqdm"
     ],
+    extras_require={
+        "brotli": ["brotli"],
+        "async": ["aiohttp"]
+    },
     entry_points={
         'console_scripts': [
             'torrtux=torrtux:main'
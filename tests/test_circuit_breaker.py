@@ -0,0 +1,101 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+
+
+def breaker(**settings):
+    return torrtux.CircuitBreaker({}, threading.Lock(), **settings)
+
+
+def wait_out(breaker):
+    """Move the opening back in time past the backoff delay"""
+    breaker.state["opened_at"] -= breaker.delay() + 1
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def test_opens_after_threshold_failures(self):
+        b = breaker(failure_threshold=3)
+        for _ in range(2):
+            b.record_failure("timeout")
+            self.assertTrue(b.allow())
+        b.record_failure("timeout")
+        self.assertEqual(b.state["state"], b.OPEN)
+        self.assertFalse(b.allow())
+        self.assertGreater(b.retry_in(), 0)
+
+    def test_old_failures_leave_the_window(self):
+        b = breaker(failure_threshold=2, window=600)
+        b.record_failure("timeout")
+        b.state["failures"][0]["time"] -= 601
+        b.record_failure("timeout")
+        self.assertEqual(b.state["state"], b.CLOSED)
+
+    def test_half_open_trial_success_closes(self):
+        b = breaker(failure_threshold=1)
+        b.record_failure("http_503")
+        wait_out(b)
+        self.assertTrue(b.allow())
+        self.assertEqual(b.state["state"], b.HALF_OPEN)
+        b.record_success()
+        self.assertEqual(b.state["state"], b.CLOSED)
+        self.assertEqual(b.state["trips"], 0)
+
+    def test_half_open_trial_failure_doubles_the_delay(self):
+        b = breaker(failure_threshold=1, base_delay=60, max_delay=200)
+        b.record_failure("timeout")
+        self.assertEqual(b.delay(), 60)
+        wait_out(b)
+        b.allow()
+        b.record_failure("timeout")
+        self.assertEqual(b.state["state"], b.OPEN)
+        self.assertEqual(b.delay(), 120)
+        wait_out(b)
+        b.allow()
+        b.record_failure("timeout")
+        self.assertEqual(b.delay(), 200)
+
+    def test_state_persists_across_runs(self):
+        path = os.path.join(tempfile.mkdtemp(), "breakers.json")
+        store = torrtux.CircuitBreakerStore(path)
+        b = store.breaker_for("TPB", failure_threshold=1)
+        b.record_failure("timeout")
+        store.save()
+        reloaded = torrtux.CircuitBreakerStore(path).breaker_for("TPB", failure_threshold=1)
+        self.assertFalse(reloaded.allow())
+
+
+class UnreachableSite(torrtux.TorrentSite):
+    def __init__(self):
+        super().__init__("Stub", "http://stub.invalid")
+        self.breaker = breaker(failure_threshold=1)
+
+    def test_connection(self, deadline=None):
+        return False
+
+
+class SiteOutcomeTest(unittest.TestCase):
+    def test_cached_response_leaves_the_breaker_alone(self):
+        site = UnreachableSite()
+        site.breaker.record_failure("timeout")
+        wait_out(site.breaker)
+        self.assertTrue(site.is_available())
+        site.report_outcome(200, cached=True)
+        self.assertEqual(site.breaker.state["state"], site.breaker.HALF_OPEN)
+        site.report_outcome(200)
+        self.assertEqual(site.breaker.state["state"], site.breaker.CLOSED)
+
+    def test_unreachable_mirrors_are_a_failure(self):
+        site = UnreachableSite()
+        self.assertFalse(site.ensure_working_url(0.1))
+        self.assertEqual([f["kind"] for f in site.breaker.state["failures"]], ["unreachable"])
+        self.assertFalse(site.is_available())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import stat
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+
+
+class DaemonServerTest(unittest.TestCase):
+    @unittest.skipUnless(hasattr(os, "umask") and hasattr(__import__("socket"), "AF_UNIX"), "Unix sockets only")
+    def test_unix_socket_is_private_from_creation(self):
+        path = os.path.join(tempfile.mkdtemp(), "torrtux.sock")
+        previous = os.umask(0o022)
+        try:
+            server = torrtux.make_daemon_server(None, ("unix", path))
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+            self.assertEqual(os.umask(0o022), 0o022)
+            server.server_close()
+        finally:
+            os.umask(previous)
+
+
+class DaemonAddressTest(unittest.TestCase):
+    def test_parse_daemon_address(self):
+        self.assertEqual(torrtux.parse_daemon_address("unix:/tmp/t.sock"), ("unix", "/tmp/t.sock"))
+        self.assertEqual(torrtux.parse_daemon_address("/tmp/t.sock"), ("unix", "/tmp/t.sock"))
+        self.assertEqual(torrtux.parse_daemon_address("http://localhost:8765/"), ("tcp", "localhost", 8765))
+        self.assertEqual(torrtux.parse_daemon_address(":8765"), ("tcp", "127.0.0.1", 8765))
+
+    def test_query_argv(self):
+        argv = torrtux.query_argv({"query": "ubuntu", "sort": "seeds", "parallel": True, "regex": ["a", "b"],
+                                   "limit": None, "resolve": True})
+        self.assertEqual(argv, ["ubuntu", "--sort", "seeds", "--parallel", "--regex", "a", "--regex", "b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import base64
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+
+HEX = "0123456789abcdef0123456789abcdef01234567"
+
+
+class MagnetInfohashTest(unittest.TestCase):
+    def test_hex(self):
+        self.assertEqual(torrtux.magnet_infohash(f"magnet:?xt=urn:btih:{HEX}&dn=x"), HEX)
+        self.assertEqual(torrtux.magnet_infohash(f"magnet:?xt=urn:btih:{HEX.upper()}"), HEX)
+
+    def test_base32_matches_hex(self):
+        encoded = base64.b32encode(bytes.fromhex(HEX)).decode()
+        self.assertEqual(torrtux.magnet_infohash(f"magnet:?dn=x&xt=urn:btih:{encoded}"), HEX)
+        self.assertEqual(torrtux.magnet_infohash(f"magnet:?xt=urn:btih:{encoded.lower()}"), HEX)
+
+    def test_invalid(self):
+        for magnet in (None, "", "magnet:?dn=x", "magnet:?xt=urn:btih:abc",
+                       "magnet:?xt=urn:btih:" + "z" * 40, "magnet:?xt=urn:btih:" + "1" * 32):
+            self.assertIsNone(torrtux.magnet_infohash(magnet))
+
+    def test_build_magnet_round_trip(self):
+        self.assertEqual(torrtux.magnet_infohash(torrtux.build_magnet(HEX, "Ubuntu 24.04")), HEX)
+
+
+class MagnetCacheTest(unittest.TestCase):
+    def test_put_and_get_many(self):
+        cache = torrtux.MagnetCache(os.path.join(tempfile.mkdtemp(), "magnets.sqlite"))
+        magnet = torrtux.build_magnet(HEX, "Ubuntu")
+        cache.put("https://site/1", magnet)
+        self.assertEqual(cache.get("https://site/1"), magnet)
+        self.assertEqual(cache.get_many(["https://site/1", "https://site/2"]), {"https://site/1": magnet})
+
+
+if __name__ == "__main__":
+    unittest.main()
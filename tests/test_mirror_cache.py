@@ -0,0 +1,129 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+from test_mirror_prober import StubSite
+
+
+class ReprobeTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "mirrors.json")
+        cache = torrtux.MirrorHealthCache(self.path)
+        cache.record_success("site", "https://site-0.example", 0.5)
+        cache.save()
+
+    def searcher(self, site):
+        searcher = torrtux.TorrentSearcher([])
+        searcher.sites = [site]
+        return searcher
+
+    def test_fresh_cache_skips_probing(self):
+        site = StubSite("site", down=["https://site-0.example"])
+        self.assertTrue(self.searcher(site).load_mirror_cache(torrtux.MirrorHealthCache(self.path)))
+        self.assertEqual(site.working_url, "https://site-0.example")
+        self.assertEqual(site.probed, [])
+
+    def test_reprobe_refreshes_the_cache(self):
+        site = StubSite("site", down=["https://site-0.example", "https://site-2.example"])
+        searcher = self.searcher(site)
+        self.assertFalse(searcher.load_mirror_cache(torrtux.MirrorHealthCache(self.path), reprobe=True))
+        self.assertIsNotNone(searcher.mirror_cache)
+        with redirect_stdout(StringIO()):
+            self.assertTrue(searcher.test_sites(deadline=2))
+        entry = torrtux.MirrorHealthCache(self.path).get("site")
+        self.assertEqual(entry["working_url"], "https://site-1.example")
+
+
+class FailedMirrorTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = torrtux.MirrorHealthCache(os.path.join(tempfile.mkdtemp(), "mirrors.json"))
+        self.cache.record_success("up", "https://up-0.example", 0.1)
+        self.cache.record_failure("dead")
+
+    def load(self, *sites):
+        searcher = torrtux.TorrentSearcher([])
+        searcher.sites = list(sites)
+        return searcher, searcher.load_mirror_cache(self.cache)
+
+    def test_recently_failed_site_is_skipped(self):
+        up, dead = StubSite("up"), StubSite("dead")
+        searcher, loaded = self.load(up, dead)
+        self.assertTrue(loaded)
+        self.assertEqual(searcher.working_sites, [up])
+        self.assertEqual(up.working_url, "https://up-0.example")
+
+    def test_backoff_doubles_with_each_failure(self):
+        entry = self.cache.get("dead")
+        entry["checked_at"] -= torrtux.FAILED_MIRROR_RETRY + 1
+        self.assertFalse(self.cache.is_down("dead"))
+        self.cache.record_failure("dead")
+        self.cache.get("dead")["checked_at"] -= torrtux.FAILED_MIRROR_RETRY + 1
+        self.assertTrue(self.cache.is_down("dead"))
+        self.cache.get("dead")["checked_at"] -= torrtux.FAILED_MIRROR_RETRY
+        self.assertFalse(self.cache.is_down("dead"))
+
+    def test_backoff_is_capped_by_the_ttl(self):
+        cache = torrtux.MirrorHealthCache(self.cache.path, ttl=100)
+        for _ in range(10):
+            cache.record_failure("dead")
+        cache.get("dead")["checked_at"] -= 101
+        self.assertFalse(cache.is_down("dead"))
+
+    def test_failed_site_past_its_backoff_is_probed_when_searched(self):
+        self.cache.get("dead")["checked_at"] -= torrtux.FAILED_MIRROR_RETRY + 1
+        dead = StubSite("dead")
+        searcher, loaded = self.load(StubSite("up"), dead)
+        self.assertIn(dead, searcher.working_sites)
+        self.assertIsNone(dead.working_url)
+
+    def test_every_site_down_probes_them_all(self):
+        searcher, loaded = self.load(StubSite("dead"))
+        self.assertFalse(loaded)
+
+
+class RefreshMirrorsTest(unittest.TestCase):
+    """How a long-running daemon keeps its mirrors current"""
+    def setUp(self):
+        self.cache = torrtux.MirrorHealthCache(os.path.join(tempfile.mkdtemp(), "mirrors.json"))
+        self.site = StubSite("site", down=["https://site-0.example"])
+        self.site.breaker = None
+        self.cache.record_success("site", "https://site-0.example", 0.1)
+        self.searcher = torrtux.TorrentSearcher([])
+        self.searcher.sites = [self.site]
+        self.searcher.load_mirror_cache(self.cache)
+
+    def test_fresh_mirror_is_kept(self):
+        self.assertEqual(self.searcher.refresh_mirrors(deadline=2), [])
+        self.assertEqual(self.site.working_url, "https://site-0.example")
+
+    def test_expired_mirror_is_probed_again(self):
+        self.cache.get("site")["checked_at"] -= self.cache.ttl + 1
+        self.assertEqual(self.searcher.refresh_mirrors(deadline=2), [self.site])
+        self.assertIn(self.site.working_url, self.site.base_urls[1:])
+        self.assertTrue(self.cache.is_fresh("site"))
+
+    def test_open_breaker_triggers_one_probe(self):
+        self.site.breaker = torrtux.CircuitBreaker({}, threading.Lock(), failure_threshold=1)
+        self.site.breaker.record_failure("timeout")
+        self.assertEqual(self.searcher.refresh_mirrors(deadline=2), [self.site])
+        self.assertIn(self.site.working_url, self.site.base_urls[1:])
+        # The breaker has not reopened since, so the mirror is not probed again
+        self.assertEqual(self.searcher.refresh_mirrors(deadline=2), [])
+
+    def test_dead_site_leaves_the_working_sites(self):
+        self.cache.get("site")["checked_at"] -= self.cache.ttl + 1
+        self.site.down = set(self.site.base_urls)
+        self.searcher.refresh_mirrors(deadline=2)
+        self.assertEqual(self.searcher.working_sites, [])
+        self.assertTrue(self.cache.is_down("site"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+
+
+class StubSite:
+    """Site whose mirrors answer after a fixed delay, or never for the ones in `down`"""
+    def __init__(self, name, mirrors=3, delay=0.05, down=()):
+        self.name = name
+        self.base_urls = [f"https://{name}-{i}.example" for i in range(mirrors)]
+        self.working_url = None
+        self.delay = delay
+        self.down = set(down)
+        self.probed = []
+        self.lock = threading.Lock()
+
+    def probe_url(self, url, timeout=10):
+        with self.lock:
+            self.probed.append(url)
+        time.sleep(self.delay)
+        if url in self.down:
+            return None
+        return self.delay
+
+
+class MirrorProberTest(unittest.TestCase):
+    def test_mirrors_answering_together(self):
+        # Regression: siblings of a winner finishing in the same batch raised KeyError
+        for _ in range(20):
+            sites = [StubSite(f"site{i}") for i in range(4)]
+            winners = torrtux.MirrorProber(deadline=2).probe(sites)
+            self.assertEqual(set(winners), set(sites))
+            for site in sites:
+                self.assertIn(winners[site][0], site.base_urls)
+                self.assertEqual(site.working_url, winners[site][0])
+
+    def test_one_mirror_up_per_site(self):
+        for _ in range(20):
+            sites = [StubSite(f"site{i}", down=[f"https://site{i}-{j}.example" for j in (0, 2)]) for i in range(4)]
+            winners = torrtux.MirrorProber(deadline=2).probe(sites)
+            for site in sites:
+                self.assertEqual(winners[site][0], f"https://{site.name}-1.example")
+
+    def test_unreachable_site_reported_without_winner(self):
+        up = StubSite("up")
+        down = StubSite("down", down=StubSite("down").base_urls)
+        reported = {}
+        winners = torrtux.MirrorProber(deadline=2).probe(
+            [up, down], on_result=lambda site, url, latency: reported.setdefault(site.name, url))
+        self.assertEqual(list(winners), [up])
+        self.assertIsNone(reported["down"])
+        self.assertIsNotNone(reported["up"])
+
+    def test_deadline_stops_waiting(self):
+        slow = StubSite("slow", delay=1)
+        start = time.monotonic()
+        winners = torrtux.MirrorProber(deadline=0.1).probe([slow])
+        self.assertEqual(winners, {})
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_no_mirrors(self):
+        self.assertEqual(torrtux.MirrorProber().probe([StubSite("empty", mirrors=0)]), {})
+
+
+class ProbeDeadlineOptionTest(unittest.TestCase):
+    def test_must_be_positive(self):
+        parser = torrtux.build_parser(torrtux.QueryOptionsParser)
+        self.assertEqual(parser.parse_args(["x", "--probe-deadline", "2.5"]).probe_deadline, 2.5)
+        for value in ("0", "-1"):
+            with self.assertRaises(ValueError):
+                parser.parse_args(["x", "--probe-deadline", value])
+
+
+if __name__ == "__main__":
+    unittest.main()
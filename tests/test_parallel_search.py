@@ -0,0 +1,141 @@
+import itertools
+import os
+import subprocess
+import sys
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import torrtux
+
+
+class Response:
+    status_code = 200
+
+
+class StubSite:
+    """Site whose search pages take `delay` seconds and hold `rows` results each"""
+    probe_deadline = 10
+
+    def __init__(self, name, delay=0.0, rows=2, dead_mirrors=False):
+        self.name = name
+        self.delay = delay
+        self.rows = rows
+        self.dead_mirrors = dead_mirrors
+        self.pages = []
+        self.timeouts = []
+        self.probe_deadlines = []
+
+    def is_available(self):
+        return True
+
+    def expected_latency(self):
+        return 0.1
+
+    def ensure_working_url(self, deadline=None):
+        """Dead mirrors accept connections but never answer, so the probe takes its whole deadline"""
+        if not self.dead_mirrors:
+            return True
+        self.probe_deadlines.append(deadline)
+        time.sleep(self.probe_deadline if deadline is None else deadline)
+        return False
+
+    def report_outcome(self, status_code=None, error=None, cached=False):
+        pass
+
+    def fetch_results(self, query, page, plan=None, timeout=15):
+        self.pages.append(page)
+        self.timeouts.append(timeout)
+        time.sleep(self.delay)
+        return Response(), [torrtux.TorrentResult(f"{self.name} {page} {i}", self.name, seeds=i) for i in range(self.rows)]
+
+
+def searcher(sites, deadline=None):
+    searcher = torrtux.TorrentSearcher([])
+    searcher.sites = searcher.working_sites = sites
+    if deadline:
+        searcher.budget = torrtux.DeadlineBudget(deadline)
+    return searcher
+
+
+class ParallelSearchTest(unittest.TestCase):
+    def test_all_pages_of_all_sites(self):
+        sites = [StubSite(f"site{i}", delay=0.01) for i in range(3)]
+        results = list(searcher(sites).iter_search_parallel("q", page_limit=2))
+        self.assertEqual(len(results), 3 * 2 * 2)
+
+    def test_limit_stops_slow_sites(self):
+        fast, slow = StubSite("fast"), StubSite("slow", delay=0.5)
+        start = time.monotonic()
+        first = list(itertools.islice(searcher([fast, slow]).iter_search_parallel("q", page_limit=5), 2))
+        self.assertEqual(len(first), 2)
+        self.assertLess(time.monotonic() - start, 0.4)
+        time.sleep(0.7)
+        # The slow site finished its page in flight but fetched no other
+        self.assertEqual(slow.pages, [0])
+
+    def test_deadline_bounds_the_search(self):
+        fast, slow = StubSite("fast"), StubSite("slow", delay=2)
+        start = time.monotonic()
+        results = list(searcher([fast, slow], deadline=0.3).iter_search_parallel("q"))
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertEqual({r.site for r in results}, {"fast"})
+        self.assertTrue(all(0 < timeout <= 0.3 for timeout in slow.timeouts))
+
+    def test_deadline_bounds_mirror_probes(self):
+        dead = StubSite("dead", dead_mirrors=True)
+        start = time.monotonic()
+        list(searcher([StubSite("fast"), dead], deadline=0.3).iter_search_parallel("q"))
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertTrue(0 < dead.probe_deadlines[0] <= 0.3)
+
+    def test_reports_when_nothing_found(self):
+        output = StringIO()
+        with redirect_stdout(output):
+            results = list(searcher([StubSite("empty", rows=0)]).iter_search_parallel("q"))
+        self.assertEqual(results, [])
+        self.assertIn("No results found from any site", output.getvalue())
+
+    def test_exit_does_not_wait_for_requests_in_flight(self):
+        code = ("import itertools, sys; sys.path.insert(0, 'tests'); import test_parallel_search as t; "
+                "s = t.searcher([t.StubSite('fast'), t.StubSite('slow', delay=5)]); "
+                "print(len(list(itertools.islice(s.iter_search_parallel('q'), 1))))")
+        start = time.monotonic()
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=10)
+        self.assertEqual(output.stdout.strip(), "1")
+        self.assertLess(time.monotonic() - start, 4)
+
+
+class SequentialSearchTest(unittest.TestCase):
+    def test_deadline_bounds_the_search(self):
+        dead, fast = StubSite("dead", dead_mirrors=True), StubSite("fast")
+        start = time.monotonic()
+        results = list(searcher([dead, fast], deadline=1.0).iter_search_all_sites("q"))
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertTrue(0 < dead.probe_deadlines[0] <= 1.0)
+        self.assertEqual({r.site for r in results}, {"fast"})
+
+    def test_latest_deadline_bounds_mirror_probes(self):
+        dead = StubSite("dead", dead_mirrors=True)
+        start = time.monotonic()
+        with redirect_stdout(StringIO()):
+            list(searcher([dead], deadline=0.3).iter_search_latest_sites())
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertTrue(0 < dead.probe_deadlines[0] <= 0.3)
+
+    def test_spent_deadline_skips_the_probe(self):
+        dead = StubSite("dead", dead_mirrors=True)
+        s = searcher([dead], deadline=0.01)
+        time.sleep(0.02)
+        with redirect_stdout(StringIO()):
+            self.assertEqual(s.search_site_pages(dead, "q"), [])
+        self.assertEqual(dead.probe_deadlines, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+
+GIB = 1024 ** 3
+MIB = 1024 ** 2
+
+
+class ParseSizeTest(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(torrtux.parse_size("1.5 GB"), 1.5 * GIB)
+        self.assertEqual(torrtux.parse_size("700 MiB"), 700 * MIB)
+        self.assertEqual(torrtux.parse_size("2T"), 2 * 1024 ** 4)
+        self.assertEqual(torrtux.parse_size("512 B"), 512)
+
+    def test_commas(self):
+        self.assertEqual(torrtux.parse_size("1,5 GB"), 1.5 * GIB)
+        self.assertEqual(torrtux.parse_size("1,024.5 MB"), 1024.5 * MIB)
+        self.assertEqual(torrtux.parse_size("1,234,567 B"), 1234567)
+
+    def test_unparsable(self):
+        self.assertEqual(torrtux.parse_size("-"), 0)
+        self.assertEqual(torrtux.parse_size(None), 0)
+
+
+class ParseCountTest(unittest.TestCase):
+    def test_counts(self):
+        self.assertEqual(torrtux.parse_count("1,024"), 1024)
+        self.assertEqual(torrtux.parse_count(7), 7)
+        self.assertIsNone(torrtux.parse_count("-"))
+        self.assertIsNone(torrtux.parse_count(None))
+
+
+class ParseDateTest(unittest.TestCase):
+    NOW = time.mktime((2024, 6, 15, 12, 0, 0, 0, 0, -1))
+
+    def day(self, year, month, day):
+        return time.mktime((year, month, day, 0, 0, 0, 0, 0, -1))
+
+    def parse(self, text):
+        return torrtux.parse_date(text, now=self.NOW)
+
+    def test_relative(self):
+        self.assertEqual(self.parse("3 hours ago"), self.NOW - 3 * 3600)
+        self.assertEqual(self.parse("a day ago"), self.NOW - 86400)
+        self.assertEqual(self.parse("2 weeks ago"), self.NOW - 2 * 604800)
+        self.assertEqual(self.parse("Today 04:12"), self.NOW)
+        self.assertEqual(self.parse("Y-day 23:10"), self.NOW - 86400)
+
+    def test_absolute(self):
+        self.assertEqual(self.parse("2023-04-01 10:00"), self.day(2023, 4, 1))
+        self.assertEqual(self.parse("1 Apr 2023"), self.day(2023, 4, 1))
+        self.assertEqual(self.parse("Apr. 1st '23"), self.day(2023, 4, 1))
+        self.assertEqual(self.parse("April 1, 2023"), self.day(2023, 4, 1))
+        self.assertEqual(self.parse("04-01 2023"), self.day(2023, 4, 1))
+        self.assertEqual(self.parse("2019"), self.day(2019, 1, 1))
+
+    def test_without_year_is_this_year(self):
+        self.assertEqual(self.parse("04-01"), self.day(2024, 4, 1))
+        self.assertEqual(self.parse("Apr 1"), self.day(2024, 4, 1))
+
+    def test_unknown(self):
+        for text in (None, "", "-", "unknown"):
+            self.assertIsNone(self.parse(text))
+
+
+class ExportRowTest(unittest.TestCase):
+    def test_counts_exported_as_the_site_wrote_them(self):
+        row = {"name": "Ubuntu", "site": "1337x", "size": "4 GB", "seeds": "1,024", "leeches": "-", "date": "-"}
+        result = torrtux.TorrentResult.from_row(row)
+        self.assertEqual(result.seeds, 1024)
+        self.assertIsNone(result.leeches)
+        exported = torrtux.export_row(result)
+        self.assertEqual(exported["seeds"], "1,024")
+        self.assertEqual(exported["leeches"], "-")
+
+    def test_survives_the_trip_through_a_tuple(self):
+        result = torrtux.TorrentResult.from_row({"name": "Ubuntu", "site": "TPB", "seeds": "12"})
+        copy = torrtux.TorrentResult.from_tuple(result.as_tuple())
+        self.assertEqual(torrtux.export_row(copy), torrtux.export_row(result))
+
+
+class ParsePoolTest(unittest.TestCase):
+    def test_no_new_workers_after_shutdown(self):
+        pool = torrtux.ParsePool(2)
+        pool.shutdown(wait=True)
+        site = torrtux.Nyaa()
+        # A search thread still parsing at exit falls back to parsing in the thread
+        self.assertIsNone(pool.parse(site, b"<html></html>", "ubuntu"))
+        self.assertIsNone(pool.executor)
+        self.assertFalse(pool.broken)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+
+
+class StubSite:
+    def __init__(self, sort_orders=(), categories=()):
+        self.sort_orders = {order: order for order in sort_orders}
+        self.categories = {category: category for category in categories}
+
+
+def page(*seeds):
+    return [torrtux.TorrentResult(f"row {i}", "TPB", seeds=count) for i, count in enumerate(seeds)]
+
+
+class QueryPlanTest(unittest.TestCase):
+    def test_sort_pushed_to_sites_that_offer_it(self):
+        plan = torrtux.QueryPlan(sort="date")
+        self.assertEqual(plan.site_sort(StubSite(["seeds", "date"])), "date")
+        self.assertIsNone(plan.site_sort(StubSite(["seeds"])))
+
+    def test_min_seeds_asks_for_seeders_order(self):
+        plan = torrtux.QueryPlan(min_seeds=10)
+        self.assertEqual(plan.site_sort(StubSite(["seeds"])), "seeds")
+        self.assertIsNone(plan.site_sort(StubSite()))
+
+    def test_category_only_where_supported(self):
+        plan = torrtux.QueryPlan(category="movies")
+        self.assertEqual(plan.site_category(StubSite(categories=["movies"])), "movies")
+        self.assertIsNone(plan.site_category(StubSite(categories=["anime"])))
+
+    def test_exhausted_once_a_sorted_page_drops_below_min_seeds(self):
+        plan = torrtux.QueryPlan(min_seeds=10)
+        site = StubSite(["seeds"])
+        self.assertFalse(plan.exhausted(site, page(50, 20, 10)))
+        self.assertTrue(plan.exhausted(site, page(50, 20, 3)))
+        self.assertTrue(plan.exhausted(site, page(50, 9, None)))
+        self.assertFalse(plan.exhausted(site, page(None, None)))
+
+    def test_unsorted_sites_are_never_exhausted(self):
+        self.assertFalse(torrtux.QueryPlan(min_seeds=10).exhausted(StubSite(), page(1)))
+        self.assertFalse(torrtux.QueryPlan(min_seeds=10, sort="date").exhausted(StubSite(["seeds", "date"]), page(1)))
+        self.assertFalse(torrtux.QueryPlan().exhausted(StubSite(["seeds"]), page(1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+
+
+def rows(seeds):
+    return [torrtux.TorrentResult(f"row {i}", "TPB", seeds=count) for i, count in enumerate(seeds)]
+
+
+def names(results):
+    return [r.name for r in results]
+
+
+class TopKTest(unittest.TestCase):
+    def test_matches_a_full_sort(self):
+        key = torrtux.sort_key("seeds")
+        generator = random.Random(7)
+        for k in (1, 5, 50):
+            results = rows([generator.randint(0, 30) for _ in range(200)])
+            top = torrtux.TopK(k, key)
+            for result in results:
+                top.push(result)
+            # sorted() is stable, so ties keep arrival order as TopK does
+            self.assertEqual(top.results(), sorted(results, key=key, reverse=True)[:k])
+
+    def test_ties_keep_the_first_row(self):
+        top = torrtux.TopK(2, torrtux.sort_key("seeds"))
+        for result in rows([5, 5, 5]):
+            top.push(result)
+        self.assertEqual(names(top.results()), ["row 0", "row 1"])
+
+    def test_unknown_values_rank_last(self):
+        top = torrtux.TopK(None, torrtux.sort_key("seeds"))
+        for result in rows([None, 0, 3]):
+            top.push(result)
+        self.assertEqual(names(top.results()), ["row 2", "row 1", "row 0"])
+
+    def test_pushed_again_is_reranked(self):
+        results = rows([1, 2, 3])
+        top = torrtux.TopK(2, torrtux.sort_key("seeds"))
+        for result in results:
+            top.push(result)
+        results[1].seeds = 10
+        top.push(results[1])
+        self.assertEqual(names(top.results()), ["row 1", "row 2"])
+        self.assertEqual(len(top.heap), 2)
+
+    def test_rank_results_limit(self):
+        ranked = torrtux.rank_results(iter(rows([3, 9, 1, 7])), "seeds", limit=2)
+        self.assertEqual([r.seeds for r in ranked], [9, 7])
+
+    def test_ratio_and_size_keys(self):
+        a = torrtux.TorrentResult("a", "TPB", size="1 GB", seeds=10, leeches=5)
+        b = torrtux.TorrentResult("b", "TPB", size="2 GB", seeds=6, leeches=0)
+        self.assertEqual(names(torrtux.rank_results([a, b], "ratio")), ["b", "a"])
+        self.assertEqual(names(torrtux.rank_results([a, b], "size")), ["b", "a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "responses.sqlite")
+
+    def test_round_trip_and_validators(self):
+        cache = torrtux.ResponseCache(self.path)
+        cache.store("https://a/1", "search", 200, b"page", {"ETag": '"v1"'})
+        response, fresh, validators = cache.lookup("https://a/1")
+        self.assertEqual(response.content, b"page")
+        self.assertTrue(fresh)
+        self.assertEqual(validators, {"If-None-Match": '"v1"'})
+        self.assertIsNone(cache.lookup("https://a/2"))
+
+    def test_running_total_tracks_replacements(self):
+        cache = torrtux.ResponseCache(self.path)
+        cache.store("https://a/1", "search", 200, os.urandom(1000))
+        cache.store("https://a/1", "search", 200, os.urandom(500))
+        cache.store("https://a/2", "search", 200, os.urandom(700))
+        self.assertEqual(cache.total, cache.stored_bytes())
+
+    def test_evicts_least_recently_used(self):
+        cache = torrtux.ResponseCache(self.path, max_bytes=10000)
+        for i in range(4):
+            cache.store(f"https://a/{i}", "search", 200, os.urandom(2400))
+            cache.lookup(f"https://a/{i}")
+        cache.lookup("https://a/0")
+        cache.store("https://a/4", "search", 200, os.urandom(2400))
+        self.assertLessEqual(cache.stored_bytes(), 10000)
+        self.assertEqual(cache.total, cache.stored_bytes())
+        self.assertIsNotNone(cache.lookup("https://a/0"))
+        self.assertIsNone(cache.lookup("https://a/1"))
+        self.assertIsNotNone(cache.lookup("https://a/4"))
+
+    def test_resyncs_with_other_processes(self):
+        cache = torrtux.ResponseCache(self.path, max_bytes=10000)
+        cache.RESYNC_EVERY = 2
+        cache.store("https://a/0", "search", 200, os.urandom(3000))
+        torrtux.ResponseCache(self.path).store("https://b/0", "search", 200, os.urandom(3000))
+        cache.store("https://a/1", "search", 200, os.urandom(3000))
+        cache.store("https://a/2", "search", 200, os.urandom(3000))
+        self.assertEqual(cache.total, cache.stored_bytes())
+
+    def test_other_process_writes_are_counted_at_eviction(self):
+        cache = torrtux.ResponseCache(self.path, max_bytes=10000)
+        cache.store("https://a/0", "search", 200, os.urandom(3000))
+        other = torrtux.ResponseCache(self.path, max_bytes=10000)
+        for i in range(1, 4):
+            other.store(f"https://b/{i}", "search", 200, os.urandom(3000))
+        for i in range(1, 4):
+            cache.store(f"https://a/{i}", "search", 200, os.urandom(3000))
+        self.assertLessEqual(cache.stored_bytes(), 10000)
+
+
+class StubResponse:
+    status_code = 200
+    content = b"<html>" + b"x" * 94
+
+
+class StubClient:
+    """Serves the first request from the cache and downloads the next"""
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, timeout=15, cache_kind=None, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            return torrtux.CachedResponse(url, 200, b"<html>cached</html>")
+        return StubResponse()
+
+
+class ProfiledFetchTest(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, torrtux, "_http_client", torrtux._http_client)
+        self.addCleanup(torrtux.configure_profiler, False)
+        torrtux._http_client = StubClient()
+
+    def test_cache_hits_are_not_counted_as_requests(self):
+        profiler = torrtux.configure_profiler()
+        site = torrtux.TorrentSite("Stub", "http://stub.invalid")
+        site.fetch_once("http://stub.invalid/s/?q=a")
+        site.fetch_once("http://stub.invalid/s/?q=a")
+        entry = profiler.sites["Stub"]
+        self.assertEqual((entry["requests"], entry["bytes"], entry["cache_hits"]), (1, 100, 1))
+
+
+class ThreadRecordingCache:
+    """Empty response cache noting the thread each call runs on"""
+    def __init__(self):
+        self.threads = []
+
+    def lookup(self, url):
+        self.threads.append(threading.get_ident())
+        return None
+
+    def store(self, url, kind, status, content, headers):
+        self.threads.append(threading.get_ident())
+
+
+class StubAiohttpResponse:
+    status = 200
+    headers = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self):
+        return b"<html></html>"
+
+
+class StubSession:
+    def get(self, url, headers=None):
+        return StubAiohttpResponse()
+
+
+class AsyncCacheTest(unittest.TestCase):
+    def test_cache_is_used_off_the_event_loop(self):
+        cache = ThreadRecordingCache()
+        self.addCleanup(setattr, torrtux, "_http_client", torrtux._http_client)
+        torrtux._http_client = SimpleNamespace(cache=cache, refresh=False)
+        engine = torrtux.AsyncSearchEngine()
+        engine.executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(engine.executor.shutdown)
+
+        async def fetch():
+            return threading.get_ident(), await engine.fetch_session(StubSession(), "http://stub.invalid/", "search")
+
+        loop_thread, (status, content, hit) = asyncio.run(fetch())
+        self.assertEqual((status, hit), (200, False))
+        self.assertEqual(len(cache.threads), 2)
+        self.assertNotIn(loop_thread, cache.threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
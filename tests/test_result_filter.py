@@ -0,0 +1,62 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+
+GIB = 1024 ** 3
+
+
+def result(name="Ubuntu 24.04 Desktop", size="4 GB", seeds=10, leeches=2, date="-"):
+    return torrtux.TorrentResult(name, "TPB", size=size, seeds=seeds, leeches=leeches, date=date)
+
+
+def kept(result_filter, *results):
+    return list(result_filter.apply(results))
+
+
+class ResultFilterTest(unittest.TestCase):
+    def test_empty_filter_passes_everything_through(self):
+        rows = [result(), result(seeds=None)]
+        self.assertFalse(torrtux.ResultFilter())
+        self.assertIs(torrtux.ResultFilter().apply(rows), rows)
+
+    def test_bounds_are_inclusive(self):
+        f = torrtux.ResultFilter(min_seeds=5, max_seeds=10, min_size=GIB, max_size=4 * GIB)
+        self.assertEqual(len(kept(f, result(seeds=5), result(seeds=10), result(size="1 GB"))), 3)
+        self.assertEqual(kept(f, result(seeds=4), result(seeds=11), result(size="5 GB")), [])
+
+    def test_unknown_values_fail_bounds(self):
+        self.assertEqual(kept(torrtux.ResultFilter(min_seeds=0), result(seeds=None)), [])
+        self.assertEqual(kept(torrtux.ResultFilter(max_leeches=100), result(leeches=None)), [])
+        self.assertEqual(kept(torrtux.ResultFilter(min_size=1), result(size="-")), [])
+
+    def test_max_age(self):
+        f = torrtux.ResultFilter(max_age=7 * 86400)
+        recent, old, undated = result(date="2 days ago"), result(date="3 weeks ago"), result(date="-")
+        self.assertEqual(kept(f, recent, old, undated), [recent])
+
+    def test_patterns_all_match_and_excludes_any(self):
+        f = torrtux.ResultFilter(patterns=["ubuntu", r"\d+\.\d+"], excludes=["server", "beta"])
+        matching = result()
+        self.assertEqual(kept(f, matching, result(name="Ubuntu Server 24.04"), result(name="Ubuntu Desktop"),
+                              result(name="UBUNTU 22.04 BETA")), [matching])
+
+    def test_from_args(self):
+        args = torrtux.build_parser().parse_args(["q", "--min-size", "1 GB", "--min-seeds", "3", "--regex", "x"])
+        f = torrtux.ResultFilter.from_args(args)
+        self.assertIn(("size_bytes", GIB, None), f.bounds)
+        self.assertIn(("seeds", 3, None), f.bounds)
+        self.assertTrue(f.bounds_merged_fields())
+        self.assertFalse(torrtux.ResultFilter(max_age=60, patterns=["x"]).bounds_merged_fields())
+
+    def test_invalid_regex_is_a_query_error(self):
+        args = torrtux.build_parser().parse_args(["q", "--regex", "("])
+        with self.assertRaises(ValueError):
+            torrtux.query_filter(args)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+
+HASH_A = "a" * 40
+HASH_B = "b" * 40
+
+
+def result(site, seeds, infohash=None, name="Ubuntu 24.04", size="4 GB", leeches=None):
+    magnet = torrtux.build_magnet(infohash, name) if infohash else None
+    return torrtux.TorrentResult(name, site, size=size, seeds=seeds, leeches=leeches, magnet=magnet)
+
+
+class StubSearcher:
+    """Hands fixed rows to search_results() as the sequential search would"""
+    def __init__(self, rows):
+        self.rows = rows
+        self.budget = self.plan = None
+
+    def iter_search_all_sites(self, query, page_limit=1, show_progress=False, verbose=False):
+        return iter(self.rows)
+
+
+def search(rows, *argv):
+    args = torrtux.build_parser().parse_args(["ubuntu", *argv])
+    return list(torrtux.search_results(StubSearcher(rows), args, torrtux.query_filter(args)))
+
+
+class MergeDuplicatesTest(unittest.TestCase):
+    def test_merges_by_infohash(self):
+        rows = [result("TPB", 5, HASH_A), result("Nyaa", 9, HASH_A.upper()), result("YTS", 1, HASH_B)]
+        merged = list(torrtux.merge_duplicates(rows))
+        self.assertEqual(len(merged), 2)
+        self.assertEqual(merged[0].seeds, 9)
+        self.assertEqual(merged[0].to_dict()["seeds"], 9)
+        self.assertEqual(merged[0].sites, ["TPB", "Nyaa"])
+        # The record keeps the site it was parsed from, for lookups by site name
+        self.assertEqual(merged[0].site, "TPB")
+        self.assertEqual(merged[0].source(), "TPB, Nyaa")
+        self.assertEqual(merged[0].to_dict()["site"], "TPB, Nyaa")
+        self.assertEqual(merged[1].source(), "YTS")
+
+    def test_infohash_set_from_magnet(self):
+        row = torrtux.TorrentResult.from_row({"name": "Ubuntu", "site": "TPB",
+                                              "magnet": torrtux.build_magnet(HASH_A.upper(), "Ubuntu")})
+        self.assertEqual(row.infohash, HASH_A)
+        late = result("1337x", 7)
+        self.assertIsNone(late.infohash)
+        late.set_magnet(torrtux.build_magnet(HASH_A, "Ubuntu"))
+        merged = list(torrtux.merge_duplicates([row, late]))
+        self.assertEqual(len(merged), 1)
+        self.assertEqual(merged[0].sites, ["TPB", "1337x"])
+
+    def test_rows_without_magnet_pass_through(self):
+        rows = [result("1337x", 5), result("1337x", 5)]
+        self.assertEqual(len(list(torrtux.merge_duplicates(rows))), 2)
+
+    def test_reemit_yields_the_merged_record_again(self):
+        rows = [result("TPB", 5, HASH_A), result("Nyaa", 9, HASH_A)]
+        merged = list(torrtux.merge_duplicates(rows, reemit=True))
+        self.assertEqual(len(merged), 2)
+        self.assertIs(merged[0], merged[1])
+
+    def test_unknown_size_taken_from_copy(self):
+        rows = [result("TPB", 5, HASH_A, size="-"), result("Nyaa", 1, HASH_A, size="1 GB")]
+        merged = list(torrtux.merge_duplicates(rows))
+        self.assertEqual(merged[0].size_bytes, 1024 ** 3)
+
+
+class FilterAfterMergeTest(unittest.TestCase):
+    def test_max_seeds_checks_merged_counts(self):
+        rows = [result("TPB", 3, HASH_A), result("Nyaa", 50, HASH_A), result("YTS", 4, HASH_B)]
+        kept = search(rows, "--max-seeds", "10")
+        self.assertEqual([r.site for r in kept], ["YTS"])
+
+    def test_min_seeds_checks_merged_counts(self):
+        rows = [result("TPB", 3, HASH_A), result("Nyaa", 50, HASH_A)]
+        kept = search(rows, "--min-seeds", "10", "--sort", "seeds")
+        self.assertEqual(len(kept), 1)
+        self.assertEqual(kept[0].seeds, 50)
+
+    def test_min_seeds_yields_row_once_a_merge_passes_it(self):
+        rows = [result("TPB", 3, HASH_A), result("YTS", 20, HASH_B), result("Nyaa", 50, HASH_A),
+                result("EZTV", 60, HASH_A)]
+        kept = search(rows, "--min-seeds", "10")
+        self.assertEqual([(r.site, r.seeds) for r in kept], [("YTS", 20), ("TPB", 60)])
+
+    def test_min_seeds_streams_with_limit(self):
+        consumed = []
+
+        def rows():
+            for row in [result("TPB", 30, HASH_A), result("YTS", 1, HASH_B), result("Nyaa", 2, HASH_B)]:
+                consumed.append(row.site)
+                yield row
+
+        kept = search(rows(), "--min-seeds", "10", "--limit", "1")
+        self.assertEqual([r.site for r in kept], ["TPB"])
+        self.assertEqual(consumed, ["TPB"])
+
+    def test_no_dedupe_filters_each_copy(self):
+        rows = [result("TPB", 3, HASH_A), result("Nyaa", 50, HASH_A)]
+        kept = search(rows, "--max-seeds", "10", "--no-dedupe")
+        self.assertEqual([r.site for r in kept], ["TPB"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self):
+        self.flights = torrtux.SingleFlight()
+        self.calls = 0
+        self.release = threading.Event()
+
+    def slow(self, value):
+        self.calls += 1
+        self.release.wait(2)
+        return value
+
+    def wait_shared(self, count):
+        deadline = time.monotonic() + 2
+        while self.flights.shared < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def run_together(self, count, key="k", **kwargs):
+        with ThreadPoolExecutor(count) as executor:
+            futures = [executor.submit(self.flights.do, key, self.slow, "result", **kwargs) for _ in range(count)]
+            self.wait_shared(count - 1)
+            self.release.set()
+            return [future.result() for future in futures]
+
+    def test_concurrent_callers_share_one_call(self):
+        self.assertEqual(self.run_together(8), ["result"] * 8)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.flights.shared, 7)
+        self.assertEqual(self.flights.calls, {})
+
+    def test_later_callers_start_a_new_call(self):
+        self.release.set()
+        self.flights.do("k", self.slow, 1)
+        self.flights.do("k", self.slow, 2)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.flights.shared, 0)
+
+    def test_different_keys_run_separately(self):
+        self.release.set()
+        with ThreadPoolExecutor(2) as executor:
+            results = list(executor.map(lambda key: self.flights.do(key, self.slow, key), ["a", "b"]))
+        self.assertEqual(results, ["a", "b"])
+        self.assertEqual(self.calls, 2)
+
+    def test_exception_is_shared(self):
+        def fail():
+            self.release.wait(2)
+            raise ValueError("down")
+
+        with ThreadPoolExecutor(3) as executor:
+            futures = [executor.submit(self.flights.do, "k", fail) for _ in range(3)]
+            self.wait_shared(2)
+            self.release.set()
+            for future in futures:
+                with self.assertRaises(ValueError):
+                    future.result()
+        self.assertEqual(self.flights.calls, {})
+
+    def test_follower_gives_up_after_wait(self):
+        leader = threading.Thread(target=self.flights.do, args=("k", self.slow, "result"))
+        leader.start()
+        while "k" not in self.flights.calls:
+            time.sleep(0.01)
+        with self.assertRaises(FuturesTimeoutError):
+            self.flights.do("k", self.slow, "other", wait=0.05)
+        self.release.set()
+        leader.join()
+        self.assertEqual(self.calls, 1)
+
+
+class FetchCoalescingTest(unittest.TestCase):
+    def test_concurrent_fetches_of_one_url_send_one_request(self):
+        site = torrtux.SITES["Nyaa"]()
+        sent = []
+        release = threading.Event()
+
+        def fetch_once(url, timeout=15, cache_kind="search", **kwargs):
+            sent.append(url)
+            release.wait(2)
+            return url
+
+        site.fetch_once = fetch_once
+        flights = torrtux.get_http_client().flights
+        shared = flights.shared
+        with ThreadPoolExecutor(4) as executor:
+            futures = [executor.submit(site.fetch, "https://nyaa.example/?q=1") for _ in range(4)]
+            # Release the request once the three other fetches joined it
+            deadline = time.monotonic() + 2
+            while flights.shared < shared + 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            release.set()
+            self.assertEqual({future.result() for future in futures}, {"https://nyaa.example/?q=1"})
+        self.assertEqual(len(sent), 1)
+
+    def test_follower_timeout_is_a_requests_timeout(self):
+        site = torrtux.SITES["Nyaa"]()
+        release = threading.Event()
+        started = threading.Event()
+
+        def fetch_once(url, timeout=15, cache_kind="search", **kwargs):
+            started.set()
+            release.wait(2)
+
+        site.fetch_once = fetch_once
+        leader = threading.Thread(target=site.fetch, args=("https://nyaa.example/slow",))
+        leader.start()
+        started.wait(2)
+        with self.assertRaises(torrtux.requests.exceptions.Timeout):
+            site.fetch("https://nyaa.example/slow", timeout=0.05)
+        release.set()
+        leader.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
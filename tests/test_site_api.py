@@ -0,0 +1,181 @@
+import json
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import torrtux
+
+HASH = "0123456789ABCDEF0123456789ABCDEF01234567"
+
+TPB_PAYLOAD = json.dumps([
+    {"id": "68123", "name": "Ubuntu 24.04 Desktop", "info_hash": HASH, "leechers": "12", "seeders": "340",
+     "num_files": "1", "size": "6114770944", "username": "uploader", "added": "1714000000", "status": "vip",
+     "category": "303", "imdb": ""},
+])
+TPB_NO_MATCHES = json.dumps([
+    {"id": "0", "name": "No results returned", "info_hash": "0000000000000000000000000000000000000000",
+     "leechers": "0", "seeders": "0", "num_files": "0", "size": "0", "username": "", "added": "0",
+     "status": "member", "category": "0", "imdb": ""},
+])
+
+YTS_PAYLOAD = json.dumps({
+    "status": "ok", "status_message": "Query was successful",
+    "data": {"movie_count": 1, "limit": 50, "page_number": 1, "movies": [{
+        "id": 1024, "url": "https://yts.mx/movies/big-buck-bunny-2008", "title": "Big Buck Bunny",
+        "title_long": "Big Buck Bunny (2008)", "year": 2008, "torrents": [
+            {"url": "https://yts.mx/torrent/download/A", "hash": HASH, "quality": "720p", "type": "bluray",
+             "seeds": 55, "peers": 4, "size": "473.64 MB", "date_uploaded": "2015-11-01 03:16:12"},
+            {"url": "https://yts.mx/torrent/download/B", "hash": HASH.lower(), "quality": "1080p",
+             "type": "web", "seeds": 80, "peers": 9, "size": "1.2 GB", "date_uploaded": "2019-02-10 10:00:00"},
+        ]}]},
+})
+
+NYAA_PAYLOAD = b"""<?xml version="1.0" encoding="utf-8"?>
+<rss xmlns:atom="http://www.w3.org/2005/Atom" xmlns:nyaa="https://nyaa.si/xmlns/nyaa" version="2.0">
+  <channel>
+    <title>Nyaa - "frieren" - Torrent File RSS</title>
+    <item>
+      <title>[SubsPlease] Sousou no Frieren - 01 (1080p).mkv</title>
+      <link>https://nyaa.si/download/1739000.torrent</link>
+      <guid isPermaLink="true">https://nyaa.si/view/1739000</guid>
+      <pubDate>Fri, 29 Sep 2023 16:02:11 -0000</pubDate>
+      <nyaa:seeders>1520</nyaa:seeders>
+      <nyaa:leechers>31</nyaa:leechers>
+      <nyaa:downloads>40210</nyaa:downloads>
+      <nyaa:infoHash>0123456789abcdef0123456789abcdef01234567</nyaa:infoHash>
+      <nyaa:categoryId>1_2</nyaa:categoryId>
+      <nyaa:size>1.4 GiB</nyaa:size>
+    </item>
+  </channel>
+</rss>"""
+
+EZTV_PAYLOAD = json.dumps({
+    "imdb_id": "", "torrents_count": 2, "limit": 50, "page": 1, "torrents": [
+        {"id": 2051, "hash": HASH.lower(), "filename": "Show.S01E01.720p.mkv",
+         "episode_url": "https://eztv.re/ep/2051/show-s01e01-720p/", "torrent_url": "https://zoink.ch/a.torrent",
+         "magnet_url": f"magnet:?xt=urn:btih:{HASH.lower()}&dn=Show.S01E01.720p",
+         "title": "Show S01E01 720p", "imdb_id": "0000001", "season": "1", "episode": "1",
+         "seeds": 210, "peers": 18, "date_released_unix": 1714000000, "size_bytes": "734003200"},
+        {"id": 2052, "hash": HASH, "filename": "Show.S01E02.720p.mkv",
+         "episode_url": "https://eztv.re/ep/2052/show-s01e02-720p/", "torrent_url": "https://zoink.ch/b.torrent",
+         "magnet_url": "", "title": "Show S01E02 720p", "imdb_id": "0000001", "season": "1", "episode": "2",
+         "seeds": 90, "peers": 7, "date_released_unix": 1714086400, "size_bytes": "1503238553"},
+    ],
+})
+
+
+def make_site(cls):
+    site = cls()
+    site.working_url = site.base_urls[0]
+    return site
+
+
+class PirateBayApiTest(unittest.TestCase):
+    def test_rows(self):
+        site = make_site(torrtux.PirateBay)
+        rows = site.parse_api(TPB_PAYLOAD, "ubuntu")
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual(row["name"], "Ubuntu 24.04 Desktop")
+        self.assertEqual(row["size"], "5.7 GB")
+        self.assertEqual((row["seeds"], row["leeches"]), ("340", "12"))
+        self.assertEqual(row["date"], torrtux.format_timestamp(1714000000))
+        self.assertEqual(torrtux.magnet_infohash(row["magnet"]), HASH.lower())
+        self.assertEqual(row["detail_url"], "https://thepiratebay.org/description.php?id=68123")
+
+    def test_no_matches(self):
+        self.assertEqual(make_site(torrtux.PirateBay).parse_api(TPB_NO_MATCHES, "nothing"), [])
+
+
+class YTSApiTest(unittest.TestCase):
+    def test_row_per_quality(self):
+        rows = make_site(torrtux.YTS).parse_api(YTS_PAYLOAD, "bunny")
+        self.assertEqual([row["name"] for row in rows],
+                         ["Big Buck Bunny (2008) [720p bluray]", "Big Buck Bunny (2008) [1080p web]"])
+        self.assertEqual([row["size"] for row in rows], ["473.64 MB", "1.2 GB"])
+        self.assertEqual([(row["seeds"], row["leeches"]) for row in rows], [("55", "4"), ("80", "9")])
+        self.assertEqual([row["date"] for row in rows], ["2015-11-01", "2019-02-10"])
+        self.assertEqual(rows[0]["detail_url"], "https://yts.mx/movies/big-buck-bunny-2008")
+        self.assertEqual(torrtux.magnet_infohash(rows[1]["magnet"]), HASH.lower())
+
+    def test_error_status(self):
+        with self.assertRaises(ValueError):
+            make_site(torrtux.YTS).parse_api(json.dumps({"status": "error", "status_message": "bad"}), "x")
+
+
+class NyaaApiTest(unittest.TestCase):
+    def test_rows(self):
+        rows = make_site(torrtux.Nyaa).parse_api(NYAA_PAYLOAD, "frieren")
+        self.assertEqual(rows, [{
+            "name": "[SubsPlease] Sousou no Frieren - 01 (1080p).mkv",
+            "size": "1.4 GiB",
+            "seeds": "1520",
+            "leeches": "31",
+            "date": "2023-09-29",
+            "magnet": torrtux.build_magnet(HASH.lower(), "[SubsPlease] Sousou no Frieren - 01 (1080p).mkv"),
+            "detail_url": "https://nyaa.si/view/1739000",
+            "site": "Nyaa",
+        }])
+
+    def test_not_rss(self):
+        with self.assertRaises(ValueError):
+            make_site(torrtux.Nyaa).parse_api(b"<html><body>Cloudflare</body></html>", "frieren")
+
+
+class EZTVApiTest(unittest.TestCase):
+    def test_rows(self):
+        rows = make_site(torrtux.EZTV).parse_api(EZTV_PAYLOAD, None)
+        self.assertEqual([row["name"] for row in rows], ["Show S01E01 720p", "Show S01E02 720p"])
+        self.assertEqual([row["size"] for row in rows], ["700.0 MB", "1.4 GB"])
+        self.assertEqual([(row["seeds"], row["leeches"]) for row in rows], [("210", "18"), ("90", "7")])
+        self.assertEqual(rows[0]["date"], torrtux.format_timestamp(1714000000))
+        self.assertEqual(rows[0]["detail_url"], "https://eztv.re/ep/2051/show-s01e01-720p/")
+        # The feed's own magnet is kept, one is built from the hash when it is empty
+        self.assertEqual(rows[0]["magnet"], f"magnet:?xt=urn:btih:{HASH.lower()}&dn=Show.S01E01.720p")
+        self.assertEqual(rows[1]["magnet"], torrtux.build_magnet(HASH, "Show S01E02 720p"))
+
+
+class FlakySite(torrtux.PirateBay):
+    """apibay times out on the first request, then answers"""
+    def __init__(self):
+        super().__init__()
+        self.working_url = self.base_urls[0]
+        self.api_calls = 0
+
+    def fetch(self, url, timeout=15):
+        self.api_calls += 1
+        if self.api_calls == 1:
+            raise TimeoutError("timed out")
+        return torrtux.CachedResponse(url, 200, TPB_PAYLOAD.encode())
+
+    def fetch_hedged(self, url, timeout=15):
+        return torrtux.CachedResponse(url, 200, b"<html></html>")
+
+
+class ApiRetryTest(unittest.TestCase):
+    def setUp(self):
+        logging.disable(logging.ERROR)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def test_endpoint_retried_after_cooldown(self):
+        site = FlakySite()
+        response, records = site.fetch_results("ubuntu")
+        self.assertIsNone(records)
+        self.assertTrue(site.api_down)
+        # Within the cooldown the HTML page is fetched without trying the endpoint
+        response, records = site.fetch_results("ubuntu")
+        self.assertIsNone(records)
+        self.assertEqual(site.api_calls, 1)
+
+        site.api_failed_at -= torrtux.API_RETRY
+        self.assertFalse(site.api_down)
+        response, records = site.fetch_results("ubuntu")
+        self.assertEqual(site.api_calls, 2)
+        self.assertEqual([record.name for record in records], ["Ubuntu 24.04 Desktop"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,26 +6,77 @@ Torrtux v1.0.3 - Professional Torrent Search Tool
 import os
 import sys
 import argparse
-import requests
-from bs4 import BeautifulSoup
-from tabulate import tabulate
-from termcolor import colored
+import importlib
+import importlib.util
 import time
 import re
-from urllib.parse import urljoin, quote
+from urllib.parse import urljoin, quote, urlparse
 import logging
-import csv
-import json
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, Future, wait, as_completed, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 
 try:
     from tqdm import tqdm
 except ImportError:
     tqdm = None
+import pickle
+import queue
+import sqlite3
+import zlib
+import base64
+import binascii
+from functools import partial
 import threading
+import signal
+import contextlib
+import copy
+import atexit
 import itertools
+import heapq
+import math
+import operator
 import time
 
+VERSION = "1.0.3"
+
+class LazyModule:
+    """A module imported on first attribute access
+
+    The heavy dependencies are only loaded by the code paths that use them, so
+    --help, --version and completion scripts start without them.
+    """
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def __getattr__(self, attr):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = self.__dict__["_module"] = importlib.import_module(self._name)
+        return getattr(module, attr)
+
+requests = LazyModule("requests")
+bs4 = LazyModule("bs4")
+csv = LazyModule("csv")
+json = LazyModule("json")
+asyncio = LazyModule("asyncio")
+ElementTree = LazyModule("xml.etree.ElementTree")
+
+def colored(text, *args, **kwargs):
+    from termcolor import colored as termcolor_colored
+    return termcolor_colored(text, *args, **kwargs)
+
+def tabulate(*args, **kwargs):
+    from tabulate import tabulate as tabulate_rows
+    return tabulate_rows(*args, **kwargs)
+
+def import_optional(name):
+    """Import an optional dependency on first use, None when it is not installed"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
 ASCII_ART = """
 
 
@@ -40,37 +91,1107 @@ ASCII_ART = """
                                 v1.0.3
 """
 
+# urllib3 decodes brotli when either package is installed; only look them up here
+ACCEPT_ENCODING = "gzip, deflate, br" if importlib.util.find_spec("brotli") or importlib.util.find_spec("brotlicffi") \
+    else "gzip, deflate"
+
+# Seconds a cached response is served without asking the server again
+RESPONSE_TTLS = {"search": 600, "detail": 7 * 24 * 3600}
+
+class CachedResponse:
+    """Response served from the ResponseCache, with the attributes sites read"""
+    def __init__(self, url, status_code, content, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+class ResponseCache:
+    """On-disk HTTP response cache in SQLite, size-bounded with LRU eviction
+
+    Entries are keyed by URL. Search pages and detail pages have separate TTLs;
+    expired entries are revalidated with ETag/Last-Modified when the mirror sent them.
+    """
+    RESYNC_EVERY = 64
+
+    def __init__(self, path=None, max_bytes=64 * 1024 ** 2, ttls=None):
+        self.path = path or os.path.join(get_cache_dir(), "responses.sqlite")
+        self.max_bytes = max_bytes
+        self.ttls = dict(RESPONSE_TTLS, **(ttls or {}))
+        self.lock = threading.Lock()
+        # Running size of the stored bodies, summed again from the table every
+        # RESYNC_EVERY stores to pick up what other torrtux processes wrote
+        self.total = None
+        self.stores = 0
+        self.db = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, kind TEXT, status INTEGER, "
+                        "body BLOB, etag TEXT, last_modified TEXT, fetched_at REAL, accessed_at REAL, size INTEGER)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def lookup(self, url):
+        """Return (response, is_fresh, validators) for a cached URL, or None"""
+        try:
+            with self.lock:
+                row = self.db.execute("SELECT kind, status, body, etag, last_modified, fetched_at FROM responses "
+                                      "WHERE url = ?", (url,)).fetchone()
+                if row is None:
+                    return None
+                self.db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        except sqlite3.Error as e:
+            logging.error(f"Response cache lookup failed: {e}")
+            return None
+        kind, status, body, etag, last_modified, fetched_at = row
+        fresh = time.time() - fetched_at < self.ttls.get(kind, 0)
+        validators = {}
+        if etag:
+            validators["If-None-Match"] = etag
+        if last_modified:
+            validators["If-Modified-Since"] = last_modified
+        return CachedResponse(url, status, zlib.decompress(body)), fresh, validators
+
+    def store(self, url, kind, status, content, headers=None):
+        headers = headers or {}
+        body = zlib.compress(content)
+        now = time.time()
+        try:
+            with self.lock:
+                if self.stores % self.RESYNC_EVERY == 0:
+                    self.total = self.stored_bytes()
+                self.stores += 1
+                replaced = self.db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+                self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                (url, kind, status, body, headers.get("ETag"), headers.get("Last-Modified"),
+                                 now, now, len(body)))
+                self.total += len(body) - (replaced[0] if replaced else 0)
+                if self.total > self.max_bytes:
+                    self.evict()
+        except sqlite3.Error as e:
+            logging.error(f"Response cache store failed: {e}")
+
+    def touch(self, url):
+        """Mark a revalidated (304) entry as fresh again"""
+        try:
+            with self.lock:
+                now = time.time()
+                self.db.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+        except sqlite3.Error as e:
+            logging.error(f"Response cache update failed: {e}")
+
+    def stored_bytes(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes
+
+        Only runs once the running total passes max_bytes. The total is summed
+        again first, and eviction goes down to 90% so the next one waits for a
+        tenth of the cache to fill.
+        """
+        self.total = self.stored_bytes()
+        if self.total <= self.max_bytes:
+            return
+        excess = self.total - self.max_bytes * 0.9
+        victims = []
+        for url, size in self.db.execute("SELECT url, size FROM responses ORDER BY accessed_at"):
+            if excess <= 0:
+                break
+            victims.append((url,))
+            excess -= size
+            self.total -= size
+        self.db.executemany("DELETE FROM responses WHERE url = ?", victims)
+
+BTIH_RE = re.compile(r"xt=urn:btih:([0-9a-zA-Z]+)")
+
+def magnet_infohash(magnet):
+    """Return the BitTorrent infohash of a magnet link as lowercase hex, or None
+
+    Both the 40-character hex form and the 32-character base32 form are accepted.
+    """
+    if not magnet:
+        return None
+    match = BTIH_RE.search(magnet)
+    if not match:
+        return None
+    value = match.group(1)
+    if len(value) == 40:
+        try:
+            return bytes.fromhex(value).hex()
+        except ValueError:
+            return None
+    if len(value) == 32:
+        try:
+            return base64.b32decode(value.upper()).hex()
+        except (ValueError, binascii.Error):
+            return None
+    return None
+
+class MagnetCache:
+    """Persistent detail_url -> (magnet, infohash) store shared by all sites
+
+    Kept in SQLite so several torrtux processes can use it at once; the least
+    recently used entries are dropped beyond max_entries.
+    """
+    def __init__(self, path=None, max_entries=50000):
+        self.path = path or os.path.join(get_cache_dir(), "magnets.sqlite")
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.db = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS magnets (detail_url TEXT PRIMARY KEY, infohash TEXT, "
+                        "magnet TEXT, accessed_at REAL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS magnets_accessed ON magnets (accessed_at)")
+
+    def get_many(self, detail_urls):
+        """Return {detail_url: magnet} for the URLs that are cached"""
+        detail_urls = list(detail_urls)
+        found = {}
+        try:
+            with self.lock:
+                for start in range(0, len(detail_urls), 500):
+                    chunk = detail_urls[start:start + 500]
+                    marks = ",".join("?" * len(chunk))
+                    found.update(self.db.execute(f"SELECT detail_url, magnet FROM magnets WHERE detail_url IN ({marks})",
+                                                 chunk).fetchall())
+                if found:
+                    now = time.time()
+                    self.db.executemany("UPDATE magnets SET accessed_at = ? WHERE detail_url = ?",
+                                        [(now, url) for url in found])
+        except sqlite3.Error as e:
+            logging.error(f"Magnet cache lookup failed: {e}")
+        return found
+
+    def get(self, detail_url):
+        return self.get_many([detail_url]).get(detail_url)
+
+    def put(self, detail_url, magnet):
+        try:
+            with self.lock:
+                self.db.execute("INSERT OR REPLACE INTO magnets VALUES (?, ?, ?, ?)",
+                                (detail_url, magnet_infohash(magnet), magnet, time.time()))
+                self.writes += 1
+                # Trim now and then rather than counting rows on every write
+                if self.writes % 100 == 0:
+                    self.db.execute("DELETE FROM magnets WHERE detail_url IN (SELECT detail_url FROM magnets "
+                                    "ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+        except sqlite3.Error as e:
+            logging.error(f"Magnet cache store failed: {e}")
+
+class HttpClient:
+    """Shared HTTP session with per-host keep-alive connection pools"""
+    def __init__(self, pool_connections=32, pool_maxsize=10):
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        self.adapter = None
+        self.counts = {"requests": 0, "connections": 0}
+        self.hosts = set()
+        self.lock = threading.Lock()
+        self.cache = None
+        self.refresh = False
+        # Concurrent fetches of the same URL, across sites and queries, share one request
+        self.flights = SingleFlight()
+        self.configure(pool_connections, pool_maxsize)
+
+    def configure(self, pool_connections=32, pool_maxsize=10):
+        """Set how many hosts are kept in the pool and how many connections per host"""
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        if self.adapter is not None:
+            self.adapter.close()
+        self.adapter = requests.adapters.HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        manager = self.adapter.poolmanager
+        manager.pool_classes_by_scheme = {scheme: self.counting_pool(pool_class)
+                                          for scheme, pool_class in manager.pool_classes_by_scheme.items()}
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+    def counting_pool(self, pool_class):
+        """A urllib3 pool class whose requests and new connections are counted in stats()"""
+        client = self
+
+        class Connection(pool_class.ConnectionCls):
+            def connect(self):
+                client.count("connections", self.host)
+                super().connect()
+
+        class Pool(pool_class):
+            ConnectionCls = Connection
+
+            def urlopen(self, *args, **kwargs):
+                client.count("requests", self.host)
+                return super().urlopen(*args, **kwargs)
+
+        return Pool
+
+    def count(self, counter, host):
+        with self.lock:
+            self.counts[counter] += 1
+            self.hosts.add(host)
+
+    def get(self, url, timeout=15, cache_kind=None, **kwargs):
+        """GET a URL; with a cache_kind ("search" or "detail") the response cache is used"""
+        if self.cache is None or cache_kind is None:
+            return self.session.get(url, timeout=timeout, **kwargs)
+        cached = self.cache.lookup(url)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cached is not None:
+            cached_response, fresh, validators = cached
+            if fresh and not self.refresh:
+                return cached_response
+            headers.update(validators)
+        response = self.session.get(url, timeout=timeout, headers=headers, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            self.cache.touch(url)
+            return cached[0]
+        if response.status_code == 200:
+            self.cache.store(url, cache_kind, response.status_code, response.content, response.headers)
+        return response
+
+    def stats(self):
+        """Return request and connection counts, reused = requests that skipped a handshake"""
+        with self.lock:
+            sent = self.counts["requests"]
+            opened = self.counts["connections"]
+            hosts = len(self.hosts)
+        return {
+            "hosts": hosts,
+            "requests": sent,
+            "connections": opened,
+            "reused": max(sent - opened, 0),
+            "coalesced": self.flights.shared
+        }
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+def get_http_client():
+    """Return the process-wide HttpClient, creating it on first use"""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = HttpClient()
+    return _http_client
+
+class SingleFlight:
+    """Run a call once for all concurrent callers asking for the same key
+
+    The first caller runs it; callers arriving while it is in flight wait for
+    and share its result or exception. Later callers start a new call.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.shared = 0
+
+    def do(self, key, func, *args, wait=None, **kwargs):
+        """func(*args, **kwargs), or the result of the call already running for key
+
+        A caller that joins a running call waits at most wait seconds for it
+        (FuturesTimeoutError), the caller running it is not interrupted.
+        """
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result(wait)
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+class MagnetResolver:
+    """Fetch detail pages for magnet links concurrently, with a limit per host"""
+    def __init__(self, max_workers=16, per_host=4):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.host_limits = {}
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def host_limit(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.host_limits:
+                self.host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self.host_limits[host]
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self.executor
+
+    def resolve(self, site, results):
+        """Fill in the magnet of every row that only carries a detail_url"""
+        self.resolve_rows([(site, result) for result in results])
+        return results
+
+    def submit(self, site, result):
+        """Start resolving one row's magnet, returns a future"""
+        def resolve_one():
+            with self.host_limit(result.detail_url):
+                result.set_magnet(site.get_magnet_link(result.detail_url))
+            return result
+        return self.get_executor().submit(resolve_one)
+
+    def resolve_rows(self, pairs):
+        """Resolve (site, row) pairs from any number of sites in one batch"""
+        futures = [self.submit(site, r) for site, r in pairs if not r.magnet and r.detail_url]
+        for future in futures:
+            future.result()
+
+_magnet_resolver = None
+
+def get_magnet_resolver():
+    """Return the process-wide MagnetResolver, creating it on first use"""
+    global _magnet_resolver
+    if _magnet_resolver is None:
+        with _http_client_lock:
+            if _magnet_resolver is None:
+                _magnet_resolver = MagnetResolver()
+    return _magnet_resolver
+
+def configure_magnet_resolver(max_workers=16, per_host=4):
+    global _magnet_resolver
+    _magnet_resolver = MagnetResolver(max_workers, per_host)
+    return _magnet_resolver
+
+class ParsePool:
+    """Parse result pages in worker processes, so parsing uses every core
+
+    Fetching stays on threads or the event loop: only the raw page bytes go to
+    a worker and compact record tuples come back. If the pool cannot be used,
+    pages are parsed in the calling thread as before.
+    """
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = None
+        self.broken = False
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def get_executor(self):
+        if self.executor is None:
+            with self.lock:
+                # Search threads still running at exit must not start a new pool
+                if self.closed:
+                    return None
+                if self.executor is None:
+                    import multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor
+                    # Forking once HTTP and probe threads run can copy locks they hold
+                    # (urllib3, logging) into a worker that then deadlocks on them
+                    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                    self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                        mp_context=multiprocessing.get_context(method))
+                    # Stop the workers while the interpreter is still whole; an executor
+                    # left for teardown warns about leaked semaphores and its weakref callback
+                    atexit.register(self.shutdown, wait=True)
+        return self.executor
+
+    def parse(self, site, content, query):
+        """Return a page's TorrentResult records, or None when the pool is unusable"""
+        if self.broken:
+            return None
+        from concurrent.futures import CancelledError
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            executor = self.get_executor()
+            if executor is None:
+                return None
+            future = executor.submit(parse_in_worker, site.name, site.working_url, content, query)
+            rows = future.result()
+        except (BrokenProcessPool, OSError, pickle.PicklingError) as e:
+            logging.error(f"Parse workers unavailable, parsing in threads: {e}")
+            self.broken = True
+            return None
+        except (RuntimeError, CancelledError):
+            # Shut down, by atexit, while this page was on its way
+            if not self.closed:
+                raise
+            return None
+        return [TorrentResult.from_tuple(values) for values in rows]
+
+    def shutdown(self, wait=False):
+        with self.lock:
+            executor, self.executor = self.executor, None
+            self.closed = True
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+_parse_pool = None
+
+def get_parse_pool():
+    """Return the process-wide ParsePool, None when pages are parsed in threads"""
+    return _parse_pool
+
+def configure_parse_pool(workers=0):
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown()
+    _parse_pool = ParsePool(workers) if workers > 0 else None
+    return _parse_pool
+
+# Site instances of a parse worker process, by site name
+_worker_sites = {}
+
+def parse_in_worker(site_name, working_url, content, query):
+    """Worker side of ParsePool: parse one page into TorrentResult tuples"""
+    site = _worker_sites.get(site_name)
+    if site is None:
+        site = _worker_sites[site_name] = SITES[site_name]()
+    site.working_url = working_url
+    return [TorrentResult.from_row(row).as_tuple() for row in site.parse_results(content, query)]
+
+PROFILE_STAGES = ["probe", "search", "detail", "parse", "filter", "render"]
+PROFILE_COUNTERS = ["requests", "bytes", "cache_hits", "retries", "errors"]
+
+class ProfileTimer:
+    """Times one block for a Profiler; an exception leaving the block counts as an error"""
+    __slots__ = ("profiler", "stage", "site", "start")
+
+    def __init__(self, profiler, stage, site):
+        self.profiler = profiler
+        self.stage = stage
+        self.site = site
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.record(self.stage, self.site, time.perf_counter() - self.start, failed=exc_type is not None)
+        return False
+
+class Profiler:
+    """Time spent per stage and per site, with request counters, for --profile
+
+    Stage times add up the timed blocks of every thread, so on concurrent
+    searches they can exceed the wall time.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.sites = {}
+        self.lock = threading.Lock()
+
+    def timer(self, stage, site=None):
+        return ProfileTimer(self, stage, site)
+
+    def site_entry(self, site):
+        entry = self.sites.get(site)
+        if entry is None:
+            entry = self.sites[site] = dict.fromkeys(PROFILE_COUNTERS, 0)
+            entry["stages"] = {}
+        return entry
+
+    def record(self, stage, site, seconds, failed=False):
+        with self.lock:
+            calls = self.stages.setdefault(stage, [0, 0.0])
+            calls[0] += 1
+            calls[1] += seconds
+            if site is not None:
+                entry = self.site_entry(site)
+                entry["stages"][stage] = entry["stages"].get(stage, 0.0) + seconds
+                if failed:
+                    entry["errors"] += 1
+
+    def count(self, site, **counters):
+        with self.lock:
+            entry = self.site_entry(site)
+            for name, value in counters.items():
+                entry[name] += value
+
+    def wrap(self, stage, func):
+        """func, timed under stage on every call"""
+        def timed(*args):
+            with self.timer(stage):
+                return func(*args)
+        return timed
+
+    def report(self):
+        """The profile as a JSON-serializable dict"""
+        with self.lock:
+            stages = {stage: {"calls": calls, "seconds": round(seconds, 4)}
+                      for stage, (calls, seconds) in self.stages.items()}
+            sites = {site: dict(entry, stages={stage: round(seconds, 4) for stage, seconds in entry["stages"].items()})
+                     for site, entry in self.sites.items()}
+        return {"wall_seconds": round(time.perf_counter() - self.started, 4), "stages": stages, "sites": sites}
+
+    def table(self):
+        report = self.report()
+        order = PROFILE_STAGES + sorted(set(report["stages"]) - set(PROFILE_STAGES))
+        stage_rows = [[stage, entry["calls"], f'{entry["seconds"]:.3f}', f'{entry["seconds"] * 1000 / entry["calls"]:.1f}']
+                      for stage in order if (entry := report["stages"].get(stage))]
+        site_rows = [[site, entry["requests"], entry["cache_hits"], entry["retries"], entry["errors"], entry["bytes"] // 1024]
+                     + [f'{entry["stages"].get(stage, 0):.3f}' for stage in ("probe", "search", "detail", "parse")]
+                     for site, entry in sorted(report["sites"].items(), key=lambda item: -sum(item[1]["stages"].values()))]
+        return "\n\n".join([
+            tabulate(stage_rows, headers=["Stage", "Calls", "Time s", "Avg ms"], tablefmt="github", numalign="right"),
+            tabulate(site_rows, headers=["Site", "Requests", "Cache hits", "Retries", "Errors", "KiB",
+                                         "Probe s", "Search s", "Detail s", "Parse s"], tablefmt="github", numalign="right"),
+            f'Wall time: {report["wall_seconds"]:.3f}s',
+        ])
+
+_profiler = None
+# Stands in for a timer while profiling is off
+NO_PROFILE = contextlib.nullcontext()
+
+def get_profiler():
+    """Return the active Profiler, None unless --profile is on"""
+    return _profiler
+
+def configure_profiler(enabled=True):
+    global _profiler
+    _profiler = Profiler() if enabled else None
+    return _profiler
+
+def profiled(stage, site=None):
+    """Time a block under a stage, and a site, when profiling is on; otherwise a no-op"""
+    if _profiler is None:
+        return NO_PROFILE
+    return _profiler.timer(stage, site)
+
+LATENCY_SAMPLES = 20
+# A site whose mirrors all failed is skipped for this long, doubling with each
+# consecutive failed probe up to the mirror TTL
+FAILED_MIRROR_RETRY = 60
+# A structured endpoint that failed is tried again after this long
+API_RETRY = 300
+DEFAULT_LATENCY = 1.0
+
+def positive_seconds(text):
+    """argparse type for a number of seconds greater than zero"""
+    seconds = float(text)
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {text}")
+    return seconds
+
+def parse_duration(text):
+    """Parse a duration like '5s', '500ms', '2m', '3d' or a plain number of seconds"""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h|d|w)?\s*", str(text).lower())
+    if not match:
+        raise ValueError(f"Invalid duration: {text}")
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, None: 1}
+    return float(match.group(1)) * units[match.group(2)]
+
+class DeadlineBudget:
+    """One latency budget for a whole search, sliced between sites by their past latency"""
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.deadline_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(self.deadline_at - time.monotonic(), 0)
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def site_deadline(self, site, sites_after, page_limit=1):
+        """Deadline for a site searched before sites_after, for sites run one after another
+
+        Each site gets a share weighted by its p95 latency, but at least twice its
+        expected time while the budget lasts. Time a fast site leaves unused goes
+        to the sites that follow it.
+        """
+        remaining = self.remaining()
+        weight = site.expected_latency()
+        total = weight + sum(other.expected_latency() for other in sites_after)
+        share = max(remaining * weight / total, 2 * weight * page_limit)
+        return time.monotonic() + min(share, remaining)
+
+    def timeout(self, limit=15, site_deadline=None):
+        """Request timeout within the budget, 0 once the budget is spent"""
+        deadline_at = min(self.deadline_at, site_deadline or self.deadline_at)
+        return min(limit, max(deadline_at - time.monotonic(), 0))
+
+_background_executor = None
+
+def get_background_executor():
+    """Return the thread pool used for hedged requests"""
+    global _background_executor
+    if _background_executor is None:
+        with _http_client_lock:
+            if _background_executor is None:
+                _background_executor = ThreadPoolExecutor(max_workers=32)
+    return _background_executor
+
+def get_cache_dir():
+    """Return the directory holding torrtux's persistent state"""
+    path = os.environ.get("TORRTUX_CACHE_DIR")
+    if not path:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "torrtux")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+class JsonStore:
+    """Small JSON state file in the cache directory, replaced atomically on save"""
+    filename = None
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_cache_dir(), self.filename)
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self.entries = entries
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        with self.lock:
+            data = json.dumps(self.entries, indent=2, sort_keys=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.error(f"Could not save {self.path}: {e}")
+
+    def get(self, name):
+        return self.entries.get(name)
+
+class MirrorHealthCache(JsonStore):
+    """On-disk record of the last working mirror of each site"""
+    filename = "mirrors.json"
+
+    def __init__(self, path=None, ttl=3600):
+        self.ttl = ttl
+        super().__init__(path)
+
+    def is_fresh(self, name):
+        """True if the site has a working mirror that was checked within its TTL"""
+        entry = self.entries.get(name)
+        if not entry or not entry.get("working_url") or entry.get("failures", 0):
+            return False
+        return time.time() - entry.get("checked_at", 0) < entry.get("ttl", self.ttl)
+
+    def is_down(self, name):
+        """True if the site's last probe failed recently enough that it is not worth probing again"""
+        entry = self.entries.get(name)
+        if not entry or not entry.get("failures"):
+            return False
+        ttl = entry.get("ttl", self.ttl)
+        backoff = min(FAILED_MIRROR_RETRY * 2 ** (entry["failures"] - 1), ttl)
+        return time.time() - entry.get("checked_at", 0) < backoff
+
+    def record_success(self, name, url, latency):
+        with self.lock:
+            entry = self.entries.get(name) or {}
+            self.entries[name] = {
+                "working_url": url,
+                "latency": round(latency, 4),
+                "failures": 0,
+                "checked_at": time.time(),
+                "ttl": self.ttl,
+                "samples": entry.get("samples", [])
+            }
+
+    def record_failure(self, name):
+        with self.lock:
+            entry = self.entries.get(name) or {}
+            self.entries[name] = {
+                "working_url": None,
+                "latency": entry.get("latency"),
+                "failures": entry.get("failures", 0) + 1,
+                "checked_at": time.time(),
+                "ttl": self.ttl,
+                "samples": entry.get("samples", [])
+            }
+
+    def samples(self, name):
+        """Recent request latencies of a site, oldest first"""
+        entry = self.entries.get(name) or {}
+        return list(entry.get("samples", []))
+
+    def record_latency(self, name, latency):
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is not None:
+                entry["samples"] = (entry.get("samples", []) + [round(latency, 4)])[-LATENCY_SAMPLES:]
+
+class CircuitBreaker:
+    """Per-site circuit breaker with closed, open and half-open states
+
+    Repeated failures inside the window open the breaker and the site is skipped.
+    Once the backoff delay has passed one trial search is let through (half-open):
+    success closes the breaker, failure opens it again for twice as long.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, state, lock, failure_threshold=3, window=600, base_delay=60, max_delay=6 * 3600):
+        self.state = state
+        self.lock = lock
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.state.setdefault("state", self.CLOSED)
+        self.state.setdefault("failures", [])
+        self.state.setdefault("trips", 0)
+        self.state.setdefault("opened_at", None)
+
+    def delay(self):
+        """Seconds the breaker stays open, doubling with every consecutive trip"""
+        return min(self.base_delay * 2 ** max(self.state["trips"] - 1, 0), self.max_delay)
+
+    def retry_in(self):
+        if self.state["state"] != self.OPEN:
+            return 0
+        return max(self.state["opened_at"] + self.delay() - time.time(), 0)
+
+    def allow(self):
+        """True if the site may be searched now"""
+        with self.lock:
+            if self.state["state"] == self.OPEN:
+                if time.time() < self.state["opened_at"] + self.delay():
+                    return False
+                self.state["state"] = self.HALF_OPEN
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.state.update({"state": self.CLOSED, "failures": [], "trips": 0, "opened_at": None})
+
+    def record_failure(self, kind):
+        now = time.time()
+        with self.lock:
+            failures = [f for f in self.state["failures"] if now - f["time"] < self.window]
+            failures.append({"time": now, "kind": kind})
+            self.state["failures"] = failures[-self.failure_threshold * 2:]
+            if self.state["state"] == self.HALF_OPEN or len(failures) >= self.failure_threshold:
+                self.state["trips"] += 1
+                self.state["state"] = self.OPEN
+                self.state["opened_at"] = now
+
+class CircuitBreakerStore(JsonStore):
+    """Circuit breaker state of every site, kept across runs"""
+    filename = "breakers.json"
+
+    def breaker_for(self, name, **settings):
+        with self.lock:
+            state = self.entries.setdefault(name, {})
+        return CircuitBreaker(state, self.lock, **settings)
+
+def failure_kind(error):
+    """Short name of a request failure, as recorded by circuit breakers"""
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    return type(error).__name__
+
+MAGNET_HREF_RE = re.compile(r"^magnet:")
+
+PUBLIC_TRACKERS = [
+    "udp://tracker.opentrackr.org:1337/announce",
+    "udp://open.demonii.com:1337/announce",
+    "udp://tracker.torrent.eu.org:451/announce",
+    "udp://exodus.desync.com:6969/announce",
+    "udp://tracker.openbittorrent.com:6969/announce"
+]
+
+def build_magnet(infohash, name, trackers=PUBLIC_TRACKERS):
+    """Magnet link for an infohash, for APIs that return hashes instead of links"""
+    return f"magnet:?xt=urn:btih:{infohash}&dn={quote(name)}" + "".join(f"&tr={quote(t, safe='')}" for t in trackers)
+
+def format_size(size_bytes):
+    """Human readable size for a byte count, in the units parse_size reads"""
+    size = float(size_bytes)
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+def format_timestamp(timestamp):
+    """YYYY-MM-DD date of a Unix timestamp"""
+    return time.strftime("%Y-%m-%d", time.localtime(int(timestamp)))
+
+def compile_strainer(name, attrs):
+    """Build a SoupStrainer from a (name, attrs) spec
+
+    While parsing, a class attribute is still the raw "a b c" text, so class
+    names are turned into a whole-word pattern over it.
+    """
+    attrs = dict(attrs)
+    if "class" in attrs:
+        names = attrs["class"] if isinstance(attrs["class"], list) else [attrs["class"]]
+        attrs["class"] = re.compile(r"(?:^|\s)(?:%s)(?:\s|$)" % "|".join(map(re.escape, names)))
+    return bs4.SoupStrainer(name, attrs)
+
+CATEGORIES = ["movies", "tv", "music", "games", "software", "anime", "books", "other"]
+
+class QueryPlan:
+    """The parts of a search that sites may do server-side instead of after download
+
+    A --sort order is pushed to the sites that offer it. Otherwise a --min-seeds
+    threshold asks seeds-sortable sites for seeders-descending pages, so paging
+    stops once a page falls below the threshold.
+    """
+    def __init__(self, min_seeds=None, category=None, sort=None):
+        self.min_seeds = min_seeds
+        self.category = category
+        self.sort = sort
+
+    def site_sort(self, site):
+        if self.sort in site.sort_orders:
+            return self.sort
+        if self.min_seeds is not None and "seeds" in site.sort_orders:
+            return "seeds"
+        return None
+
+    def site_category(self, site):
+        return self.category if self.category in site.categories else None
+
+    def exhausted(self, site, page_results):
+        """True when a page the site sorted by seeds already dropped below --min-seeds
+
+        Later pages can only hold fewer seeds, so fetching them is wasted.
+        """
+        if self.min_seeds is None or self.site_sort(site) != "seeds":
+            return False
+        seeds = [r.seeds for r in page_results if r.seeds is not None]
+        return bool(seeds) and seeds[-1] < self.min_seeds
+
 class TorrentSite:
     """Base class for torrent sites"""
+    # Shared MagnetCache, set by main() unless caching is disabled
+    magnet_cache = None
+    # What the site can do server-side: plan sort key -> site's order parameter,
+    # and --category name -> site's category value. Sites that list either
+    # take sort= and category= in build_search_url.
+    sort_orders = {}
+    categories = {}
+    # Elements each kind of page is read from, as SoupStrainer (name, attrs).
+    # Only those subtrees are built; None builds the whole page.
+    result_strainer = None
+    magnet_strainer = ("a", {"href": MAGNET_HREF_RE})
+    # Set to False to build whole pages, e.g. to benchmark against strained parsing
+    use_strainers = True
+    # Pages a structured endpoint (build_api_url) serves; None when it pages like the site
+    api_page_limit = None
+
     def __init__(self, name, base_urls, search_path="", result_selector=""):
         self.name = name
         self.base_urls = base_urls if isinstance(base_urls, list) else [base_urls]
         self.search_path = search_path
         self.result_selector = result_selector
         self.working_url = None
+        self.mirror_cache = None
+        self.probe_deadline = 10
+        self.latency_samples = []
+        self.breaker = None
+        # When the structured endpoint last failed; HTML pages are used until API_RETRY has passed
+        self.api_failed_at = None
     
-    def test_connection(self):
+    @property
+    def api_down(self):
+        return self.api_failed_at is not None and time.monotonic() - self.api_failed_at < API_RETRY
+
+    @api_down.setter
+    def api_down(self, down):
+        self.api_failed_at = time.monotonic() if down else None
+
+    def probe_url(self, url, timeout=10):
+        """Return the latency of a mirror in seconds, or None if it is not reachable"""
+        start = time.monotonic()
+        try:
+            # Only the status line and headers are read, not the whole homepage
+            response = self.fetch(url, timeout=timeout, allow_redirects=True, cache_kind=None, stream=True)
+            response.close()
+            if response.status_code == 200:
+                return time.monotonic() - start
+        except:
+            pass
+        return None
+
+    def test_connection(self, deadline=None):
         """Test if any of the base URLs are working"""
-        for url in self.base_urls:
+        winners = MirrorProber(self.probe_deadline if deadline is None else deadline).probe([self])
+        if self.mirror_cache is not None:
+            if self in winners:
+                self.mirror_cache.record_success(self.name, *winners[self])
+            else:
+                self.mirror_cache.record_failure(self.name)
+            self.mirror_cache.save()
+        return self in winners
+
+    @classmethod
+    def strainer(cls, kind="result"):
+        """The SoupStrainer for one kind of page of this site, compiled on first use"""
+        compiled = cls.__dict__.get("_strainers")
+        if compiled is None:
+            compiled = cls._strainers = {}
+        if kind not in compiled:
+            spec = getattr(cls, f"{kind}_strainer")
+            compiled[kind] = compile_strainer(*spec) if spec else None
+        return compiled[kind]
+
+    def make_soup(self, content, kind="result"):
+        """Parse a page, building only the elements the site reads from it"""
+        strainer = self.strainer(kind) if self.use_strainers else None
+        if strainer is None:
+            return bs4.BeautifulSoup(content, "lxml")
+        return bs4.BeautifulSoup(content, "lxml", parse_only=strainer)
+
+    def fetch(self, url, timeout=15, cache_kind="search", **kwargs):
+        """GET a URL through the shared pooled HTTP client and its response cache
+
+        A fetch of a URL that is already being fetched waits for that request
+        and shares its response instead of sending another one.
+        """
+        if kwargs:
+            # Only plain GETs are interchangeable
+            return self.fetch_once(url, timeout, cache_kind, **kwargs)
+        try:
+            return get_http_client().flights.do((url, cache_kind), self.fetch_once, url, timeout, cache_kind, wait=timeout)
+        except FuturesTimeoutError:
+            raise requests.exceptions.Timeout(f"{self.name} did not answer within {timeout:.1f}s")
+
+    def fetch_once(self, url, timeout=15, cache_kind="search", **kwargs):
+        if _profiler is None:
+            return get_http_client().get(url, timeout=timeout, cache_kind=cache_kind, **kwargs)
+        # Mirror probes are the only fetches that skip the cache
+        with _profiler.timer(cache_kind or "probe", self.name):
             try:
-                response = requests.get(url, timeout=10, allow_redirects=True)
+                response = get_http_client().get(url, timeout=timeout, cache_kind=cache_kind, **kwargs)
+            except Exception:
+                _profiler.count(self.name, requests=1)
+                raise
+        if isinstance(response, CachedResponse):
+            # Fresh or revalidated: the body was not downloaded again
+            _profiler.count(self.name, cache_hits=1)
+        else:
+            _profiler.count(self.name, requests=1, bytes=0 if kwargs.get("stream") else len(response.content))
+        return response
+
+    def report_outcome(self, status=None, error=None, cached=False):
+        """Feed the result of a search request to the site's circuit breaker
+
+        A response served from the cache says nothing about the site now and is ignored.
+        """
+        if self.breaker is None or cached:
+            return
+        if status == 200:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure(f"http_{status}" if status else failure_kind(error))
+
+    def is_available(self):
+        """False while the circuit breaker is open"""
+        return self.breaker is None or self.breaker.allow()
+
+    def record_latency(self, seconds):
+        self.latency_samples = (self.latency_samples + [seconds])[-LATENCY_SAMPLES:]
+        if self.mirror_cache is not None:
+            self.mirror_cache.record_latency(self.name, seconds)
+
+    def latency_p95(self):
+        """95th percentile of recent search latencies, None without history"""
+        if not self.latency_samples:
+            return None
+        samples = sorted(self.latency_samples)
+        return samples[min(int(len(samples) * 0.95), len(samples) - 1)]
+
+    def expected_latency(self):
+        return self.latency_p95() or DEFAULT_LATENCY
+
+    def hedge_url(self, url):
+        """Rewrite a URL on the working mirror to the next mirror, None if there is none"""
+        if not self.working_url or not url.startswith(self.working_url) or len(self.base_urls) < 2:
+            return None
+        index = self.base_urls.index(self.working_url) if self.working_url in self.base_urls else -1
+        mirror = self.base_urls[(index + 1) % len(self.base_urls)]
+        return mirror + url[len(self.working_url):]
+
+    def fetch_hedged(self, url, timeout=15):
+        """GET a URL, racing a second mirror when the first is slower than its p95"""
+        start = time.monotonic()
+        hedge_after = self.latency_p95()
+        hedge_url = self.hedge_url(url)
+        if hedge_after is None or hedge_url is None or hedge_after >= timeout:
+            response = self.fetch(url, timeout=timeout)
+            if response.status_code == 200:
+                self.record_latency(time.monotonic() - start)
+            return response
+        executor = get_background_executor()
+        futures = [executor.submit(self.fetch, url, timeout=timeout)]
+        done, _ = wait(futures, timeout=hedge_after)
+        if not done:
+            futures.append(executor.submit(self.fetch, hedge_url, timeout=max(timeout - hedge_after, 0.1)))
+            if _profiler is not None:
+                _profiler.count(self.name, retries=1)
+        response = error = None
+        while futures:
+            done, _ = wait(futures, timeout=max(start + timeout - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                futures.remove(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    error = e
+                    continue
                 if response.status_code == 200:
-                    self.working_url = url
-                    return True
-            except:
-                continue
+                    # The slower request is left to finish in the background
+                    self.record_latency(time.monotonic() - start)
+                    return response
+        if response is not None:
+            return response
+        raise error or requests.exceptions.Timeout(f"{self.name} did not answer within {timeout:.1f}s")
+
+    def ensure_working_url(self, deadline=None):
+        """Probe the mirrors on first use if the cached mirror was stale or failed"""
+        if self.working_url:
+            return True
+        if self.test_connection(deadline):
+            return True
+        if self.breaker is not None:
+            self.breaker.record_failure("unreachable")
         return False
     
-    def search(self, query, page=0):
+    def search(self, query, page=0, plan=None):
         """Search for torrents on this site"""
-        if not self.working_url:
+        if not self.ensure_working_url():
             return []
         
         try:
-            search_url = self.build_search_url(query, page)
-            response = requests.get(search_url, timeout=15)
-            if response.status_code == 200:
-                return self.parse_results(response.content, query)
+            response, records = self.fetch_results(query, page, plan, timeout=15)
+            if response is not None and response.status_code == 200:
+                if records is not None:
+                    return records
+                return self.parse_page(response.content, query)
         except Exception as e:
             print(colored(f"Error searching {self.name}: {e}", "red"))
         
@@ -79,24 +1200,135 @@ class TorrentSite:
     def build_search_url(self, query, page=0):
         """Build search URL - to be implemented by subclasses"""
         raise NotImplementedError
+
+    def search_url(self, query, page=0, plan=None):
+        """Search URL with the sort order and category of the plan this site can apply itself"""
+        if plan is None or not (self.sort_orders or self.categories):
+            return self.build_search_url(query, page)
+        return self.build_search_url(query, page, sort=plan.site_sort(self), category=plan.site_category(self))
     
+    def build_api_url(self, query, page=0, plan=None):
+        """URL of a structured (JSON/RSS) results endpoint, None if the site has none
+
+        query is None for the latest torrents. Sites that return a URL implement parse_api.
+        """
+        return None
+
+    def parse_api(self, content, query):
+        """Rows, with inline magnets, from a structured endpoint's response"""
+        raise NotImplementedError
+
+    def api_url(self, query, page=0, plan=None):
+        if self.api_down:
+            return None
+        try:
+            return self.build_api_url(query, page, plan)
+        except Exception:
+            return None
+
+    def fetch_results(self, query, page=0, plan=None, timeout=15, latest=False):
+        """GET one results page, from the site's structured endpoint when it has one
+
+        Returns (response, records): records are the parsed TorrentResults of an
+        endpoint response, or None for an HTML page still to be parsed. An endpoint
+        that fails is skipped for API_RETRY seconds and the HTML page fetched
+        instead. Returns (None, None) when the site has no URL for the page.
+        """
+        query = None if latest else query
+        api_url = self.api_url(query, 0, plan)
+        if api_url:
+            if self.api_page_limit is not None and page >= self.api_page_limit:
+                # The endpoint already returned everything on its first page
+                return CachedResponse(api_url, 200, b""), []
+            api_url = self.api_url(query, page, plan)
+            try:
+                response = self.fetch(api_url, timeout=timeout)
+                if response.status_code == 200:
+                    return response, self.parse_api_records(response.content, query)
+                error = f"HTTP {response.status_code}"
+            except Exception as e:
+                # Unreachable, or the body is not the JSON/RSS the parser expects
+                error = e
+            logging.error(f"{self.name} API unavailable, using HTML pages: {error}")
+            self.api_down = True
+            if _profiler is not None:
+                _profiler.count(self.name, retries=1)
+        url = self.build_latest_url(page) if latest else self.search_url(query, page, plan)
+        if not url or not isinstance(url, str) or not url.startswith("http"):
+            return None, None
+        return self.fetch_hedged(url, timeout=timeout), None
+
+    def parse_api_records(self, content, query):
+        with profiled("parse", self.name):
+            return [TorrentResult.from_row(row) for row in self.parse_api(content, query)]
+
     def parse_results(self, content, query):
-        """Parse search results - to be implemented by subclasses"""
+        """Parse search results - to be implemented by subclasses
+
+        Rows without an inline magnet carry "magnet": None and their "detail_url".
+        """
         raise NotImplementedError
 
+    def parse_records(self, content, query):
+        """Parse a results page into TorrentResult records, in a worker process when enabled"""
+        with profiled("parse", self.name):
+            pool = get_parse_pool()
+            results = pool.parse(self, content, query) if pool is not None else None
+            if results is None:
+                results = [TorrentResult.from_row(row) for row in self.parse_results(content, query)]
+        return self.fill_cached_magnets(results)
+
+    def parse_page(self, content, query, resolve=True):
+        """Parse a results page, then resolve the missing magnets in one concurrent batch
+
+        With resolve=False the rows keep their detail_url and are resolved on demand.
+        """
+        results = self.parse_records(content, query)
+        if not resolve:
+            return results
+        return get_magnet_resolver().resolve(self, results)
+
+    def fill_cached_magnets(self, results):
+        """Take the magnets of already known detail pages from the magnet cache"""
+        if self.magnet_cache is None:
+            return results
+        pending = [r for r in results if not r.magnet and r.detail_url]
+        if pending:
+            known = self.magnet_cache.get_many(r.detail_url for r in pending)
+            for result in pending:
+                result.set_magnet(known.get(result.detail_url))
+            if _profiler is not None:
+                _profiler.count(self.name, cache_hits=len(known))
+        return results
+
     def get_magnet_link(self, detail_url):
         """Get magnet link from detail page"""
+        if self.magnet_cache is not None:
+            magnet = self.magnet_cache.get(detail_url)
+            if magnet:
+                if _profiler is not None:
+                    _profiler.count(self.name, cache_hits=1)
+                return magnet
         try:
-            response = requests.get(detail_url, timeout=15)
+            response = self.fetch(detail_url, timeout=15, cache_kind="detail")
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, "lxml")
-                for a in soup.find_all("a", href=True):
-                    if a["href"].startswith("magnet:"):
-                        return a["href"]
+                magnet = self.extract_magnet(response.content)
+                if magnet and self.magnet_cache is not None:
+                    self.magnet_cache.put(detail_url, magnet)
+                return magnet
         except Exception as e:
             print(colored(f"Error getting magnet link from {self.name}: {e}", "red"))
         return None
 
+    def extract_magnet(self, content):
+        """Return the first magnet link found in a detail page"""
+        with profiled("parse", self.name):
+            soup = self.make_soup(content, "magnet")
+            for a in soup.find_all("a", href=True):
+                if a["href"].startswith("magnet:"):
+                    return a["href"]
+        return None
+
     def build_latest_url(self, page=0):
         # By default, fallback to search for empty query or a special latest page if site supports it
         try:
@@ -104,6 +1336,17 @@ class TorrentSite:
         except:
             return None
 
+# TorrentSite subclasses by display name, filled in by @register_site
+SITES = {}
+
+def register_site(name):
+    """Class decorator adding a TorrentSite subclass to the registry under its display name"""
+    def register(cls):
+        SITES[name] = cls
+        return cls
+    return register
+
+@register_site("The Pirate Bay")
 class PirateBay(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -122,10 +1365,41 @@ class PirateBay(TorrentSite):
                 "https://thepiratebay3.to"
             ]
         )
-    def build_search_url(self, query, page=0):
-        return f"{self.working_url}/s/?q={quote(query)}&page={page}&orderby=99"
+    result_strainer = ("table", {"id": "searchResult"})
+    sort_orders = {"seeds": "7", "size": "5", "date": "3"}
+    categories = {"movies": "201", "tv": "205", "music": "101", "games": "400", "software": "300",
+                  "books": "601", "other": "600"}
+    # apibay returns every match, with infohashes, in one JSON response
+    api_page_limit = 1
+    def build_api_url(self, query, page=0, plan=None):
+        if not query:
+            return None
+        category = plan.site_category(self) if plan is not None else None
+        return f"https://apibay.org/q.php?q={quote(query)}&cat={self.categories[category] if category else '0'}"
+    def parse_api(self, content, query):
+        results = []
+        for item in json.loads(content):
+            # No matches come back as a single placeholder with id 0
+            if str(item.get("id")) == "0":
+                continue
+            results.append({
+                "name": item["name"],
+                "size": format_size(item["size"]),
+                "seeds": str(item["seeders"]),
+                "leeches": str(item["leechers"]),
+                "date": format_timestamp(item["added"]),
+                "magnet": build_magnet(item["info_hash"], item["name"]),
+                "detail_url": f"{self.working_url}/description.php?id={item['id']}",
+                "site": self.name
+            })
+        return results
+    def build_search_url(self, query, page=0, sort=None, category=None):
+        url = f"{self.working_url}/s/?q={quote(query)}&page={page}&orderby={self.sort_orders.get(sort, '99')}"
+        if category:
+            url += f"&category={self.categories[category]}"
+        return url
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", id="searchResult")
         if not table:
@@ -135,8 +1409,8 @@ class PirateBay(TorrentSite):
                 name_cell = row.find("a", class_="detLink")
                 name = name_cell.get_text(strip=True) if name_cell else "-"
                 detail_url = urljoin(self.working_url, name_cell["href"]) if name_cell else None
-                magnet_link = row.find("a", href=lambda href: href and href.startswith("magnet:"))
-                magnet = magnet_link["href"] if magnet_link else (self.get_magnet_link(detail_url) if detail_url else "")
+                magnet_link = row.find("a", href=MAGNET_HREF_RE)
+                magnet = magnet_link["href"] if magnet_link else None
                 desc_cell = row.find("font", class_="detDesc")
                 desc_text = desc_cell.get_text().split(",") if desc_cell else []
                 date = desc_text[0].replace("Uploaded ", "").strip() if len(desc_text) > 0 else "-"
@@ -151,12 +1425,14 @@ class PirateBay(TorrentSite):
                     "leeches": leeches,
                     "date": date,
                     "magnet": magnet,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except Exception as e:
                 continue
         return results
 
+@register_site("1337x")
 class X1337(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -170,11 +1446,22 @@ class X1337(TorrentSite):
                 "https://1337x.unblockit.boo"
             ]
         )
-    def build_search_url(self, query, page=0):
+    result_strainer = ("table", {"class": "table-list"})
+    sort_orders = {"seeds": "seeders", "size": "size", "date": "time"}
+    categories = {"movies": "Movies", "tv": "TV", "music": "Music", "games": "Games", "software": "Apps",
+                  "anime": "Anime", "other": "Other"}
+    def build_search_url(self, query, page=0, sort=None, category=None):
+        if sort and category:
+            return (f"{self.working_url}/sort-category-search/{quote(query)}/{self.categories[category]}/"
+                    f"{self.sort_orders[sort]}/desc/{page+1}/")
+        if sort:
+            return f"{self.working_url}/sort-search/{quote(query)}/{self.sort_orders[sort]}/desc/{page+1}/"
+        if category:
+            return f"{self.working_url}/category-search/{quote(query)}/{self.categories[category]}/{page+1}/"
         return f"{self.working_url}/search/{quote(query)}/{page+1}/"
 
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", class_="table-list")
         if not table:
@@ -196,13 +1483,15 @@ class X1337(TorrentSite):
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": self.get_magnet_link(detail_url),
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("YTS")
 class YTS(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -213,10 +1502,35 @@ class YTS(TorrentSite):
                 "https://yts.lt"
             ]
         )
+    result_strainer = (None, {"class": "browse-movie-wrap"})
+    def build_api_url(self, query, page=0, plan=None):
+        if query is None:
+            return f"{self.working_url}/api/v2/list_movies.json?sort_by=date_added&limit=50&page={page+1}"
+        return f"{self.working_url}/api/v2/list_movies.json?query_term={quote(query)}&limit=50&page={page+1}"
+    def parse_api(self, content, query):
+        data = json.loads(content)
+        if data.get("status") != "ok":
+            raise ValueError(data.get("status_message", "YTS API error"))
+        results = []
+        for movie in (data.get("data") or {}).get("movies") or []:
+            title = movie.get("title_long") or movie["title"]
+            for torrent in movie.get("torrents") or []:
+                name = f"{title} [{torrent.get('quality', '')} {torrent.get('type', '')}]".replace(" ]", "]")
+                results.append({
+                    "name": name,
+                    "size": torrent.get("size") or "-",
+                    "seeds": str(torrent.get("seeds", "-")),
+                    "leeches": str(torrent.get("peers", "-")),
+                    "date": (torrent.get("date_uploaded") or str(movie.get("year", "-")))[:10],
+                    "magnet": build_magnet(torrent["hash"], name),
+                    "detail_url": movie.get("url"),
+                    "site": self.name
+                })
+        return results
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/browse-movies/{quote(query)}/all/all/0/latest"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         for movie in soup.select(".browse-movie-wrap"):
             try:
@@ -227,25 +1541,21 @@ class YTS(TorrentSite):
                 leeches = "-"
                 size = "-"
                 date = year
-                magnet = None
-                # Get magnet from detail page
-                try:
-                    magnet = self.get_magnet_link(detail_url)
-                except:
-                    pass
                 results.append({
                     "name": f"{name} ({year})",
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("Nyaa")
 class Nyaa(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -255,10 +1565,45 @@ class Nyaa(TorrentSite):
                 "https://nyaa.net"
             ]
         )
-    def build_search_url(self, query, page=0):
-        return f"{self.working_url}/?f=0&c=0_0&q={quote(query)}&p={page+1}"
+    result_strainer = ("table", {"class": ["torrent-list", "table"]})
+    sort_orders = {"seeds": "seeders", "size": "size", "date": "id"}
+    categories = {"anime": "1_0", "music": "2_0", "books": "3_0", "software": "6_0"}
+    # The RSS feed carries infohashes and counts, but only one unsorted page
+    api_page_limit = 1
+    def build_api_url(self, query, page=0, plan=None):
+        if plan is not None and plan.site_sort(self):
+            return None
+        category = plan.site_category(self) if plan is not None else None
+        url = f"{self.working_url}/?page=rss&f=0&c={self.categories.get(category, '0_0')}"
+        return url + f"&q={quote(query)}" if query else url
+    def parse_api(self, content, query):
+        from email.utils import parsedate_to_datetime
+        ns = {"nyaa": "https://nyaa.si/xmlns/nyaa"}
+        root = ElementTree.fromstring(content)
+        if root.tag != "rss":
+            raise ValueError(f"Expected an RSS feed, got <{root.tag}>")
+        results = []
+        for item in root.iter("item"):
+            name = item.findtext("title")
+            published = item.findtext("pubDate")
+            results.append({
+                "name": name,
+                "size": item.findtext("nyaa:size", "-", ns),
+                "seeds": item.findtext("nyaa:seeders", "-", ns),
+                "leeches": item.findtext("nyaa:leechers", "-", ns),
+                "date": parsedate_to_datetime(published).strftime("%Y-%m-%d") if published else "-",
+                "magnet": build_magnet(item.findtext("nyaa:infoHash", namespaces=ns), name),
+                "detail_url": item.findtext("guid"),
+                "site": self.name
+            })
+        return results
+    def build_search_url(self, query, page=0, sort=None, category=None):
+        url = f"{self.working_url}/?f=0&c={self.categories.get(category, '0_0')}&q={quote(query)}&p={page+1}"
+        if sort:
+            url += f"&s={self.sort_orders[sort]}&o=desc"
+        return url
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", class_="torrent-list")
         if not table:
@@ -276,8 +1621,8 @@ class Nyaa(TorrentSite):
                 date = cols[4].text.strip()
                 seeds = cols[5].text.strip()
                 leeches = cols[6].text.strip()
-                magnet = cols[2].find("a", href=lambda h: h and h.startswith("magnet:"))
-                magnet = magnet["href"] if magnet else self.get_magnet_link(detail_url)
+                magnet = cols[2].find("a", href=MAGNET_HREF_RE)
+                magnet = magnet["href"] if magnet else None
                 results.append({
                     "name": name,
                     "size": size,
@@ -285,12 +1630,14 @@ class Nyaa(TorrentSite):
                     "leeches": leeches,
                     "date": date,
                     "magnet": magnet,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("EZTV")
 class EZTV(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -301,10 +1648,30 @@ class EZTV(TorrentSite):
                 "https://eztv.unblockit.boo"
             ]
         )
+    result_strainer = ("table", {"class": "forum_header_border"})
+    def build_api_url(self, query, page=0, plan=None):
+        # The API lists the newest torrents only, it has no text search
+        if query is not None:
+            return None
+        return f"{self.working_url}/api/get-torrents?limit=50&page={page+1}"
+    def parse_api(self, content, query):
+        results = []
+        for torrent in json.loads(content).get("torrents") or []:
+            results.append({
+                "name": torrent["title"],
+                "size": format_size(torrent["size_bytes"]),
+                "seeds": str(torrent.get("seeds", "-")),
+                "leeches": str(torrent.get("peers", "-")),
+                "date": format_timestamp(torrent["date_released_unix"]),
+                "magnet": torrent.get("magnet_url") or build_magnet(torrent["hash"], torrent["title"]),
+                "detail_url": torrent.get("episode_url"),
+                "site": self.name
+            })
+        return results
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/search/{quote(query)}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", class_="forum_header_border")
         if not table:
@@ -320,20 +1687,21 @@ class EZTV(TorrentSite):
                 date = cols[4].get_text(strip=True)
                 seeds = "-"
                 leeches = "-"
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("TorrentGalaxy")
 class TorrentGalaxy(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -343,10 +1711,15 @@ class TorrentGalaxy(TorrentSite):
                 "https://tgx.rs"
             ]
         )
-    def build_search_url(self, query, page=0):
-        return f"{self.working_url}/torrents.php?search={quote(query)}&page={page+1}"
+    result_strainer = ("table", {"class": "tgxtable"})
+    sort_orders = {"seeds": "seeders", "size": "size", "date": "id"}
+    def build_search_url(self, query, page=0, sort=None, category=None):
+        url = f"{self.working_url}/torrents.php?search={quote(query)}&page={page+1}"
+        if sort:
+            url += f"&sort={self.sort_orders[sort]}&order=desc"
+        return url
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", class_="tgxtable")
         if not table:
@@ -362,20 +1735,21 @@ class TorrentGalaxy(TorrentSite):
                 seeds = cols[7].text.strip()
                 leeches = cols[8].text.strip()
                 date = cols[4].text.strip()
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("LimeTorrents")
 class LimeTorrents(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -387,10 +1761,16 @@ class LimeTorrents(TorrentSite):
                 "https://www.limetorrents.zone"
             ]
         )
-    def build_search_url(self, query, page=0):
-        return f"{self.working_url}/search/all/{quote(query)}/seeds/{page+1}/"
+    result_strainer = ("table", {"id": "table2"})
+    sort_orders = {"seeds": "seeds", "size": "size", "date": "date"}
+    categories = {"movies": "movies", "tv": "tv", "music": "music", "games": "games", "software": "applications",
+                  "anime": "anime", "other": "other"}
+    def build_search_url(self, query, page=0, sort=None, category=None):
+        # Results are ordered by seeds unless the plan asks for another order
+        return (f"{self.working_url}/search/{self.categories.get(category, 'all')}/{quote(query)}/"
+                f"{self.sort_orders.get(sort, 'seeds')}/{page+1}/")
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", id="table2")
         if not table:
@@ -406,20 +1786,21 @@ class LimeTorrents(TorrentSite):
                 date = cols[2].text.strip()
                 seeds = cols[3].text.strip()
                 leeches = cols[4].text.strip()
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("TorrentDownloads")
 class TorrentDownloads(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -430,10 +1811,11 @@ class TorrentDownloads(TorrentSite):
                 "https://www.torrentdownloads.unblockit.boo"
             ]
         )
+    result_strainer = ("table", {"class": "torrent_table"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/search/?search={quote(query)}&page={page+1}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", class_="torrent_table")
         if not table:
@@ -449,20 +1831,21 @@ class TorrentDownloads(TorrentSite):
                 date = cols[2].text.strip()
                 seeds = cols[3].text.strip()
                 leeches = cols[4].text.strip()
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("Torlock")
 class Torlock(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -472,10 +1855,11 @@ class Torlock(TorrentSite):
                 "https://torlock.unblocked.lol"
             ]
         )
+    result_strainer = ("table", {"id": "torrenttable"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/all/torrents/{quote(query)}.html?page={page+1}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", id="torrenttable")
         if not table:
@@ -491,20 +1875,21 @@ class Torlock(TorrentSite):
                 date = cols[4].text.strip()
                 seeds = cols[5].text.strip()
                 leeches = cols[6].text.strip()
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("Zooqle")
 class Zooqle(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -514,10 +1899,11 @@ class Zooqle(TorrentSite):
                 "https://zooqle.unblockit.boo"
             ]
         )
+    result_strainer = (None, {"class": "torrent-list"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/search?q={quote(query)}&pg={page+1}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         for row in soup.select(".torrent-list tbody tr"):
             try:
@@ -530,20 +1916,21 @@ class Zooqle(TorrentSite):
                 seeds = cols[6].text.strip()
                 leeches = cols[7].text.strip()
                 date = "-"
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("TorrentFunk")
 class TorrentFunk(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -552,10 +1939,11 @@ class TorrentFunk(TorrentSite):
                 "https://www.torrentfunk.com"
             ]
         )
+    result_strainer = (None, {"class": "search-results"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/search/all/{quote(query)}/"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         for row in soup.select(".search-results .odd, .search-results .even"):
             try:
@@ -565,20 +1953,21 @@ class TorrentFunk(TorrentSite):
                 seeds = row.find("td", class_="seeds").text.strip()
                 leeches = row.find("td", class_="leeches").text.strip()
                 date = "-"
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("ETTV")
 class ETTV(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -588,10 +1977,11 @@ class ETTV(TorrentSite):
                 "https://ettvcentral.com"
             ]
         )
+    result_strainer = ("table", {"class": "table"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/torrents-search.php?search={quote(query)}&page={page+1}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", class_="table")
         if not table:
@@ -607,20 +1997,21 @@ class ETTV(TorrentSite):
                 seeds = cols[5].text.strip()
                 leeches = cols[6].text.strip()
                 date = cols[3].text.strip()
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("Bitsearch")
 class Bitsearch(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -629,10 +2020,15 @@ class Bitsearch(TorrentSite):
                 "https://bitsearch.to"
             ]
         )
-    def build_search_url(self, query, page=0):
-        return f"{self.working_url}/search?q={quote(query)}&page={page+1}"
+    result_strainer = (None, {"class": "search-results"})
+    sort_orders = {"seeds": "seeders", "size": "size", "date": "date"}
+    def build_search_url(self, query, page=0, sort=None, category=None):
+        url = f"{self.working_url}/search?q={quote(query)}&page={page+1}"
+        if sort:
+            url += f"&sort={self.sort_orders[sort]}"
+        return url
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         for row in soup.select(".search-results .result"):
             try:
@@ -642,20 +2038,21 @@ class Bitsearch(TorrentSite):
                 seeds = row.find("span", class_="seeds").text.strip()
                 leeches = row.find("span", class_="leeches").text.strip()
                 date = "-"
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("Glodls")
 class Glodls(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -664,10 +2061,11 @@ class Glodls(TorrentSite):
                 "https://glodls.to"
             ]
         )
+    result_strainer = ("table", {"class": "table"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/search_results.php?search={quote(query)}&page={page+1}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", class_="table")
         if not table:
@@ -683,20 +2081,21 @@ class Glodls(TorrentSite):
                 seeds = cols[5].text.strip()
                 leeches = cols[6].text.strip()
                 date = cols[3].text.strip()
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("TorrentProject")
 class TorrentProject(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -706,10 +2105,11 @@ class TorrentProject(TorrentSite):
                 "https://torrentproject.se"
             ]
         )
+    result_strainer = (None, {"class": "table"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/?t={quote(query)}&page={page+1}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         for row in soup.select(".table tr"):
             try:
@@ -722,20 +2122,21 @@ class TorrentProject(TorrentSite):
                 seeds = cols[3].text.strip()
                 leeches = cols[4].text.strip()
                 date = cols[1].text.strip()
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("SkyTorrents")
 class SkyTorrents(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -745,10 +2146,11 @@ class SkyTorrents(TorrentSite):
                 "https://skytorrents.unblockit.boo"
             ]
         )
+    result_strainer = ("table", {"class": "table"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/search/all/{quote(query)}/page/{page+1}/"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", class_="table")
         if not table:
@@ -764,20 +2166,21 @@ class SkyTorrents(TorrentSite):
                 seeds = cols[5].text.strip()
                 leeches = cols[6].text.strip()
                 date = cols[3].text.strip()
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("YourBittorrent")
 class YourBittorrent(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -786,10 +2189,11 @@ class YourBittorrent(TorrentSite):
                 "https://yourbittorrent.com"
             ]
         )
+    result_strainer = (None, {"class": "search-result"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/?q={quote(query)}&page={page+1}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         for row in soup.select(".search-result .row"):
             try:
@@ -799,20 +2203,21 @@ class YourBittorrent(TorrentSite):
                 seeds = row.find("span", class_="seeds").text.strip()
                 leeches = row.find("span", class_="leeches").text.strip()
                 date = "-"
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("KickassTorrents")
 class KickassTorrents(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -823,10 +2228,11 @@ class KickassTorrents(TorrentSite):
                 "https://kickasstorrents.bz"
             ]
         )
+    result_strainer = ("table", {"class": "data"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/usearch/{quote(query)}/{page+1}/"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", class_="data")
         if not table:
@@ -842,20 +2248,21 @@ class KickassTorrents(TorrentSite):
                 seeds = cols[2].text.strip()
                 leeches = cols[3].text.strip()
                 date = cols[4].text.strip()
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("Torrentz2")
 class Torrentz2(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -866,10 +2273,11 @@ class Torrentz2(TorrentSite):
                 "https://torrentz2.eu"
             ]
         )
+    result_strainer = (None, {"class": "results"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/search?f={quote(query)}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         for row in soup.select(".results dl"):
             try:
@@ -880,20 +2288,21 @@ class Torrentz2(TorrentSite):
                 seeds = "-"
                 leeches = "-"
                 date = "-"
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("RARBG")
 class RARBG(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -910,6 +2319,7 @@ class RARBG(TorrentSite):
         print(colored("RARBG is closed. Archive mirrors only, no real search.", "red"))
         return []
 
+@register_site("MagnetDL")
 class MagnetDL(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -919,12 +2329,13 @@ class MagnetDL(TorrentSite):
                 "https://magnetdl.unblockit.boo"
             ]
         )
+    result_strainer = ("table", {"class": "download"})
     def build_search_url(self, query, page=0):
         # MagnetDL uses the first letter of the query in the URL path
         first_letter = query[0].lower() if query else 'a'
         return f"{self.working_url}/{first_letter}/{quote(query)}/?page={page+1}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", class_="download")
         if not table:
@@ -940,20 +2351,21 @@ class MagnetDL(TorrentSite):
                 seeds = cols[4].text.strip()
                 leeches = cols[5].text.strip()
                 date = cols[2].text.strip()
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("Good-Torrent")
 class GoodTorrent(TorrentSite):
     def __init__(self):
         super().__init__(
@@ -964,21 +2376,23 @@ class GoodTorrent(TorrentSite):
         return f"{self.working_url}/search/{quote(query)}"
     def parse_results(self, content, query):
         # Initial: No detailed parsing yet, to be improved after site structure analysis.
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         # Can be improved later
         return results
 
+@register_site("Arab-Torrents")
 class ArabTorrents(TorrentSite):
     def __init__(self):
         super().__init__(
             "Arab-Torrents",
             ["https://www.arab-torrents.net"]
         )
+    result_strainer = ("table", {"class": "table"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/torrents-search.php?search={quote(query)}&page={page+1}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", class_="table")
         if not table:
@@ -994,30 +2408,32 @@ class ArabTorrents(TorrentSite):
                 seeds = cols[5].text.strip()
                 leeches = cols[6].text.strip()
                 date = cols[3].text.strip()
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("FitGirl Repacks")
 class FitGirlRepacks(TorrentSite):
     def __init__(self):
         super().__init__(
             "FitGirl Repacks",
             ["https://fitgirl-repacks.site"]
         )
+    result_strainer = (None, {"class": "post"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/?s={quote(query)}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         for post in soup.select(".post"):
             try:
@@ -1027,30 +2443,32 @@ class FitGirlRepacks(TorrentSite):
                 seeds = "-"
                 leeches = "-"
                 date = "-"
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+@register_site("LinuxTracker")
 class LinuxTracker(TorrentSite):
     def __init__(self):
         super().__init__(
             "LinuxTracker",
             ["https://linuxtracker.org"]
         )
+    result_strainer = ("table", {"class": "torrents"})
     def build_search_url(self, query, page=0):
         return f"{self.working_url}/index.php?page=torrents&search={quote(query)}"
     def parse_results(self, content, query):
-        soup = BeautifulSoup(content, "lxml")
+        soup = self.make_soup(content)
         results = []
         table = soup.find("table", class_="torrents")
         if not table:
@@ -1066,62 +2484,186 @@ class LinuxTracker(TorrentSite):
                 seeds = cols[5].text.strip()
                 leeches = cols[6].text.strip()
                 date = cols[3].text.strip()
-                magnet = self.get_magnet_link(detail_url)
                 results.append({
                     "name": name,
                     "size": size,
                     "seeds": seeds,
                     "leeches": leeches,
                     "date": date,
-                    "magnet": magnet,
+                    "magnet": None,
+                    "detail_url": detail_url,
                     "site": self.name
                 })
             except:
                 continue
         return results
 
+class MirrorProber:
+    """Probe all mirrors of all sites at once, the first mirror to answer wins"""
+    def __init__(self, deadline=10, max_workers=64):
+        self.deadline = deadline
+        self.max_workers = max_workers
+
+    def probe(self, sites, on_result=None):
+        """Return {site: (working_url, latency)} for the sites that answered before the deadline"""
+        deadline_at = time.monotonic() + self.deadline
+        resolved = {site: threading.Event() for site in sites}
+        winners = {}
+
+        def probe_one(site, url):
+            # Skip mirrors of a site that already has a winner
+            if resolved[site].is_set():
+                return None
+            timeout = max(deadline_at - time.monotonic(), 0.1)
+            return site.probe_url(url, timeout=timeout)
+
+        jobs = [(site, url) for site in sites for url in site.base_urls]
+        if not jobs:
+            return winners
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs)))
+        pending = {executor.submit(probe_one, site, url): (site, url) for site, url in jobs}
+        try:
+            while pending and len(winners) < len(sites):
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    # A winner earlier in this batch may already have dropped its siblings
+                    job = pending.pop(future, None)
+                    if job is None:
+                        continue
+                    site, url = job
+                    latency = future.result()
+                    if latency is None or site in winners:
+                        continue
+                    winners[site] = (url, latency)
+                    site.working_url = url
+                    resolved[site].set()
+                    # Cancel the mirrors of this site that have not started yet
+                    for other, (other_site, _) in list(pending.items()):
+                        if other_site is site:
+                            other.cancel()
+                            del pending[other]
+                    if on_result:
+                        on_result(site, url, latency)
+        finally:
+            for event in resolved.values():
+                event.set()
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+        if on_result:
+            for site in sites:
+                if site not in winners:
+                    on_result(site, None, None)
+        return winners
+
 class TorrentSearcher:
-    def __init__(self):
-        self.sites = [
-            PirateBay(),
-            X1337(),
-            KickassTorrents(),
-            YTS(),
-            Nyaa(),
-            EZTV(),
-            TorrentGalaxy(),
-            LimeTorrents(),
-            TorrentDownloads(),
-            Torlock(),
-            Zooqle(),
-            TorrentFunk(),
-            ETTV(),
-            MagnetDL(),
-            Bitsearch(),
-            Glodls(),
-            TorrentProject(),
-            SkyTorrents(),
-            YourBittorrent(),
-            GoodTorrent(),
-            Torrentz2(),
-            RARBG(),
-            ArabTorrents(),
-            FitGirlRepacks(),
-            LinuxTracker(),
-        ]
+    # Registered sites in the order they are searched
+    site_order = [
+        "The Pirate Bay",
+        "1337x",
+        "KickassTorrents",
+        "YTS",
+        "Nyaa",
+        "EZTV",
+        "TorrentGalaxy",
+        "LimeTorrents",
+        "TorrentDownloads",
+        "Torlock",
+        "Zooqle",
+        "TorrentFunk",
+        "ETTV",
+        "MagnetDL",
+        "Bitsearch",
+        "Glodls",
+        "TorrentProject",
+        "SkyTorrents",
+        "YourBittorrent",
+        "Good-Torrent",
+        "Torrentz2",
+        "RARBG",
+        "Arab-Torrents",
+        "FitGirl Repacks",
+        "LinuxTracker",
+    ]
+
+    def __init__(self, site_names=None):
+        """Instantiate every registered site, or only the ones named (case-insensitive)"""
+        names = self.site_order
+        if site_names is not None:
+            wanted = {name.strip().lower() for name in site_names}
+            names = [name for name in names if name.lower() in wanted]
+        self.sites = [SITES[name]() for name in names]
         self.working_sites = []
+        self.mirror_cache = None
+        self.eager_magnets = False
+        self.engine = None
+        self.budget = None
+        self.plan = None
+
+    def fork(self, site_names=None):
+        """A searcher over the same warm sites with its own plan, deadline and engine
+
+        Lets one process run concurrent queries; site_names narrows the working sites.
+        """
+        searcher = copy.copy(self)
+        if site_names is not None:
+            wanted = {name.strip().lower() for name in site_names}
+            searcher.working_sites = [site for site in self.working_sites if site.name.lower() in wanted]
+        searcher.plan = searcher.budget = searcher.engine = None
+        return searcher
+
+    def load_breakers(self, store, **settings):
+        """Attach a persisted circuit breaker to every site"""
+        for site in self.sites:
+            site.breaker = store.breaker_for(site.name, **settings)
+
+    def load_mirror_cache(self, mirror_cache, probe_deadline=10, reprobe=False):
+        """Take working mirrors from the cache, returns False if the sites must be probed
+
+        The cache is attached either way so probes and latencies are recorded in
+        it; with reprobe its working mirrors are ignored.
+        """
+        self.mirror_cache = mirror_cache
+        for site in self.sites:
+            site.mirror_cache = mirror_cache
+            site.probe_deadline = probe_deadline
+            site.latency_samples = mirror_cache.samples(site.name)
+        if reprobe or any(mirror_cache.get(site.name) is None for site in self.sites):
+            return False
+        # Sites that failed recently are skipped; stale entries and failed ones
+        # whose backoff has passed keep working_url unset and are probed when searched
+        self.working_sites = [site for site in self.sites if not mirror_cache.is_down(site.name)]
+        if not self.working_sites:
+            return False
+        for site in self.working_sites:
+            if mirror_cache.is_fresh(site.name):
+                site.working_url = mirror_cache.get(site.name)["working_url"]
+            else:
+                site.working_url = None
+        return True
     
-    def test_sites(self):
-        """Test which sites are working"""
+    def test_sites(self, deadline=10):
+        """Test which sites are working, probing all mirrors concurrently"""
         print(colored("Testing torrent sites...", "cyan"))
-        
-        for site in self.sites:
-            print(f"Testing {site.name}...", end=" ")
-            if site.test_connection():
-                self.working_sites.append(site)
-                print(colored("✓ Working", "green"))
+
+        def report(site, url, latency):
+            if url:
+                print(f"Testing {site.name}... " + colored(f"✓ Working ({latency * 1000:.0f} ms)", "green"))
             else:
-                print(colored("✗ Not accessible", "red"))
+                print(f"Testing {site.name}... " + colored("✗ Not accessible", "red"))
+
+        winners = MirrorProber(deadline).probe(self.sites, on_result=report)
+        self.working_sites = [site for site in self.sites if site in winners]
+        if self.mirror_cache is not None:
+            for site in self.sites:
+                if site in winners:
+                    self.mirror_cache.record_success(site.name, *winners[site])
+                else:
+                    self.mirror_cache.record_failure(site.name)
+            self.mirror_cache.save()
         
         if not self.working_sites:
             print(colored("No working torrent sites found!", "red"))
@@ -1130,43 +2672,118 @@ class TorrentSearcher:
         print(colored(f"\nFound {len(self.working_sites)} working sites", "green"))
         return True
     
+    def mirror_due(self, site):
+        """True if a site's working mirror should be probed again
+
+        That is when its cache entry outlived the mirror TTL, or when its circuit
+        breaker opened since the mirror was last checked. Sites that are down
+        wait out their backoff first.
+        """
+        entry = self.mirror_cache.get(site.name)
+        if entry is None:
+            return True
+        if self.mirror_cache.is_down(site.name):
+            return False
+        if not self.mirror_cache.is_fresh(site.name):
+            return True
+        breaker = site.breaker
+        return (breaker is not None and breaker.state["state"] != CircuitBreaker.CLOSED
+                and breaker.state["opened_at"] > entry.get("checked_at", 0))
+
+    def refresh_mirrors(self, deadline=10):
+        """Probe the sites whose mirror is due together, for a long-running process
+
+        Mirrors are replaced only once a probe finds a working one, so searches
+        running meanwhile keep their URLs. Returns the sites probed.
+        """
+        due = [site for site in self.sites if self.mirror_due(site)]
+        if due:
+            winners = MirrorProber(deadline).probe(due)
+            for site in due:
+                if site in winners:
+                    self.mirror_cache.record_success(site.name, *winners[site])
+                else:
+                    self.mirror_cache.record_failure(site.name)
+            self.mirror_cache.save()
+        self.working_sites = [site for site in self.sites if not self.mirror_cache.is_down(site.name)]
+        return due
+
     def search_all_sites(self, query, page_limit=1, show_progress=False, verbose=False):
         """Search all working sites"""
-        all_results = []
-        
-        for site in self.working_sites:
+        return list(self.iter_search_all_sites(query, page_limit, show_progress, verbose))
+
+    def probe_deadline(self, site, site_deadline=None):
+        """Time a stale site's mirrors may be probed for, bounded by the search deadline"""
+        if self.budget is None:
+            return None
+        return self.budget.timeout(site.probe_deadline, site_deadline)
+
+    def request_timeout(self, site_deadline=None):
+        """Timeout for the next request, bounded by the search deadline when one is set"""
+        if self.budget is None:
+            return 15
+        return self.budget.timeout(15, site_deadline)
+
+    def iter_search_all_sites(self, query, page_limit=1, show_progress=False, verbose=False):
+        """Search all working sites one by one, yielding each page's results as it is parsed"""
+        found = 0
+        for index, site in enumerate(self.working_sites):
+            site_deadline = None
+            if self.budget is not None:
+                if self.budget.expired():
+                    if verbose:
+                        print(colored(f"\nDeadline reached, skipping {len(self.working_sites) - index} sites", "magenta"))
+                    break
+                site_deadline = self.budget.site_deadline(site, self.working_sites[index + 1:], page_limit)
+            if not site.is_available():
+                if verbose:
+                    print(colored(f"\nSkipping {site.name}: circuit open, retry in {site.breaker.retry_in():.0f}s", "magenta"))
+                continue
             spinner = Spinner(f"Searching {site.name}") if show_progress else None
             if show_progress:
                 spinner.start()
             elif verbose:
                 print(colored(f"\nSearching {site.name}...", "yellow"))
+            probe_deadline = self.probe_deadline(site, site_deadline)
+            if (probe_deadline is not None and probe_deadline <= 0) or not site.ensure_working_url(probe_deadline):
+                if show_progress:
+                    spinner.stop(colored(f"✗ Not accessible", "red"))
+                elif verbose:
+                    print(colored(f"{site.name} is not accessible. Skipping site.", "red"))
+                continue
             try:
                 for page in range(page_limit):
-                    search_url = None
-                    try:
-                        search_url = site.build_search_url(query, page)
-                    except Exception as e:
+                    timeout = self.request_timeout(site_deadline)
+                    if timeout <= 0:
                         if show_progress:
-                            spinner.stop(colored(f"✗ Error", "red"))
-                        elif verbose:
-                            print(colored(f"Error building search URL for {site.name}: {e}", "red"))
-                        break
-                    if not search_url or not isinstance(search_url, str) or not search_url.startswith("http"):
-                        if show_progress:
-                            spinner.stop(colored(f"✗ Skipped", "magenta"))
+                            spinner.stop(colored(f"✗ Deadline", "red"))
                         elif verbose:
-                            print(colored(f"Skipping {site.name}: No valid search URL.", "magenta"))
+                            print(colored(f"Time budget for {site.name} spent (page {page + 1})", "red"))
                         break
                     try:
-                        response = requests.get(search_url, timeout=15)
+                        response, records = site.fetch_results(query, page, self.plan, timeout=timeout)
+                        if response is None:
+                            if show_progress:
+                                spinner.stop(colored(f"✗ Skipped", "magenta"))
+                            elif verbose:
+                                print(colored(f"Skipping {site.name}: No valid search URL.", "magenta"))
+                            break
+                        site.report_outcome(response.status_code, cached=isinstance(response, CachedResponse))
                         if response.status_code == 200:
-                            results = site.parse_results(response.content, query)
+                            results = records
+                            if records is None:
+                                results = site.parse_page(response.content, query, resolve=self.eager_magnets)
                             if results:
-                                all_results.extend(results)
                                 if show_progress:
                                     spinner.stop(colored(f"✓ {len(results)} results", "green"))
                                 elif verbose:
                                     print(colored(f"Found {len(results)} results from {site.name} (page {page + 1})", "green"))
+                                found += len(results)
+                                yield from results
+                                if self.plan is not None and self.plan.exhausted(site, results):
+                                    if verbose:
+                                        print(colored(f"{site.name} is below --min-seeds after page {page + 1}, not paging further", "magenta"))
+                                    break
                             else:
                                 if show_progress:
                                     spinner.stop(colored(f"- No results", "magenta"))
@@ -1197,13 +2814,15 @@ class TorrentSearcher:
                             elif verbose:
                                 print(colored(f"{site.name} returned status code {response.status_code}. Skipping site.", "red"))
                             break
-                    except requests.exceptions.Timeout:
+                    except requests.exceptions.Timeout as e:
+                        site.report_outcome(error=e)
                         if show_progress:
                             spinner.stop(colored(f"✗ Timeout", "red"))
                         elif verbose:
                             print(colored(f"Timeout while searching {site.name} (page {page + 1})", "red"))
                         break
                     except requests.exceptions.RequestException as e:
+                        site.report_outcome(error=e)
                         if show_progress:
                             spinner.stop(colored(f"✗ ConnErr", "red"))
                         elif verbose:
@@ -1220,45 +2839,57 @@ class TorrentSearcher:
                     spinner.stop(colored(f"✗ Error", "red"))
                 elif verbose:
                     print(colored(f"Error searching {site.name}: {e}", "red"))
-        if not all_results:
+        if not found:
             print(colored("\nNo results found from any site. Try a different search term.", "red"))
-        return all_results
     
     def search_latest_sites(self, page_limit=1, show_progress=False, verbose=False):
-        all_results = []
+        return list(self.iter_search_latest_sites(page_limit, show_progress, verbose))
+
+    def iter_search_latest_sites(self, page_limit=1, show_progress=False, verbose=False):
+        """Fetch the latest torrents site by site, yielding each page's results as it is parsed"""
         for site in self.working_sites:
             spinner = Spinner(f"Fetching {site.name}") if show_progress else None
             if show_progress:
                 spinner.start()
             elif verbose:
                 print(colored(f"\nFetching latest torrents from {site.name}...", "yellow"))
+            if not site.is_available():
+                if show_progress:
+                    spinner.stop(colored(f"✗ Circuit open", "magenta"))
+                elif verbose:
+                    print(colored(f"Skipping {site.name}: circuit open, retry in {site.breaker.retry_in():.0f}s", "magenta"))
+                continue
+            probe_deadline = self.probe_deadline(site)
+            if (probe_deadline is not None and probe_deadline <= 0) or not site.ensure_working_url(probe_deadline):
+                if show_progress:
+                    spinner.stop(colored(f"✗ Not accessible", "red"))
+                elif verbose:
+                    print(colored(f"{site.name} is not accessible. Skipping site.", "red"))
+                continue
             try:
                 for page in range(page_limit):
-                    latest_url = None
-                    try:
-                        latest_url = site.build_latest_url(page)
-                    except Exception as e:
-                        if show_progress:
-                            spinner.stop(colored(f"✗ Error", "red"))
-                        elif verbose:
-                            print(colored(f"Error building latest URL for {site.name}: {e}", "red"))
-                        continue
-                    if not latest_url or not isinstance(latest_url, str) or not latest_url.startswith("http"):
-                        if show_progress:
-                            spinner.stop(colored(f"✗ Skipped", "magenta"))
-                        elif verbose:
-                            print(colored(f"Skipping {site.name}: No valid latest URL.", "magenta"))
+                    timeout = self.request_timeout()
+                    if timeout <= 0:
                         break
                     try:
-                        response = requests.get(latest_url, timeout=15)
+                        response, records = site.fetch_results("", page, timeout=timeout, latest=True)
+                        if response is None:
+                            if show_progress:
+                                spinner.stop(colored(f"✗ Skipped", "magenta"))
+                            elif verbose:
+                                print(colored(f"Skipping {site.name}: No valid latest URL.", "magenta"))
+                            break
+                        site.report_outcome(response.status_code, cached=isinstance(response, CachedResponse))
                         if response.status_code == 200:
-                            results = site.parse_results(response.content, "")
+                            results = records
+                            if records is None:
+                                results = site.parse_page(response.content, "", resolve=self.eager_magnets)
                             if results:
-                                all_results.extend(results)
                                 if show_progress:
                                     spinner.stop(colored(f"✓ {len(results)} results", "green"))
                                 elif verbose:
                                     print(colored(f"Found {len(results)} latest torrents from {site.name} (page {page + 1})", "green"))
+                                yield from results
                             else:
                                 if show_progress:
                                     spinner.stop(colored(f"- No results", "magenta"))
@@ -1272,6 +2903,8 @@ class TorrentSearcher:
                                 print(colored(f"{site.name} returned status code {response.status_code}", "red"))
                             break
                     except Exception as e:
+                        if isinstance(e, requests.exceptions.RequestException):
+                            site.report_outcome(error=e)
                         if show_progress:
                             spinner.stop(colored(f"✗ Error", "red"))
                         elif verbose:
@@ -1282,40 +2915,907 @@ class TorrentSearcher:
                     spinner.stop(colored(f"✗ Error", "red"))
                 elif verbose:
                     print(colored(f"Error fetching latest from {site.name}: {e}", "red"))
-        return all_results
+
+    def search_site_pages(self, site, query, page_limit=1, stop=None):
+        """Fetch and parse every page of one site, stopping at the first failed page
+
+        Once stop is set no further page is fetched, and every request and mirror
+        probe is bounded by what is left of the search deadline.
+        """
+        results = []
+        probe_deadline = self.probe_deadline(site)
+        if probe_deadline is not None and probe_deadline <= 0:
+            return results
+        if not site.is_available() or not site.ensure_working_url(probe_deadline):
+            return results
+        try:
+            for page in range(page_limit):
+                if stop is not None and stop.is_set():
+                    break
+                timeout = self.request_timeout()
+                if timeout <= 0:
+                    break
+                try:
+                    response, page_results = site.fetch_results(query, page, self.plan, timeout=timeout)
+                except requests.exceptions.RequestException as e:
+                    site.report_outcome(error=e)
+                    break
+                if response is None:
+                    break
+                site.report_outcome(response.status_code, cached=isinstance(response, CachedResponse))
+                if response.status_code == 200:
+                    if page_results is None:
+                        page_results = site.parse_page(response.content, query, resolve=self.eager_magnets)
+                    results += page_results
+                    if not page_results or (self.plan is not None and self.plan.exhausted(site, page_results)):
+                        break
+                else:
+                    break
+        except Exception as e:
+            pass
+        return results
+
+    def iter_search_parallel(self, query, page_limit=1, verbose=False):
+        """Search all working sites at once, yielding each site's results in completion order
+
+        Sites are searched on daemon threads: once the consumer has what it needs
+        (--limit) or the deadline passes, workers stop before their next page, and
+        a request still in flight neither delays the results nor holds up the exit.
+        """
+        finished = queue.Queue()
+        stop = threading.Event()
+
+        def search_site(site):
+            results = []
+            try:
+                results = self.search_site_pages(site, query, page_limit, stop)
+            finally:
+                finished.put((site, results))
+
+        for site in self.working_sites:
+            threading.Thread(target=search_site, args=(site,), name=f"search-{site.name}", daemon=True).start()
+        found = 0
+        try:
+            for _ in self.working_sites:
+                try:
+                    site, results = finished.get(timeout=self.budget.remaining() if self.budget else None)
+                except queue.Empty:
+                    if verbose:
+                        print(colored("Deadline reached, not waiting for the remaining sites", "magenta"))
+                    break
+                if verbose:
+                    print(colored(f"Found {len(results)} results from {site.name}", "green" if results else "magenta"))
+                found += len(results)
+                yield from results
+        finally:
+            stop.set()
+        if not found:
+            print(colored("\nNo results found from any site. Try a different search term.", "red"))
     
+    def resolve_magnets(self, results):
+        """Fetch the magnets that were deferred while searching, all in one batch"""
+        sites = {site.name: site for site in self.sites}
+        pairs = [(sites[r.site], r) for r in results if r.site in sites]
+        if self.engine is not None:
+            self.engine.resolve_rows(pairs)
+        else:
+            get_magnet_resolver().resolve_rows(pairs)
+        return results
+
+    def stream_magnets(self, results, dedupe=True):
+        """Print magnet links as the rows stream in, returns the number printed
+
+        Rows that already carry a magnet are printed at once, the others as their
+        detail pages resolve. With dedupe a torrent is printed only once.
+        """
+        sites = {site.name: site for site in self.sites}
+        resolver = get_magnet_resolver()
+        pending = []
+        printed = set()
+        count = 0
+
+        def emit(magnet):
+            infohash = magnet_infohash(magnet) if dedupe else None
+            if infohash is not None:
+                if infohash in printed:
+                    return 0
+                printed.add(infohash)
+            print(magnet)
+            return 1
+
+        for result in results:
+            if not result.magnet and result.detail_url and result.site in sites:
+                pending.append(resolver.submit(sites[result.site], result))
+            elif result.magnet:
+                count += emit(result.magnet)
+        for future in as_completed(pending):
+            result = future.result()
+            if result.magnet:
+                count += emit(result.magnet)
+        return count
+
+    def get_magnet(self, result):
+        """Return the magnet of a single result, fetching its detail page if needed"""
+        if not result.magnet:
+            self.resolve_magnets([result])
+        return result.magnet
+
     def format_results(self, results):
         """Format results for display with truncation for neat columns"""
         formatted_results = []
         for i, result in enumerate(results, 1):
             formatted_results.append([
                 i,
-                truncate(result["site"], 14),
-                truncate(result["name"], 40),
-                truncate(result["size"], 12),
-                truncate(result["seeds"], 8),
-                truncate(result["leeches"], 8),
-                truncate(result["date"], 16),
+                truncate(result.source(), 14),
+                truncate(result.name, 40),
+                truncate(result.size, 12),
+                truncate("-" if result.seeds is None else result.seeds, 8),
+                truncate("-" if result.leeches is None else result.leeches, 8),
+                truncate(result.date, 16),
             ])
         return formatted_results
 
+RESULT_FIELDS = ["name", "size", "seeds", "leeches", "date", "magnet", "site"]
+
+class TorrentResult:
+    """One search result, normalized once when its page is parsed
+
+    size and date keep the site's text for display; size_bytes, seeds, leeches
+    and timestamp are parsed from it (None when the site does not say).
+    """
+    __slots__ = ("name", "site", "sites", "size", "size_bytes", "seeds", "leeches", "date", "timestamp",
+                 "magnet", "detail_url", "infohash", "seeds_text", "leeches_text")
+
+    def __init__(self, name, site, size="-", seeds=None, leeches=None, date="-", magnet=None, detail_url=None):
+        self.name = name
+        self.site = site
+        self.sites = None
+        self.size = size or "-"
+        self.size_bytes = int(parse_size(self.size)) or None if self.size != "-" else None
+        self.seeds = seeds
+        self.leeches = leeches
+        # The counts as the site wrote them, which exports keep
+        self.seeds_text = seeds
+        self.leeches_text = leeches
+        self.date = date or "-"
+        self.timestamp = parse_date(self.date)
+        self.detail_url = detail_url
+        self.set_magnet(magnet)
+
+    def set_magnet(self, magnet):
+        """Set the magnet link, and the infohash duplicates are merged by"""
+        self.magnet = magnet
+        self.infohash = magnet_infohash(magnet)
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a record from the dict a parse_results() row is written as"""
+        result = cls(
+            row.get("name") or "-",
+            row.get("site"),
+            size=str(row.get("size") or "-").strip(),
+            seeds=parse_count(row.get("seeds")),
+            leeches=parse_count(row.get("leeches")),
+            date=str(row.get("date") or "-").strip(),
+            magnet=row.get("magnet") or None,
+            detail_url=row.get("detail_url")
+        )
+        result.seeds_text = row.get("seeds")
+        result.leeches_text = row.get("leeches")
+        return result
+
+    def as_tuple(self):
+        """The fields in __slots__ order, a compact form to send between processes"""
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    @classmethod
+    def from_tuple(cls, values):
+        result = cls.__new__(cls)
+        for field, value in zip(cls.__slots__, values):
+            setattr(result, field, value)
+        return result
+
+    def as_dict(self):
+        """Every field by name, the form the daemon answers queries in"""
+        return dict(zip(self.__slots__, self.as_tuple()))
+
+    @classmethod
+    def from_dict(cls, fields):
+        return cls.from_tuple([fields.get(field) for field in cls.__slots__])
+
+    def to_dict(self):
+        """The result in the CSV/JSON export schema"""
+        return {
+            "name": self.name,
+            "size": self.size,
+            "seeds": self.seeds_text,
+            "leeches": self.leeches_text,
+            "date": self.date,
+            "magnet": self.magnet,
+            "site": self.source()
+        }
+
+    def source(self):
+        """The site the result came from, or every site of a merged result"""
+        return ", ".join(self.sites) if self.sites and len(self.sites) > 1 else self.site
+
+    def __repr__(self):
+        return f"TorrentResult({self.name!r}, {self.site!r}, seeds={self.seeds}, size={self.size!r})"
+
+def export_row(result):
+    """Return a result with only the fields written to CSV/JSON exports"""
+    return result.to_dict()
+
+def best_count(a, b):
+    """The larger of two seed/leech counts, where None (unknown) loses"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return max(a, b)
+
+class ResultFilter:
+    """Every result constraint from the command line, compiled into one predicate
+
+    Numeric bounds are checked against the fields TorrentResult parsed once, so a
+    row is tested in a single pass no matter how many constraints are set. A row
+    whose field is unknown fails any bound on that field.
+    """
+    def __init__(self, min_size=None, max_size=None, min_seeds=None, max_seeds=None,
+                 min_leeches=None, max_leeches=None, max_age=None, patterns=(), excludes=()):
+        now = time.time()
+        self.bounds = [
+            (field, low, high) for field, low, high in (
+                ("size_bytes", min_size, max_size),
+                ("seeds", min_seeds, max_seeds),
+                ("leeches", min_leeches, max_leeches),
+                ("timestamp", None if max_age is None else now - max_age, None)
+            ) if low is not None or high is not None
+        ]
+        self.patterns = [re.compile(p, re.IGNORECASE) for p in patterns]
+        self.exclude = re.compile("|".join(f"(?:{p})" for p in excludes), re.IGNORECASE) if excludes else None
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(
+            min_size=parse_size(args.min_size) if args.min_size is not None else None,
+            max_size=parse_size(args.max_size) if args.max_size is not None else None,
+            min_seeds=args.min_seeds,
+            max_seeds=args.max_seeds,
+            min_leeches=args.min_leeches,
+            max_leeches=args.max_leeches,
+            max_age=args.max_age,
+            patterns=args.regex or (),
+            excludes=args.exclude or ()
+        )
+
+    def __bool__(self):
+        return bool(self.bounds or self.patterns or self.exclude)
+
+    def bounds_merged_fields(self, upper_only=False):
+        """True if a bound checks a field merge_duplicates() can still change
+
+        Merging only raises counts and fills in unknown sizes, so with upper_only=True
+        just the upper bounds, which a merged record can stop passing, are considered.
+        """
+        return any(field in ("size_bytes", "seeds", "leeches") and (high is not None or not upper_only)
+                   for field, _, high in self.bounds)
+
+    def compile(self):
+        """Return a predicate testing a TorrentResult against every constraint"""
+        bounds = [(operator.attrgetter(field), -math.inf if low is None else low, math.inf if high is None else high)
+                  for field, low, high in self.bounds]
+        searches = [pattern.search for pattern in self.patterns]
+        exclude = self.exclude.search if self.exclude is not None else None
+
+        def predicate(result):
+            for get, low, high in bounds:
+                value = get(result)
+                if value is None or not low <= value <= high:
+                    return False
+            name = result.name
+            for search in searches:
+                if not search(name):
+                    return False
+            return exclude is None or not exclude(name)
+        return predicate
+
+    def apply(self, results):
+        """Lazily keep the results matching every constraint"""
+        if not self:
+            return results
+        keep = self.compile()
+        if _profiler is not None:
+            keep = _profiler.wrap("filter", keep)
+        return filter(keep, results)
+
+    def apply_merged(self, results, reemit=False):
+        """Lazily keep the records of merge_duplicates(results, reemit=True) matching every constraint
+
+        A record that fails a lower bound is checked again each time a copy merges
+        into it, and yielded once it passes; one that passed keeps passing. Each
+        record is yielded once, or again after every merge with reemit=True.
+        """
+        keep = self.compile()
+        if _profiler is not None:
+            keep = _profiler.wrap("filter", keep)
+        emitted = set()
+        for result in results:
+            if not keep(result):
+                continue
+            if result.infohash is None or reemit:
+                yield result
+            elif result not in emitted:
+                emitted.add(result)
+                yield result
+
+SORT_KEYS = ["seeds", "size", "date", "ratio", "relevance"]
+
+def query_tokens(text):
+    """Lowercase word tokens of a query or torrent name"""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def sort_key(sort, query=None):
+    """Return a key function ranking TorrentResult records best-first by descending value
+
+    Unknown values rank last.
+    """
+    if sort == "seeds":
+        return lambda r: -1 if r.seeds is None else r.seeds
+    if sort == "size":
+        return lambda r: -1 if r.size_bytes is None else r.size_bytes
+    if sort == "date":
+        return lambda r: -1 if r.timestamp is None else r.timestamp
+    if sort == "ratio":
+        return lambda r: -1 if r.seeds is None else r.seeds / max(r.leeches or 0, 1)
+    if sort == "relevance":
+        scorer = RelevanceScorer(query or "")
+        return lambda r: scorer.score(r.name, query_tokens(r.name))
+    raise ValueError(f"Unknown sort key: {sort}")
+
+RELEASE_TAGS = [
+    {"2160p", "4k", "uhd", "1080p", "1080i", "720p", "576p", "480p"},
+    {"x264", "x265", "h264", "h265", "hevc", "avc", "av1", "xvid", "10bit"},
+    {"bluray", "bdrip", "brrip", "remux", "webrip", "webdl", "web", "hdtv", "dvdrip", "hdrip"}
+]
+RELEASE_GROUP_RE = re.compile(r"-[A-Za-z0-9]{2,}$|^\[[^\]]+\]")
+
+class RelevanceScorer:
+    """Scores torrent names against one query, tokenized once
+
+    The score adds up term overlap (weighted by inverse document frequency when
+    an index supplies it), proximity of the query terms in the name (1 for the
+    exact phrase) and a small boost for well-tagged releases: resolution, codec,
+    source and release group.
+    """
+    def __init__(self, query):
+        self.terms = query_tokens(query)
+        self.wanted = set(self.terms)
+
+    def overlap(self, present, idf=None):
+        if idf is None:
+            return len(present) / len(self.wanted)
+        return sum(idf(term) for term in present) / sum(idf(term) for term in self.wanted)
+
+    def proximity(self, tokens, present):
+        """1 for the query phrase in order, else present terms over the shortest span holding them all"""
+        n = len(self.terms)
+        if any(tokens[i:i + n] == self.terms for i in range(len(tokens) - n + 1)):
+            return 1.0
+        if len(present) < 2:
+            return 0.0
+        hits = [(i, token) for i, token in enumerate(tokens) if token in present]
+        counts = {}
+        best = len(tokens)
+        start = 0
+        for end, (position, token) in enumerate(hits):
+            counts[token] = counts.get(token, 0) + 1
+            while len(counts) == len(present):
+                best = min(best, position - hits[start][0] + 1)
+                first = hits[start][1]
+                counts[first] -= 1
+                if not counts[first]:
+                    del counts[first]
+                start += 1
+        return len(present) / best * 0.5
+
+    def tag_boost(self, name, tokens):
+        found = set(tokens)
+        tags = sum(1 for group in RELEASE_TAGS if group & found)
+        if RELEASE_GROUP_RE.search(name.strip()):
+            tags += 1
+        return 0.05 * tags
+
+    def score(self, name, tokens, idf=None):
+        if not self.wanted:
+            return self.tag_boost(name, tokens)
+        present = self.wanted.intersection(tokens)
+        if not present:
+            return self.tag_boost(name, tokens)
+        return self.overlap(present, idf) + 0.5 * self.proximity(tokens, present) + self.tag_boost(name, tokens)
+
+class TokenIndex:
+    """Inverted index from name tokens to the results holding them
+
+    Names are tokenized once when rows are added. --match intersects posting
+    lists, smallest first, and relevance ranking only scores the rows sharing a
+    token with the query; document frequencies weight rare terms higher.
+    """
+    def __init__(self, results=()):
+        self.results = []
+        self.tokens = []
+        self.postings = {}
+        self.positions = {}
+        for result in results:
+            self.add(result)
+
+    def add(self, result):
+        # A merged duplicate pushed again is already indexed
+        if id(result) in self.positions:
+            return
+        position = len(self.results)
+        self.positions[id(result)] = position
+        tokens = query_tokens(result.name)
+        self.results.append(result)
+        self.tokens.append(tokens)
+        for token in set(tokens):
+            self.postings.setdefault(token, set()).add(position)
+
+    def idf(self, term):
+        return math.log(1 + len(self.results) / (1 + len(self.postings.get(term, ()))))
+
+    def matching_positions(self, terms):
+        postings = sorted((self.postings.get(term, set()) for term in set(terms)), key=len)
+        if not postings:
+            return list(range(len(self.results)))
+        found = set(postings[0])
+        for posting in postings[1:]:
+            found &= posting
+        return sorted(found)
+
+    def matching(self, terms):
+        """The rows whose names contain every term, in arrival order"""
+        return [self.results[i] for i in self.matching_positions(terms)]
+
+    def rank(self, scorer, limit=None, required=None):
+        """Rows best-first by relevance, optionally only those containing every required term"""
+        positions = self.matching_positions(required) if required else range(len(self.results))
+        candidates = set()
+        for term in scorer.wanted:
+            candidates |= self.postings.get(term, set())
+        scored = []
+        for i in positions:
+            tokens = self.tokens[i]
+            if i in candidates:
+                score = scorer.score(self.results[i].name, tokens, self.idf)
+            else:
+                score = scorer.tag_boost(self.results[i].name, tokens)
+            # Negated positions make ties keep arrival order
+            scored.append((score, -i))
+        best = heapq.nlargest(limit, scored) if limit else sorted(scored, reverse=True)
+        return [self.results[-negated] for score, negated in best]
+
+class TopK:
+    """The best k results of a stream, kept in a bounded min-heap
+
+    Memory stays O(k) whatever the number of rows pushed. Ties keep the row that
+    arrived first. A row pushed again (a merged duplicate whose counts changed)
+    is re-ranked in place. With k=None every row is kept and sorted at the end.
+    """
+    def __init__(self, k, key):
+        self.k = k
+        self.key = key
+        self.heap = []
+        self.members = {}
+        self.counter = itertools.count()
+
+    def push(self, result):
+        entry = self.members.get(id(result))
+        if entry is not None:
+            if self.k is not None:
+                entry[0] = self.key(result)
+                heapq.heapify(self.heap)
+            return
+        entry = [self.key(result) if self.k is not None else None, -next(self.counter), result]
+        if self.k is None:
+            self.heap.append(entry)
+        elif len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            del self.members[id(heapq.heapreplace(self.heap, entry)[2])]
+        else:
+            return
+        self.members[id(result)] = entry
+
+    def results(self):
+        """The kept rows, best first, ranked by their current values"""
+        entries = sorted(self.heap, key=lambda entry: (self.key(entry[2]), entry[1]), reverse=True)
+        return [entry[2] for entry in entries]
+
+def rank_results(results, sort, query=None, limit=None, match=None):
+    """Consume a result stream and return its best `limit` rows ordered by `sort`
+
+    Relevance needs term frequencies over the whole set, so it ranks through a
+    TokenIndex; the other keys go through the bounded TopK heap.
+    """
+    if sort == "relevance" or match:
+        index = TokenIndex(results)
+        if sort == "relevance":
+            return index.rank(RelevanceScorer(query or ""), limit, required=match)
+        results = index.matching(match)
+    top = TopK(limit, sort_key(sort, query))
+    for result in results:
+        top.push(result)
+    return top.results()
+
+def merge_duplicates(results, reemit=False):
+    """Collapse rows that share an infohash into one record, in one streaming pass
+
+    The first copy of a torrent is yielded as it arrives. Later copies are merged
+    into it in place: the record lists every source site in sites (site stays the
+    one it was parsed from) and keeps the best seed and leech counts. Rows without a known magnet pass through unchanged. With
+    reemit=True the merged record is yielded again after each merge, for
+    consumers such as TopK that rank rows by their counts.
+    """
+    seen = {}
+    for result in results:
+        infohash = result.infohash
+        if infohash is None:
+            yield result
+            continue
+        first = seen.get(infohash)
+        if first is None:
+            if result.sites is None:
+                result.sites = [result.site]
+            seen[infohash] = result
+            yield result
+            continue
+        for site in result.sites or [result.site]:
+            if site not in first.sites:
+                first.sites.append(site)
+        if best_count(first.seeds, result.seeds) != first.seeds:
+            first.seeds, first.seeds_text = result.seeds, result.seeds_text
+        if best_count(first.leeches, result.leeches) != first.leeches:
+            first.leeches, first.leeches_text = result.leeches, result.leeches_text
+        if first.size_bytes is None and result.size_bytes is not None:
+            first.size = result.size
+            first.size_bytes = result.size_bytes
+        if reemit:
+            yield first
+
+class AsyncSearchEngine:
+    """Run all search pages and magnet lookups on one asyncio event loop
+
+    Uses aiohttp when it is installed; otherwise each request runs on a thread
+    pool bounded by the same global limit.
+    """
+    def __init__(self, max_concurrency=64, per_host=6, timeout=15, verbose=False, budget=None, plan=None):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.verbose = verbose
+        self.budget = budget
+        self.plan = plan
+        self.executor = None
+
+    def within_budget(self, coro):
+        """Cancel a coroutine when the search deadline passes"""
+        if self.budget is None:
+            return coro
+        return asyncio.wait_for(coro, self.budget.remaining())
+
+    def host_limit(self, url):
+        host = urlparse(url).netloc
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self.host_limits[host]
+
+    async def fetch(self, session, site, url, cache_kind="search"):
+        """Return (status, content, served from cache) for a URL within the global and per-host limits"""
+        async with self.global_limit, self.host_limit(url):
+            if session is None:
+                loop = asyncio.get_running_loop()
+                response = await loop.run_in_executor(self.executor, partial(site.fetch, url, timeout=self.timeout,
+                                                                             cache_kind=cache_kind))
+                return response.status_code, response.content, isinstance(response, CachedResponse)
+            if _profiler is None:
+                return await self.fetch_session(session, url, cache_kind)
+            with _profiler.timer(cache_kind, site.name):
+                try:
+                    status, content, hit = await self.fetch_session(session, url, cache_kind)
+                except Exception:
+                    _profiler.count(site.name, requests=1)
+                    raise
+            if hit:
+                _profiler.count(site.name, cache_hits=1)
+            else:
+                _profiler.count(site.name, requests=1, bytes=len(content))
+            return status, content, hit
+
+    async def fetch_session(self, session, url, cache_kind):
+        """Return (status, content, served from cache) through the aiohttp session and the response cache
+
+        The cache is SQLite on disk, so it is read and written on the executor, off the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        client = get_http_client()
+        cache = client.cache
+        cached = await loop.run_in_executor(self.executor, cache.lookup, url) if cache is not None else None
+        headers = {}
+        if cached is not None:
+            if cached[1] and not client.refresh:
+                return cached[0].status_code, cached[0].content, True
+            headers = cached[2]
+        async with session.get(url, headers=headers) as response:
+            content = await response.read()
+            status, response_headers = response.status, response.headers
+        if status == 304 and cached is not None:
+            await loop.run_in_executor(self.executor, cache.touch, url)
+            return cached[0].status_code, cached[0].content, True
+        if status == 200 and cache is not None:
+            await loop.run_in_executor(self.executor, cache.store, url, cache_kind, status, content, response_headers)
+        return status, content, False
+
+    async def search_site(self, session, site, query, page_limit, latest, resolve):
+        loop = asyncio.get_running_loop()
+        probe_deadline = None if self.budget is None else self.budget.timeout(site.probe_deadline)
+        if probe_deadline is not None and probe_deadline <= 0:
+            return []
+        if not site.is_available() or not await loop.run_in_executor(self.executor, site.ensure_working_url, probe_deadline):
+            return []
+        results = await self.search_api(session, site, None if latest else query, page_limit)
+        if results is None:
+            results = await self.search_html(session, site, query, page_limit, latest)
+        if resolve:
+            await self.resolve_pairs(session, [(site, result) for result in results])
+        if self.verbose:
+            print(colored(f"Found {len(results)} results from {site.name}", "green" if results else "magenta"))
+        return results
+
+    async def search_api(self, session, site, query, page_limit):
+        """Every page from the site's structured endpoint, None if it has none or it failed"""
+        loop = asyncio.get_running_loop()
+        if site.api_url(query, 0, self.plan) is None:
+            return None
+        if site.api_page_limit is not None:
+            page_limit = min(page_limit, site.api_page_limit)
+        urls = [site.api_url(query, page, self.plan) for page in range(page_limit)]
+        start = time.monotonic()
+        pages = await asyncio.gather(*(self.fetch(session, site, url) for url in urls), return_exceptions=True)
+        results = []
+        for page, outcome in enumerate(pages):
+            if isinstance(outcome, BaseException) or outcome[0] != 200:
+                error = outcome if isinstance(outcome, BaseException) else f"HTTP {outcome[0]}"
+                page_results = None
+            else:
+                try:
+                    page_results = await loop.run_in_executor(self.executor, site.parse_api_records, outcome[1], query)
+                except Exception as e:
+                    error = e
+                    page_results = None
+            if page_results is None and page == 0:
+                logging.error(f"{site.name} API unavailable, using HTML pages: {error}")
+                site.api_down = True
+                if _profiler is not None:
+                    _profiler.count(site.name, retries=1)
+                return None
+            if page == 0:
+                site.record_latency(time.monotonic() - start)
+                site.report_outcome(200, cached=outcome[2])
+            if not page_results:
+                break
+            results += page_results
+        return results
+
+    async def search_html(self, session, site, query, page_limit, latest):
+        loop = asyncio.get_running_loop()
+        urls = []
+        for page in range(page_limit):
+            try:
+                url = site.build_latest_url(page) if latest else site.search_url(query, page, self.plan)
+            except Exception:
+                break
+            if not url or not isinstance(url, str) or not url.startswith("http"):
+                break
+            urls.append(url)
+        # All pages are requested at once, then cut at the first page that fails or is empty.
+        # A site sorted by seeds under --min-seeds goes page by page so it can stop early.
+        sequential = not latest and self.plan is not None and self.plan.min_seeds is not None \
+            and self.plan.site_sort(site) == "seeds"
+        start = time.monotonic()
+        fetches = [self.fetch(session, site, url) for url in (urls[:1] if sequential else urls)]
+        pages = await asyncio.gather(*fetches, return_exceptions=True)
+        if pages and not isinstance(pages[0], BaseException) and pages[0][0] == 200:
+            site.record_latency(time.monotonic() - start)
+        if pages:
+            if isinstance(pages[0], BaseException):
+                site.report_outcome(error=pages[0])
+            else:
+                site.report_outcome(pages[0][0], cached=pages[0][2])
+        results = []
+        page = 0
+        while page < len(pages):
+            outcome = pages[page]
+            if isinstance(outcome, BaseException) or outcome[0] != 200:
+                break
+            page_results = await loop.run_in_executor(self.executor, site.parse_records, outcome[1], query or "")
+            if not page_results:
+                break
+            results += page_results
+            page += 1
+            if sequential:
+                if self.plan.exhausted(site, page_results) or page >= len(urls):
+                    break
+                try:
+                    pages.append(await self.fetch(session, site, urls[page]))
+                except Exception as e:
+                    pages.append(e)
+        return results
+
+    async def resolve_pairs(self, session, pairs):
+        loop = asyncio.get_running_loop()
+
+        async def resolve_one(site, result):
+            try:
+                status, content, _ = await self.fetch(session, site, result.detail_url, cache_kind="detail")
+                if status == 200:
+                    result.set_magnet(await loop.run_in_executor(self.executor, site.extract_magnet, content))
+                    if result.magnet and site.magnet_cache is not None:
+                        site.magnet_cache.put(result.detail_url, result.magnet)
+            except Exception as e:
+                print(colored(f"Error getting magnet link from {site.name}: {e}", "red"))
+
+        for site, result in pairs:
+            site.fill_cached_magnets([result])
+        await asyncio.gather(*(resolve_one(site, result) for site, result in pairs
+                               if not result.magnet and result.detail_url))
+
+    async def run(self, job):
+        self.global_limit = asyncio.Semaphore(self.max_concurrency)
+        self.host_limits = {}
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        aiohttp = import_optional("aiohttp")
+        if aiohttp is None:
+            return await job(None)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_host)
+        # aiohttp reads total <= 0 as no timeout at all: once the search deadline is
+        # spent, the magnets resolved afterwards get the plain request timeout
+        total = self.timeout
+        if self.budget is not None and not self.budget.expired():
+            total = max(self.budget.timeout(self.timeout), 0.1)
+        timeout = aiohttp.ClientTimeout(total=total)
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            return await job(session)
+
+    def search(self, sites, query, page_limit=1, latest=False, resolve=False):
+        """Search all sites concurrently and return the combined results in site order"""
+        async def job(session):
+            per_site = await asyncio.gather(*(self.within_budget(self.search_site(session, site, query, page_limit, latest, resolve))
+                                              for site in sites), return_exceptions=True)
+            return [r for results in per_site if not isinstance(results, BaseException) for r in results]
+        return asyncio.run(self.run(job))
+
+    def iter_search(self, sites, query, page_limit=1, latest=False, resolve=False):
+        """Search all sites concurrently, yielding each site's results as soon as it finishes
+
+        The event loop runs on a background thread and hands finished sites over a queue.
+        """
+        done = object()
+        batches = queue.Queue()
+
+        async def job(session):
+            tasks = [self.within_budget(self.search_site(session, site, query, page_limit, latest, resolve)) for site in sites]
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    batches.put(await next_done)
+                except Exception:
+                    continue
+
+        def run_loop():
+            try:
+                asyncio.run(self.run(job))
+            finally:
+                batches.put(done)
+
+        threading.Thread(target=run_loop, daemon=True).start()
+        while True:
+            batch = batches.get()
+            if batch is done:
+                break
+            yield from batch
+
+    def resolve_rows(self, pairs):
+        """Resolve the magnets of (site, row) pairs on the event loop"""
+        async def job(session):
+            await self.resolve_pairs(session, pairs)
+        asyncio.run(self.run(job))
+
+def print_http_stats(verbose):
+    if verbose:
+        stats = get_http_client().stats()
+        print(colored(f"\nHTTP: {stats['requests']} requests over {stats['connections']} connections "
+                      f"to {stats['hosts']} hosts ({stats['reused']} reused, {stats['coalesced']} coalesced)", "cyan"))
+
+def print_profile(profiler, output="table"):
+    """Print the --profile report to stderr, keeping stdout for results"""
+    if output == "json":
+        print(json.dumps(profiler.report()), file=sys.stderr)
+    else:
+        print("\n" + profiler.table(), file=sys.stderr)
+
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+SIZE_RE = re.compile(r"([\d.,]+)\s*([KMGT]?)(?:I?B)?")
+THOUSANDS_RE = re.compile(r",(?=\d{3}(?!\d))")
+
 def parse_size(size_str):
-    # Convert size string like '1.2 GB' to bytes
+    # Convert size string like '1.2 GB', '700 MiB' or '2T' to bytes
     try:
-        size_str = size_str.strip().upper()
-        if size_str.endswith('GB'):
-            return float(size_str.replace('GB','').strip()) * 1024**3
-        elif size_str.endswith('MB'):
-            return float(size_str.replace('MB','').strip()) * 1024**2
-        elif size_str.endswith('KB'):
-            return float(size_str.replace('KB','').strip()) * 1024
-        elif size_str.endswith('B'):
-            return float(size_str.replace('B','').strip())
-        else:
-            return float(size_str)
+        match = SIZE_RE.fullmatch(size_str.strip().upper())
+        # '1,024.5 MB' has a thousands separator, '1,5 GB' a decimal comma
+        number = THOUSANDS_RE.sub("", match.group(1)).replace(",", ".")
+        return float(number) * SIZE_UNITS[match.group(2)]
     except:
         return 0
 
+def parse_count(value):
+    # Convert a seed/leech count like '1,024' to an int, None if the site gave none
+    try:
+        return int(str(value).strip().replace(",", ""))
+    except (TypeError, ValueError):
+        return None
+
+MONTHS = {name: number for number, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1)}
+TIME_UNITS = {"sec": 1, "min": 60, "hour": 3600, "day": 86400, "week": 604800, "month": 2592000, "year": 31536000}
+RELATIVE_DATE_RE = re.compile(r"(\d+|an?|one)\s*(sec|min|hour|day|week|month|year)s?\.?\s+ago")
+ISO_DATE_RE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+TPB_DATE_RE = re.compile(r"(\d{2})-(\d{2})(?:\s+(\d{4}))?")
+MONTH_DATE_RE = re.compile(r"([a-z]{3})[a-z]*\.?\s+(\d{1,2})(?:st|nd|rd|th)?,?\s*(?:'(\d{2})|(\d{4}))?")
+DAY_MONTH_DATE_RE = re.compile(r"(\d{1,2})\s+([a-z]{3})[a-z]*\.?,?\s+(\d{4})")
+CLOCK_RE = re.compile(r"\d{1,2}(:\d{2})?\s*(am|pm)?")
+
+def parse_date(date_str, now=None):
+    # Best-effort conversion of a site's date text to a Unix timestamp, None if unknown
+    if not date_str:
+        return None
+    now = time.time() if now is None else now
+    value = str(date_str).strip().lower().replace("\xa0", " ")
+    if value in ("", "-"):
+        return None
+
+    def local(year, month, day):
+        try:
+            return time.mktime((int(year), int(month), int(day), 0, 0, 0, 0, 0, -1))
+        except (OverflowError, ValueError):
+            return None
+
+    match = RELATIVE_DATE_RE.search(value)
+    if match:
+        count = int(match.group(1)) if match.group(1).isdigit() else 1
+        return now - count * TIME_UNITS[match.group(2)]
+    if value.startswith(("today", "now", "just")) or CLOCK_RE.fullmatch(value):
+        return now
+    if value.startswith(("yesterday", "y-day")):
+        return now - 86400
+    match = ISO_DATE_RE.search(value)
+    if match:
+        return local(*match.groups())
+    match = DAY_MONTH_DATE_RE.search(value)
+    if match and match.group(2) in MONTHS:
+        return local(match.group(3), MONTHS[match.group(2)], match.group(1))
+    match = MONTH_DATE_RE.search(value)
+    if match and match.group(1) in MONTHS:
+        year = match.group(4) or (f"20{match.group(3)}" if match.group(3) else time.localtime(now).tm_year)
+        return local(year, MONTHS[match.group(1)], match.group(2))
+    match = TPB_DATE_RE.match(value)
+    if match:
+        return local(match.group(3) or time.localtime(now).tm_year, match.group(1), match.group(2))
+    if re.fullmatch(r"\d{4}", value):
+        return local(value, 1, 1)
+    return None
+
 def truncate(text, maxlen):
     text = str(text)
     return text if len(text) <= maxlen else text[:maxlen-3] + '...'
@@ -1342,8 +3842,314 @@ class Spinner:
 
 # Update main() to add new arguments and logic
 
-def main():
+# Options that only change how the CLI shows results or sets up its process;
+# a daemon ignores them, so they do not split otherwise identical queries
+DAEMON_IGNORED_OPTIONS = {"export_csv", "export_json", "magnets_only", "quiet", "progress", "verbose", "profile",
+                          "no_server", "probe_deadline", "mirror_ttl", "pool_size", "pool_hosts", "parse_workers",
+                          "magnet_workers", "magnet_per_host", "no_cache", "refresh", "cache_size",
+                          "ignore_breakers", "reprobe"}
+
+class QueryOptionsParser(argparse.ArgumentParser):
+    """Raises ValueError for invalid options instead of exiting, for daemon queries"""
+    def error(self, message):
+        raise ValueError(message)
+
+def default_socket_path():
+    return os.path.join(get_cache_dir(), "torrtux.sock")
+
+def parse_daemon_address(text):
+    """("unix", path) or ("tcp", host, port) from 'unix:PATH', a socket path or 'HOST:PORT'"""
+    if text.startswith("unix:"):
+        return ("unix", text[len("unix:"):])
+    if text.startswith("/"):
+        return ("unix", text)
+    host, _, port = text.split("://")[-1].rstrip("/").rpartition(":")
+    return ("tcp", host or "127.0.0.1", int(port))
+
+def query_argv(params):
+    """Command line arguments of a JSON query: {"query": ..., "sort": "seeds", "parallel": true, ...}"""
+    if "argv" in params:
+        return [str(arg) for arg in params["argv"]]
+    argv = [str(params["query"])] if params.get("query") else []
+    for name, value in params.items():
+        if name in ("query", "resolve") or value is None or value is False:
+            continue
+        flag = "--" + name.replace("_", "-")
+        if value is True:
+            argv.append(flag)
+        else:
+            for item in value if isinstance(value, list) else [value]:
+                argv += [flag, str(item)]
+    return argv
+
+def query_filter(args):
+    """Check the query options, returns their ResultFilter; raises ValueError when they are invalid"""
+    if not args.search and not args.latest:
+        raise ValueError("A search query or --latest is required")
+    if args.pages <= 0 or args.pages > 10:
+        raise ValueError("Page limit must be between 1 and 10")
+    try:
+        return ResultFilter.from_args(args)
+    except re.error as e:
+        raise ValueError(f"Invalid --regex/--exclude pattern: {e}")
+
+class SearchDaemon:
+    """Answers queries with warm sites, connection pools and caches, for `torrtux serve`
+
+    Identical queries that arrive while one is running are coalesced: they wait
+    for it and share its results instead of searching again.
+    """
+    def __init__(self, options):
+        configure_runtime(options)
+        self.searcher = TorrentSearcher()
+        self.mirror_cache = MirrorHealthCache(ttl=options.mirror_ttl)
+        self.breakers = CircuitBreakerStore()
+        if not options.ignore_breakers:
+            self.searcher.load_breakers(self.breakers)
+        if not self.searcher.load_mirror_cache(self.mirror_cache, options.probe_deadline, options.reprobe):
+            if not self.searcher.test_sites(options.probe_deadline):
+                raise RuntimeError("No working torrent sites available")
+        self.probe_deadline = options.probe_deadline
+        self.flights = SingleFlight()
+        self.started = time.time()
+        self.queries = 0
+        self.lock = threading.Lock()
+
+    def search(self, params, latest=False):
+        """Results of a query, as TorrentResult.as_dict() rows"""
+        argv = query_argv(params)
+        if latest and "--latest" not in argv:
+            argv.append("--latest")
+        try:
+            args = build_parser(QueryOptionsParser).parse_args(argv)
+        except SystemExit:
+            # --help and --version print and exit
+            raise ValueError("Unsupported option")
+        result_filter = query_filter(args)
+        resolve = bool(params.get("resolve"))
+        key = json.dumps([sorted((name, value) for name, value in vars(args).items()
+                                 if name not in DAEMON_IGNORED_OPTIONS), resolve], default=str)
+        with self.lock:
+            self.queries += 1
+        return self.flights.do(key, self.run, args, result_filter, resolve)
+
+    def run(self, args, result_filter, resolve):
+        args.progress = args.verbose = False
+        # Mirrors age and die while the daemon runs; concurrent queries share one probe
+        self.flights.do("refresh-mirrors", self.searcher.refresh_mirrors, self.probe_deadline)
+        searcher = self.searcher.fork(args.sites.split(",") if args.sites else None)
+        searcher.eager_magnets = args.eager_magnets
+        results = list(search_results(searcher, args, result_filter))
+        if resolve:
+            results = resolve_results(searcher, results, args, result_filter)
+        self.mirror_cache.save()
+        self.breakers.save()
+        return [result.as_dict() for result in results]
+
+    def magnet(self, params):
+        """The magnet link of one result's detail page"""
+        site = next((site for site in self.searcher.sites if site.name == params.get("site")), None)
+        if site is None or not params.get("detail_url"):
+            raise ValueError("site and detail_url are required")
+        return self.flights.do(("magnet", params["detail_url"]), site.get_magnet_link, params["detail_url"])
+
+    def health(self):
+        return {
+            "version": VERSION,
+            "uptime": round(time.time() - self.started, 1),
+            "working_sites": len(self.searcher.working_sites),
+            "queries": self.queries,
+            "coalesced": self.flights.shared,
+            "fetches_coalesced": get_http_client().flights.shared,
+        }
+
+    def handle(self, method, path, body):
+        """(status, JSON payload) for one API request"""
+        try:
+            if method == "GET" and path == "/health":
+                return 200, self.health()
+            if method != "POST" or path not in ("/search", "/latest", "/magnet"):
+                return 404, {"error": f"No such endpoint: {method} {path}"}
+            params = json.loads(body or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("The request body must be a JSON object")
+            if path == "/magnet":
+                return 200, {"magnet": self.magnet(params)}
+            return 200, {"results": self.search(params, latest=path == "/latest")}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            logging.error(f"Daemon request {method} {path} failed: {e}")
+            return 500, {"error": str(e)}
+
+def make_daemon_server(daemon, address):
+    """HTTP server answering the daemon's API on a Unix socket or a TCP port"""
+    import socketserver
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def answer(self, method):
+            length = int(self.headers.get("Content-Length") or 0)
+            status, payload = daemon.handle(method, self.path.split("?")[0], self.rfile.read(length))
+            content = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_GET(self):
+            self.answer("GET")
+
+        def do_POST(self):
+            self.answer("POST")
+
+        def log_message(self, format, *args):
+            # Unix socket clients have no address to log
+            pass
+
+    if address[0] == "tcp":
+        server = ThreadingHTTPServer(address[1:], Handler)
+    else:
+        class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        # Only the user running the daemon may query it: the socket is created
+        # with mode 0600 rather than restricted after it is already listening
+        umask = os.umask(0o177)
+        try:
+            server = UnixServer(address[1], Handler)
+        finally:
+            os.umask(umask)
+    return server
+
+class DaemonClient:
+    """Forwards queries to a running `torrtux serve`"""
+    def __init__(self, address, timeout=300):
+        self.address = address
+        self.timeout = timeout
+
+    @classmethod
+    def find(cls):
+        """Client of the daemon named by $TORRTUX_SERVER or on the default socket, None if there is none"""
+        address = os.environ.get("TORRTUX_SERVER")
+        if address:
+            try:
+                return cls(parse_daemon_address(address))
+            except ValueError:
+                logging.error(f"Invalid TORRTUX_SERVER address: {address}")
+                return None
+        path = default_socket_path()
+        if os.path.exists(path):
+            return cls(("unix", path))
+        return None
+
+    def connection(self):
+        import http.client
+        if self.address[0] == "tcp":
+            return http.client.HTTPConnection(self.address[1], self.address[2], timeout=self.timeout)
+        import socket
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.address[1])
+        connection = http.client.HTTPConnection("localhost", timeout=self.timeout)
+        connection.sock = sock
+        return connection
+
+    def call(self, method, path, params=None):
+        """(status, decoded JSON answer); raises OSError or ValueError if the daemon is not reachable"""
+        connection = self.connection()
+        try:
+            body = json.dumps(params).encode() if params is not None else None
+            connection.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            connection.close()
+
+    def request(self, method, path, params=None):
+        """The decoded JSON answer, None if the daemon is not reachable or the request failed"""
+        try:
+            status, payload = self.call(method, path, params)
+        except (OSError, ValueError) as e:
+            logging.error(f"Daemon not reachable, searching locally: {e}")
+            return None
+        if status != 200:
+            logging.error(f"Daemon answered {status}: {payload.get('error')}")
+            return None
+        return payload
+
+    def alive(self):
+        try:
+            return self.call("GET", "/health")[0] == 200
+        except (OSError, ValueError):
+            return False
+
+    def search(self, argv, resolve=False):
+        """TorrentResults of a query given as command line arguments, None to search locally"""
+        payload = self.request("POST", "/search", {"argv": argv, "resolve": resolve})
+        if payload is None:
+            return None
+        return [TorrentResult.from_dict(fields) for fields in payload["results"]]
+
+    def magnet(self, result):
+        if not result.magnet and result.detail_url:
+            payload = self.request("POST", "/magnet", {"site": result.site, "detail_url": result.detail_url})
+            result.set_magnet(payload and payload.get("magnet"))
+        return result.magnet
+
+def serve_main(argv):
+    """`torrtux serve`: keep sites, connections and caches warm and answer queries over HTTP"""
     parser = argparse.ArgumentParser(
+        prog="torrtux serve",
+        description="Run torrtux as a daemon answering search queries over a local HTTP API. "
+                    "Other options (--no-cache, --parse-workers, --pool-size, ...) are the search command's."
+    )
+    parser.add_argument("--socket", metavar="PATH",
+                        help="Unix socket to listen on (default: torrtux.sock in the cache directory)")
+    parser.add_argument("--port", type=int, help="Listen on a TCP port instead of a Unix socket")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on with --port (default: 127.0.0.1)")
+    serve_args, rest = parser.parse_known_args(argv)
+    options = build_parser().parse_args(rest)
+
+    if serve_args.port is not None:
+        address = ("tcp", serve_args.host, serve_args.port)
+    elif sys.platform == "win32":
+        print(colored("Unix sockets are not available here, use --port", "red"))
+        sys.exit(1)
+    else:
+        address = ("unix", serve_args.socket or default_socket_path())
+        if os.path.exists(address[1]):
+            if DaemonClient(address, timeout=2).alive():
+                print(colored(f"A torrtux daemon is already listening on {address[1]}", "red"))
+                sys.exit(1)
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(address[1])
+
+    try:
+        daemon = SearchDaemon(options)
+    except RuntimeError as e:
+        print(colored(f"{e}. Please check your internet connection or try using a VPN.", "red"))
+        sys.exit(1)
+    server = make_daemon_server(daemon, address)
+    where = address[1] if address[0] == "unix" else f"http://{address[1]}:{address[2]}"
+    print(colored(f"Torrtux daemon listening on {where}", "green"))
+    # Stop cleanly, removing the socket, when a service manager sends SIGTERM
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if address[0] == "unix" and os.path.exists(address[1]):
+            os.unlink(address[1])
+
+def build_parser(parser_class=argparse.ArgumentParser):
+    """The command line options, shared by the CLI and the queries a daemon answers"""
+    parser = parser_class(
         description="Torrtux - Professional Torrent Search Tool"
     )
     parser.add_argument(
@@ -1370,7 +4176,7 @@ def main():
     parser.add_argument(
         "-v", "--version",
         action="version",
-        version="Torrtux v1.0.3"
+        version=f"Torrtux v{VERSION}"
     )
     parser.add_argument(
         "--sites",
@@ -1402,6 +4208,49 @@ def main():
         help="Maximum number of seeds",
         default=None
     )
+    parser.add_argument(
+        "--sort",
+        choices=SORT_KEYS,
+        help="Rank results, best first; with --limit only the best N are kept",
+        default=None
+    )
+    parser.add_argument(
+        "--match",
+        type=str,
+        metavar="WORDS",
+        help="Only keep results whose names contain every one of these words",
+        default=None
+    )
+    parser.add_argument(
+        "--min-leeches",
+        type=int,
+        help="Minimum number of leeches",
+        default=None
+    )
+    parser.add_argument(
+        "--max-leeches",
+        type=int,
+        help="Maximum number of leeches",
+        default=None
+    )
+    parser.add_argument(
+        "--max-age",
+        type=parse_duration,
+        help="Only keep torrents uploaded within this age (e.g. 12h, 7d, 2w); undated rows are dropped",
+        default=None
+    )
+    parser.add_argument(
+        "--regex",
+        action="append",
+        metavar="PATTERN",
+        help="Only keep names matching this case-insensitive regex (repeatable, all must match)"
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        metavar="PATTERN",
+        help="Drop names matching this case-insensitive regex (repeatable)"
+    )
     parser.add_argument(
         "--export-csv",
         type=str,
@@ -1424,8 +4273,9 @@ def main():
     )
     parser.add_argument(
         "--category",
-        type=str,
-        help="Filter by content type (if supported by site)",
+        type=str.lower,
+        choices=CATEGORIES,
+        help="Ask sites that support it for one content type only; other sites return every type",
         default=None
     )
     parser.add_argument(
@@ -1439,6 +4289,40 @@ def main():
         action="store_true",
         help="Enable parallel search across sites"
     )
+    parser.add_argument(
+        "--deadline",
+        type=parse_duration,
+        help="Latency budget for the whole search, e.g. 5s or 800ms (default: none)",
+        default=None,
+        metavar="TIME"
+    )
+    parser.add_argument(
+        "--no-dedupe",
+        action="store_true",
+        help="Keep every copy of a torrent instead of merging copies found on several sites. "
+             "Rows of sites that only link a detail page (1337x, TorrentGalaxy, Bitsearch, ...) "
+             "are merged once their magnets are fetched: with --eager-magnets, exports or --magnets-only"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["threads", "async"],
+        help="Search engine: 'threads' (default) or 'async' to run all requests on one event loop",
+        default="threads"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Requests in flight at once with --engine async (default: 64)",
+        default=64,
+        metavar="N"
+    )
+    parser.add_argument(
+        "--per-host-limit",
+        type=int,
+        help="Requests in flight to a single host with --engine async (default: 6)",
+        default=6,
+        metavar="N"
+    )
     parser.add_argument(
         "--latest",
         action="store_true",
@@ -1454,8 +4338,181 @@ def main():
         action="store_true",
         help="Show detailed fetching messages"
     )
+    parser.add_argument(
+        "--probe-deadline",
+        type=positive_seconds,
+        help="Total time in seconds allowed for testing site mirrors (default: 10)",
+        default=10,
+        metavar="SECONDS"
+    )
+    parser.add_argument(
+        "--mirror-ttl",
+        type=float,
+        help="Seconds a cached working mirror is trusted before it is re-probed (default: 3600)",
+        default=3600,
+        metavar="SECONDS"
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        help="Keep-alive connections kept per host (default: 10)",
+        default=10,
+        metavar="N"
+    )
+    parser.add_argument(
+        "--pool-hosts",
+        type=int,
+        help="Number of hosts with a connection pool (default: 32)",
+        default=32,
+        metavar="N"
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        help="Parse result pages in N worker processes to use several cores (default: 0, parse in threads)",
+        default=0,
+        metavar="N"
+    )
+    parser.add_argument(
+        "--eager-magnets",
+        action="store_true",
+        help="Fetch every magnet link while searching instead of on demand"
+    )
+    parser.add_argument(
+        "--magnet-workers",
+        type=int,
+        help="Detail pages fetched at once when resolving magnet links (default: 16)",
+        default=16,
+        metavar="N"
+    )
+    parser.add_argument(
+        "--magnet-per-host",
+        type=int,
+        help="Detail pages fetched at once from a single host (default: 4)",
+        default=4,
+        metavar="N"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the on-disk response and magnet caches"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Revalidate cached pages with the sites instead of serving them from the cache"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        help="Maximum size of the response cache in MB (default: 64)",
+        default=64,
+        metavar="MB"
+    )
+    parser.add_argument(
+        "--ignore-breakers",
+        action="store_true",
+        help="Search sites even if their circuit breaker is open after recent failures"
+    )
+    parser.add_argument(
+        "--reprobe",
+        action="store_true",
+        help="Ignore the mirror cache and test all sites"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="table",
+        choices=["table", "json"],
+        help="Print time spent per stage and per site, with request counters, to stderr when done (default: table)"
+    )
+    parser.add_argument(
+        "--no-server",
+        action="store_true",
+        help="Search in this process even when a torrtux daemon is running "
+             "(implied by --refresh, --no-cache, --reprobe and --ignore-breakers)"
+    )
+    return parser
+
+def configure_runtime(args):
+    """Set up the shared HTTP client, caches, magnet resolver and parse pool"""
+    http_client = get_http_client()
+    http_client.configure(args.pool_hosts, args.pool_size)
+    if not args.no_cache:
+        try:
+            http_client.cache = ResponseCache(max_bytes=args.cache_size * 1024 ** 2)
+            TorrentSite.magnet_cache = MagnetCache()
+        except sqlite3.Error as e:
+            logging.error(f"Response cache disabled: {e}")
+    http_client.refresh = args.refresh
+    configure_magnet_resolver(args.magnet_workers, args.magnet_per_host)
+    configure_parse_pool(args.parse_workers)
+
+def search_results(searcher, args, result_filter):
+    """Lazy fetch -> parse -> merge -> filter -> rank pipeline for the parsed options"""
+    if args.deadline:
+        searcher.budget = DeadlineBudget(args.deadline)
+    searcher.plan = QueryPlan(min_seeds=args.min_seeds, category=args.category, sort=args.sort)
+
+    # Results flow fetch -> parse -> filter -> output as each site answers
+    if args.engine == "async":
+        searcher.engine = AsyncSearchEngine(args.concurrency, args.per_host_limit, verbose=args.verbose,
+                                            budget=searcher.budget, plan=searcher.plan)
+        results = searcher.engine.iter_search(searcher.working_sites, args.search, args.pages,
+                                              latest=args.latest, resolve=args.eager_magnets)
+    # Parallel search if --parallel
+    elif args.parallel:
+        results = searcher.iter_search_parallel(args.search, args.pages, verbose=args.verbose)
+    elif args.latest:
+        results = searcher.iter_search_latest_sites(args.pages, show_progress=args.progress, verbose=args.verbose)
+    else:
+        results = searcher.iter_search_all_sites(args.search, args.pages, show_progress=args.progress, verbose=args.verbose)
+
+    # Filtering by seeds/leeches/size/age/name in one pass
+    if args.no_dedupe:
+        results = result_filter.apply(results)
+    elif result_filter.bounds_merged_fields(upper_only=True):
+        # A merge can raise a count past an upper bound, so bounds are checked on the final ones
+        results = result_filter.apply(list(merge_duplicates(results)))
+    elif result_filter.bounds_merged_fields():
+        # Merged counts only grow, so rows stream out as soon as they pass a lower bound
+        results = result_filter.apply_merged(merge_duplicates(results, reemit=True), reemit=bool(args.sort))
+    else:
+        results = result_filter.apply(merge_duplicates(results, reemit=bool(args.sort)))
 
-    args = parser.parse_args()
+    # Filter by lang if supported (future extension)
+    # ...
+
+    match_terms = query_tokens(args.match) if args.match else None
+    if args.sort:
+        # Only the best --limit rows are kept while the results stream in
+        results = rank_results(results, args.sort, args.search, args.limit, match=match_terms)
+    elif match_terms:
+        results = TokenIndex(results).matching(match_terms)[:args.limit or None]
+    elif args.limit:
+        results = itertools.islice(results, args.limit)
+    return results
+
+def resolve_results(searcher, results, args, result_filter=None):
+    """Fetch the deferred magnets of the results to output, merging the duplicates they reveal"""
+    searcher.resolve_magnets(results)
+    if not args.no_dedupe:
+        # Rows resolved just now can reveal more duplicates, whose merged counts are checked again
+        results = merge_duplicates(results)
+        if result_filter is not None:
+            results = result_filter.apply(results)
+        results = list(results)
+        if args.sort:
+            results = rank_results(results, args.sort, args.search)
+    return results
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["serve"]:
+        serve_main(argv[1:])
+        return
+    parser = build_parser()
+    args = parser.parse_args(argv)
 
     if not args.quiet:
         print(colored(ASCII_ART, "cyan", attrs=["bold"]))
@@ -1464,98 +4521,100 @@ def main():
         parser.print_help()
         sys.exit(1)
 
-    if args.pages <= 0 or args.pages > 10:
-        print(colored("Page limit must be between 1 and 10", "red"))
+    try:
+        result_filter = query_filter(args)
+    except ValueError as e:
+        print(colored(str(e), "red"))
         sys.exit(1)
 
-    searcher = TorrentSearcher()
+    if args.profile:
+        profiler = configure_profiler()
+        atexit.register(print_profile, profiler, args.profile)
+
+    # Hand the query to a running daemon, whose sites, connections and caches are warm.
+    # Options that bypass those caches and mirrors apply to this process only.
+    client = None
+    if not (args.no_server or args.refresh or args.no_cache or args.reprobe or args.ignore_breakers):
+        client = DaemonClient.find()
+    if client is not None:
+        results = client.search(argv, resolve=bool(args.export_csv or args.export_json or args.magnets_only))
+        if results is not None:
+            print_search_banner(args)
+            output_results(TorrentSearcher([]), results, args, get_magnet=client.magnet)
+            return
 
-    if not searcher.test_sites():
-        print(colored("No working torrent sites available. Please check your internet connection or try using a VPN.", "red"))
+    configure_runtime(args)
+    # Only the selected sites are created, probed and searched
+    searcher = TorrentSearcher(args.sites.split(",") if args.sites else None)
+    if not searcher.sites:
+        print(colored("No matching sites found for your selection.", "red"))
         sys.exit(1)
+    searcher.eager_magnets = args.eager_magnets
+    mirror_cache = MirrorHealthCache(ttl=args.mirror_ttl)
+    breakers = CircuitBreakerStore()
+    if not args.ignore_breakers:
+        searcher.load_breakers(breakers)
 
-    # Filter sites if --sites is used
-    if args.sites:
-        selected_sites = [s.strip().lower() for s in args.sites.split(",")]
-        searcher.working_sites = [site for site in searcher.working_sites if site.name.lower() in selected_sites]
-        if not searcher.working_sites:
-            print(colored("No matching sites found for your selection.", "red"))
+    if not searcher.load_mirror_cache(mirror_cache, args.probe_deadline, args.reprobe):
+        if not searcher.test_sites(args.probe_deadline):
+            print(colored("No working torrent sites available. Please check your internet connection or try using a VPN.", "red"))
             sys.exit(1)
 
+    print_search_banner(args)
+    results = search_results(searcher, args, result_filter)
+
+    if args.magnets_only and not (args.export_csv or args.export_json):
+        count = searcher.stream_magnets(results, dedupe=not args.no_dedupe)
+        mirror_cache.save()
+        breakers.save()
+        print_http_stats(args.verbose)
+        if not count:
+            print(colored("No results found!", "red"))
+            sys.exit(0)
+        print(colored(f"\nTotal magnet links: {count}", "green", attrs=["bold"]))
+        sys.exit(0)
+
+    results = list(results)
+    mirror_cache.save()
+    breakers.save()
+    print_http_stats(args.verbose)
+
+    # Magnets are only fetched when they are shown or exported
+    if args.export_csv or args.export_json or args.magnets_only:
+        results = resolve_results(searcher, results, args, result_filter)
+    output_results(searcher, results, args, get_magnet=searcher.get_magnet)
+
+def print_search_banner(args):
     if not args.quiet:
         if args.search:
             print(colored(f"\nSearching for: '{args.search}'", "yellow", attrs=["bold"]))
         else:
             print(colored("\nFetching latest torrents...", "yellow", attrs=["bold"]))
 
-    # Parallel search if --parallel
-    if args.parallel:
-        all_results = []
-        def search_site(site):
-            results = []
-            try:
-                for page in range(args.pages):
-                    search_url = site.build_search_url(args.search, page)
-                    if not search_url or not isinstance(search_url, str) or not search_url.startswith("http"):
-                        break
-                    response = requests.get(search_url, timeout=15)
-                    if response.status_code == 200:
-                        results += site.parse_results(response.content, args.search)
-                    else:
-                        break
-            except Exception as e:
-                pass
-            return results
-        with ThreadPoolExecutor() as executor:
-            futures = [executor.submit(search_site, site) for site in searcher.working_sites]
-            for future in futures:
-                all_results += future.result()
-        results = all_results
-    elif args.latest:
-        results = searcher.search_latest_sites(args.pages, show_progress=args.progress, verbose=args.verbose)
-    else:
-        results = searcher.search_all_sites(args.search, args.pages, show_progress=args.progress, verbose=args.verbose)
-
-    # Filtering by seeds/size
-    if args.min_seeds is not None:
-        results = [r for r in results if r["seeds"] != '-' and r["seeds"].isdigit() and int(r["seeds"]) >= args.min_seeds]
-    if args.max_seeds is not None:
-        results = [r for r in results if r["seeds"] != '-' and r["seeds"].isdigit() and int(r["seeds"]) <= args.max_seeds]
-    if args.min_size is not None:
-        min_bytes = parse_size(args.min_size)
-        results = [r for r in results if r["size"] != '-' and parse_size(r["size"]) >= min_bytes]
-    if args.max_size is not None:
-        max_bytes = parse_size(args.max_size)
-        results = [r for r in results if r["size"] != '-' and parse_size(r["size"]) <= max_bytes]
-
-    # Filter by category/lang if supported (future extension)
-    # ...
-
-    if args.limit:
-        results = results[:args.limit]
-
+def output_results(searcher, results, args, get_magnet):
+    """Export, print and offer the magnet links of the final results"""
     if not results:
         print(colored("No results found!", "red"))
         sys.exit(0)
 
     if args.export_csv:
-        with open(args.export_csv, "w", newline="") as f:
+        with profiled("render"), open(args.export_csv, "w", newline="") as f:
             writer = csv.DictWriter(f, fieldnames=["site", "name", "size", "seeds", "leeches", "date", "magnet"])
             writer.writeheader()
             for r in results:
-                writer.writerow(r)
+                writer.writerow(export_row(r))
         print(colored(f"Results exported to {args.export_csv}", "green"))
 
     if args.export_json:
-        with open(args.export_json, "w") as f:
-            json.dump(results, f, indent=2)
+        with profiled("render"), open(args.export_json, "w") as f:
+            json.dump([export_row(r) for r in results], f, indent=2)
         print(colored(f"Results exported to {args.export_json}", "green"))
 
     if args.magnets_only:
         for r in results:
-            if r["magnet"]:
-                print(r["magnet"])
-        print(colored(f"\nTotal magnet links: {len([r for r in results if r['magnet']])}", "green", attrs=["bold"]))
+            if r.magnet:
+                print(r.magnet)
+        print(colored(f"\nTotal magnet links: {len([r for r in results if r.magnet])}", "green", attrs=["bold"]))
         sys.exit(0)
 
     if not args.quiet:
@@ -1564,9 +4623,10 @@ def main():
         print(colored("=" * 80, "cyan"))
 
     headers = ["#", "Site", "Name", "Size", "Seeds", "Leeches", "Date"]
-    formatted_results = searcher.format_results(results)
-    table = tabulate(formatted_results, headers=headers, tablefmt="fancy_grid", stralign="left", numalign="right")
-    print(table)
+    with profiled("render"):
+        formatted_results = searcher.format_results(results)
+        table = tabulate(formatted_results, headers=headers, tablefmt="fancy_grid", stralign="left", numalign="right")
+        print(table)
 
     print(colored(f"\nTotal results: {len(results)}", "green", attrs=["bold"]))
 
@@ -1582,7 +4642,7 @@ def main():
                 index = int(choice) - 1
                 if 0 <= index < len(results):
                     result = results[index]
-                    magnet_link = result.get("magnet")
+                    magnet_link = get_magnet(result)
                     if magnet_link:
                         print(colored("\nMagnet Link:", "yellow", attrs=["bold"]))
                         print(magnet_link)